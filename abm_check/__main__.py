@@ -1,5 +1,5 @@
 """Main entry point for abm_check CLI."""
-from abm_check.cli.main import cli
+from abm_check.cli.serve import main
 
 if __name__ == '__main__':
-    cli(obj={})
+    main()
@@ -4,9 +4,14 @@ import sys
 import logging
 from abm_check.infrastructure.storage import ProgramStorage
 from abm_check.infrastructure.markdown import MarkdownGenerator
-from abm_check.infrastructure.updater import ProgramUpdater
-from abm_check.infrastructure.download_list import DownloadListGenerator
+from abm_check.infrastructure.updater import ProgramUpdater, STRATEGIES, STRATEGY_FULL
+from abm_check.infrastructure.download_list import DownloadListGenerator, ChangeFeedWriter
+from abm_check.infrastructure.history import HistoryStore
+from abm_check.infrastructure.schedule import UpdateScheduler
+from abm_check.infrastructure.checkpoint import UpdateCheckpoint
+from abm_check.infrastructure.retry import get_retry_metrics
 from abm_check.domain.exceptions import AbmCheckError
+from abm_check.config import get_config
 
 
 # Setup logging
@@ -23,6 +28,10 @@ def setup_logger(verbose: bool = False, quiet: bool = False) -> logging.Logger:
     
     logger.setLevel(level)
     
+    # Replace the handler of a previous invocation in the same process
+    # (abm_check serve), which may point at a stale stream
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
     handler = logging.StreamHandler(sys.stderr)
     handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
     logger.addHandler(handler)
@@ -30,6 +39,44 @@ def setup_logger(verbose: bool = False, quiet: bool = False) -> logging.Logger:
     return logger
 
 
+def log_diff(logger: logging.Logger, diff, indent: str) -> None:
+    """Log the change counts of an EpisodeDiff, omitting empty optional classes."""
+    logger.info(f"{indent}New episodes: {len(diff.new_episodes)}")
+    logger.info(f"{indent}Premium to free: {len(diff.premium_to_free)}")
+    for label, episodes in (
+        ("Free to premium", diff.free_to_premium),
+        ("Removed", diff.removed),
+        ("Expired", diff.expired),
+        ("Title changed", diff.title_changed),
+        ("Duration changed", diff.duration_changed),
+    ):
+        if episodes:
+            logger.info(f"{indent}{label}: {len(episodes)}")
+
+
+def log_failures(logger: logging.Logger, updater) -> None:
+    """Log per-platform failure and circuit-breaker skip counts of an update-all run."""
+    for platform in sorted(set(updater.failures) | set(updater.skipped)):
+        failed = updater.failures.get(platform, {})
+        skipped = updater.skipped.get(platform, [])
+        message = f"{platform}: {len(failed)} programs failed"
+        if skipped:
+            message += f", {len(skipped)} skipped after repeated failures"
+        logger.error(message)
+        for failed_id, error in failed.items():
+            logger.error(f"  {failed_id}: {error}")
+
+
+def log_retries(logger: logging.Logger) -> None:
+    """Log per-platform retry counts of network calls made by the fetchers."""
+    for platform, metrics in sorted(get_retry_metrics().items()):
+        if metrics.retries:
+            logger.info(
+                f"{platform or 'unknown'}: {metrics.retries} retries, "
+                f"{metrics.recovered} calls recovered, {metrics.exhausted} gave up"
+            )
+
+
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='詳細ログ出力')
 @click.option('--quiet', '-q', is_flag=True, help='エラーのみ出力')
@@ -77,8 +124,14 @@ def add(ctx: click.Context, program_id_or_url: str) -> None:
 
         # Save to YAML
         storage = ProgramStorage(data_file=data_file)
-        storage.save_program(program)
-        logger.info(f"Saved to: {data_file or 'programs.yaml'}")
+        if storage.save_program(program):
+            logger.info(f"Saved to: {data_file or 'programs.yaml'}")
+        else:
+            logger.info("Program unchanged, nothing to save")
+
+        # Record the initial episode state
+        if get_config().history_enabled:
+            HistoryStore().record(program, at=program.updated_at)
 
         # Generate Markdown
         md_gen = MarkdownGenerator()
@@ -100,15 +153,23 @@ def add(ctx: click.Context, program_id_or_url: str) -> None:
 
 
 @cli.command()
+@click.option('--dormant', is_flag=True, default=False, help='休眠中 (配信終了とみなした) 番組のみ表示')
 @click.pass_context
-def list(ctx: click.Context) -> None:
+def list(ctx: click.Context, dormant: bool) -> None:
     """番組一覧を表示"""
     logger = ctx.obj['logger']
     data_file = ctx.obj['data_file']
 
     try:
         storage = ProgramStorage(data_file=data_file)
-        programs = storage.load_programs()
+        programs = storage.load_program_summaries()
+
+        if dormant:
+            dormant_ids = set(UpdateScheduler().dormant(program.id for program in programs))
+            programs = [program for program in programs if program.id in dormant_ids]
+            if not programs:
+                logger.info("No dormant programs")
+                sys.exit(0)
 
         if not programs:
             logger.info("No programs found")
@@ -155,7 +216,7 @@ def view(ctx: click.Context, program_id: str) -> None:
 
         if program_id.isdigit():
             storage = ProgramStorage(data_file=data_file)
-            programs = storage.load_programs()
+            programs = storage.load_program_summaries()
             sorted_programs = sorted(programs, key=lambda p: p.updated_at, reverse=True)
 
             seq = int(program_id)
@@ -197,8 +258,26 @@ def version(ctx: click.Context) -> None:
 @click.argument('program_id', required=False)
 @click.option('--output', '-o', default='download_urls.txt', help='出力ファイル名')
 @click.option('--format', type=click.Choice(['txt', 'yaml']), default='txt', help='出力形式 (デフォルト: txt)')
+@click.option('--scheduled', is_flag=True, help='更新が見込まれる番組のみ取得 (配信周期から次回確認時刻を予測)')
+@click.option('--max-duration', type=click.FloatRange(min=0), default=None,
+              help='全番組更新の制限時間 (秒)。更新が見込まれる番組から順に処理し、残りは次回に回す')
+@click.option('--resume', is_flag=True, default=False,
+              help='中断された全番組更新を続きから再開し、DLリストに中断前の検出分も含める')
+@click.option('--strategy', type=click.Choice(STRATEGIES), default=STRATEGY_FULL, show_default=True,
+              help='取得方法 (full: 番組全体を再取得 / premium: プレミアム限定エピソードだけを個別に再確認 / '
+                   'latest-season: 最新シーズンとプレミアム限定が残るシーズンだけを再取得)')
+@click.option('--include-dormant', is_flag=True, default=False,
+              help='休眠中 (配信終了とみなした) 番組も確認間隔を待たずに取得')
+@click.option('--no-probe', 'no_probe', is_flag=True, default=False,
+              help='軽量な変更確認 (一覧のみの取得) を省略し、常に番組全体を取得')
+@click.option('--stream', 'stream', type=click.Choice(['jsonl']), default=None,
+              help='検出した変更を番組ごとにJSON Linesで即時出力')
+@click.option('--stream-to', 'stream_to', type=click.Path(dir_okay=False, allow_dash=True), default=None,
+              help='--stream の出力先 (ファイル・FIFO。既定: 標準出力)')
 @click.pass_context
-def update(ctx: click.Context, program_id: str, output: str, format: str) -> None:
+def update(ctx: click.Context, program_id: str, output: str, format: str, scheduled: bool,
+           max_duration: float, resume: bool, strategy: str, include_dormant: bool,
+           no_probe: bool, stream: str, stream_to) -> None:
     """
     番組情報を更新してDL対象を検出
 
@@ -206,12 +285,24 @@ def update(ctx: click.Context, program_id: str, output: str, format: str) -> Non
     """
     logger = ctx.obj['logger']
     data_file = ctx.obj['data_file']
+    if stream_to is not None and not stream:
+        raise click.UsageError("--stream-to requires --stream")
 
     try:
         storage = ProgramStorage(data_file=data_file)
-        updater = ProgramUpdater(data_file=data_file)
+        # Always track check results so finished programs can go dormant
+        scheduler = UpdateScheduler()
+        checkpoint = None if program_id else UpdateCheckpoint()
+        updater = ProgramUpdater(
+            data_file=data_file, scheduler=scheduler, checkpoint=checkpoint, strategy=strategy,
+            probe=not no_probe
+        )
         dl_gen = DownloadListGenerator()
         md_gen = MarkdownGenerator()
+        feed = None
+        if stream:
+            # Opened only now so a feed file is never truncated by a run that does not stream
+            feed = ChangeFeedWriter(ctx.with_resource(click.open_file(stream_to or '-', 'w', encoding='utf-8')))
 
         if program_id:
             logger.info(f"Updating program: {program_id}")
@@ -221,46 +312,131 @@ def update(ctx: click.Context, program_id: str, output: str, format: str) -> Non
                 logger.error(f"Program not found: {program_id}")
                 sys.exit(1)
 
-            if not diff.new_episodes and not diff.premium_to_free:
+            if not diff.has_changes:
                 logger.info("No changes detected")
                 sys.exit(0)
 
             program = storage.find_program(program_id)
+            if feed:
+                feed.write(program, diff)
             md_gen.save_program_md(program)
 
-            dl_file = dl_gen.generate_download_list(program, diff, output, format=format)
-
             logger.info(f"Changes detected:")
-            logger.info(f"  New episodes: {len(diff.new_episodes)}")
-            logger.info(f"  Premium to free: {len(diff.premium_to_free)}")
-            logger.info(f"Download list: {dl_file}")
+            log_diff(logger, diff, indent="  ")
+
+            if diff.has_downloads:
+                dl_file = dl_gen.generate_download_list(program, diff, output, format=format)
+                logger.info(f"Download list: {dl_file}")
 
         else:
+            program_ids = None
+            resuming = resume and checkpoint.exists()
+            if resume and not resuming:
+                logger.info("No interrupted run to resume, starting a new one")
+
+            if resuming:
+                # Keep the original selection and order; completed programs are skipped
+                program_ids = checkpoint.program_ids
+                started_at = checkpoint.started_at.strftime('%Y/%m/%d %H:%M:%S')
+                logger.info(
+                    f"Resuming run started at {started_at}: "
+                    f"{len(checkpoint.completed_ids())} programs already done"
+                )
+            else:
+                all_ids = [summary.id for summary in storage.load_program_summaries()]
+                candidates = all_ids
+                if not include_dormant:
+                    resting = set(scheduler.resting(all_ids))
+                    if resting:
+                        logger.info(
+                            f"Skipping {len(resting)} dormant programs "
+                            f"(use --include-dormant to check them)"
+                        )
+                        candidates = [pid for pid in all_ids if pid not in resting]
+                        program_ids = candidates
+
+                if scheduled or max_duration is not None:
+                    program_ids = candidates
+
+                if scheduled:
+                    program_ids = scheduler.due(candidates)
+                    logger.info(f"{len(program_ids)} of {len(candidates)} programs due for a check")
+                    if not program_ids:
+                        next_check = scheduler.next_check_time(candidates)
+                        if next_check:
+                            logger.info(f"Next check: {next_check.strftime('%Y/%m/%d %H:%M:%S')}")
+                        sys.exit(0)
+
+                if max_duration is not None:
+                    # Most promising programs first, so the time limit cuts the least useful ones
+                    program_ids = scheduler.prioritize(program_ids)
+
+                # Programs of an interrupted run are already saved with their changes;
+                # report those it never wrote out in this run instead of dropping them
+                carried = checkpoint.unreported_diffs() if checkpoint.exists() else {}
+                if carried:
+                    started_at = checkpoint.started_at.strftime('%Y/%m/%d %H:%M:%S')
+                    logger.warning(
+                        f"Replacing unfinished run started at {started_at}: including changes it "
+                        f"found in {len(carried)} programs (use --resume to continue it instead)"
+                    )
+                checkpoint.start(program_ids, carried=carried)
+
             logger.info("Updating all programs...")
-            results = updater.update_all_programs()
+            results = updater.update_all_programs(
+                program_ids, max_duration=max_duration, on_result=feed.write if feed else None
+            )
+
+            if updater.pending:
+                logger.info(
+                    f"Time limit reached: {len(updater.pending)} programs left for the next run "
+                    f"(use --resume to continue this one)"
+                )
+            log_retries(logger)
+            log_failures(logger, updater)
+            # Failed programs are retried by any later run; only programs this
+            # run never reached need the checkpoint
+            finished = not (updater.pending or updater.skipped)
+            exit_code = 1 if updater.failures else 0
 
             if not results:
                 logger.info("No changes detected in any program")
-                sys.exit(0)
-
-            updates = {}
-            for prog_id, diff in results.items():
-                program = storage.find_program(prog_id)
-                md_gen.save_program_md(program)
-                updates[prog_id] = (program, diff)
-
-            dl_file = dl_gen.generate_combined_list(updates, output, format=format)
+                if finished:
+                    checkpoint.clear()
+                sys.exit(exit_code)
+
+            # Load the changed programs in a single pass over storage
+            updates = {
+                program.id: (program, results[program.id])
+                for program in storage.iter_programs(results.keys())
+            }
+            md_gen.save_programs_md(program for program, _ in updates.values())
+
+            downloads = {
+                program_id: update for program_id, update in updates.items()
+                if update[1].has_downloads
+            }
+            dl_file = None
+            if downloads:
+                dl_file = dl_gen.generate_combined_list(downloads, output, format=format)
 
             logger.info(f"Updated {len(results)} programs")
-            for prog_id, diff in results.items():
-                program = storage.find_program(prog_id)
+            for program, diff in updates.values():
                 logger.info(f"  {program.title}:")
-                logger.info(f"    New episodes: {len(diff.new_episodes)}")
-                logger.info(f"    Premium to free: {len(diff.premium_to_free)}")
+                log_diff(logger, diff, indent="    ")
 
             if dl_file:
                 logger.info(f"Download list: {dl_file}")
 
+            # Only a finished run gives up its checkpoint; outputs above are written first.
+            # An unfinished one keeps it for --resume, but a new run will not carry
+            # these diffs over again.
+            if finished:
+                checkpoint.clear()
+            else:
+                checkpoint.mark_reported()
+            sys.exit(exit_code)
+
         sys.exit(0)
 
     except AbmCheckError as e:
@@ -271,5 +447,165 @@ def update(ctx: click.Context, program_id: str, output: str, format: str) -> Non
         sys.exit(1)
 
 
+@cli.command()
+@click.argument('program_id')
+@click.option('--at', 'at', type=click.DateTime(), default=None,
+              help='指定日時のエピソード状態を表示 (例: 2025-11-08T07:00:00)')
+@click.pass_context
+def history(ctx: click.Context, program_id: str, at) -> None:
+    """
+    エピソードの配信状態の履歴を表示
+
+    PROGRAM_ID: 番組ID
+    """
+    logger = ctx.obj['logger']
+
+    def status(state) -> str:
+        if state.is_downloadable:
+            return '✅'
+        return '🔒' if state.is_premium_only else '⛔'
+
+    try:
+        store = HistoryStore()
+
+        if not store.has_history(program_id):
+            logger.error(f"No history recorded for: {program_id}")
+            sys.exit(1)
+
+        if at:
+            states = store.state_at(program_id, at)
+            for state in sorted(states.values(), key=lambda s: s.number):
+                print(f"{state.number:02d} {status(state)} {state.id}")
+        else:
+            for delta in store.deltas(program_id):
+                timestamp = delta.timestamp.strftime('%Y/%m/%d %H:%M:%S')
+                for state in delta.added:
+                    print(f"{timestamp} + {state.id} 第{state.number}話 {status(state)}")
+                for state in delta.flipped:
+                    print(f"{timestamp} ~ {state.id} 第{state.number}話 {status(state)}")
+                for episode_id in delta.removed:
+                    print(f"{timestamp} - {episode_id}")
+
+        sys.exit(0)
+
+    except AbmCheckError as e:
+        logger.error(f"Failed to read history: {e}")
+        sys.exit(1)
+
+
+@cli.command(name='export')
+@click.option('--format', type=click.Choice(['jsonl']), default='jsonl', help='出力形式 (デフォルト: jsonl)')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-', help='出力ファイル (デフォルト: 標準出力)')
+@click.option('--per-episode', is_flag=True, help='1行に1エピソードを出力')
+@click.pass_context
+def export_programs(ctx: click.Context, format: str, output, per_episode: bool) -> None:
+    """番組データベースをJSON Linesで出力"""
+    logger = ctx.obj['logger']
+    data_file = ctx.obj['data_file']
+
+    try:
+        storage = ProgramStorage(data_file=data_file)
+        count = storage.export_jsonl(output, per_episode=per_episode)
+        output.flush()
+        logger.info(f"Exported {count} programs")
+
+        sys.exit(0)
+
+    except AbmCheckError as e:
+        logger.error(f"Failed to export: {e}")
+        sys.exit(1)
+
+
+@cli.command(name='import')
+@click.argument('input', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--replace', is_flag=True, help='入力に含まれない番組を削除')
+@click.pass_context
+def import_programs(ctx: click.Context, input, replace: bool) -> None:
+    """
+    JSON Linesから番組データベースに取り込み
+
+    INPUT: 入力ファイル (省略時は標準入力)
+    """
+    logger = ctx.obj['logger']
+    data_file = ctx.obj['data_file']
+
+    try:
+        storage = ProgramStorage(data_file=data_file)
+        count = storage.import_jsonl(input, replace=replace)
+        logger.info(f"Imported {count} programs into {storage.data_file}")
+
+        sys.exit(0)
+
+    except AbmCheckError as e:
+        logger.error(f"Failed to import: {e}")
+        sys.exit(1)
+
+
+@cli.group(name='storage')
+def storage_group() -> None:
+    """データベースの保守"""
+
+
+@storage_group.command()
+@click.pass_context
+def compact(ctx: click.Context) -> None:
+    """変更ジャーナルをprograms.yamlに統合"""
+    logger = ctx.obj['logger']
+    data_file = ctx.obj['data_file']
+
+    try:
+        storage = ProgramStorage(data_file=data_file)
+        records = storage.compact()
+
+        if records:
+            logger.info(f"Compacted {records} journal records into {storage.data_file}")
+        else:
+            logger.info("Journal is empty, nothing to compact")
+
+        sys.exit(0)
+
+    except AbmCheckError as e:
+        logger.error(f"Failed to compact storage: {e}")
+        sys.exit(1)
+
+
+@storage_group.command()
+@click.pass_context
+def migrate(ctx: click.Context) -> None:
+    """データベースを最新のスキーマバージョンに変換"""
+    logger = ctx.obj['logger']
+    data_file = ctx.obj['data_file']
+
+    try:
+        storage = ProgramStorage(data_file=data_file)
+        old_version, new_version = storage.migrate()
+
+        if old_version == new_version:
+            logger.info(f"Already at schema version {new_version}")
+        else:
+            logger.info(f"Migrated {storage.data_file} from schema version {old_version} to {new_version}")
+
+        sys.exit(0)
+
+    except AbmCheckError as e:
+        logger.error(f"Failed to migrate storage: {e}")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='待ち受けるアドレス')
+@click.option('--port', type=int, default=0, help='待ち受けるポート (既定: 空きポート)')
+@click.pass_context
+def serve(ctx: click.Context, host: str, port: int) -> None:
+    """常駐してコマンドを高速に実行 (実行中は他のabm_checkコマンドが自動的に転送される)"""
+    from abm_check.cli.serve import discovery_path, serve as run_server
+
+    logger = ctx.obj['logger']
+    logger.info(f"Serving abm_check commands (address in {discovery_path()}); press Ctrl+C to stop")
+    run_server(host, port)
+    logger.info("Server stopped")
+    sys.exit(0)
+
+
 if __name__ == '__main__':
     cli(obj={})
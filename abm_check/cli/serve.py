@@ -0,0 +1,272 @@
+"""Long-running server that runs CLI commands in a warm process, and its client."""
+import contextlib
+import io
+import json
+import os
+import sys
+import traceback
+from pathlib import Path
+from typing import List, Optional, Tuple
+from abm_check.config import get_config
+from abm_check.utils.fileio import atomic_write_text
+
+
+DISCOVERY_FILE = 'serve.json'
+TOKEN_HEADER = 'X-Abm-Check-Token'
+NO_DAEMON_ENV = 'ABM_CHECK_NO_DAEMON'
+
+# Commands that use the client's own standard input/output
+LOCAL_COMMANDS = ('serve', 'import', 'export')
+
+# Global options that take a value, to find the command name after them
+GLOBAL_VALUE_OPTIONS = ('--data-file',)
+
+
+def discovery_path(config=None) -> Path:
+    """Get the file a running server announces its address in."""
+    config = config or get_config()
+    return Path(config.cache_dir) / DISCOVERY_FILE
+
+
+def read_discovery(config=None) -> Optional[dict]:
+    """Read the running server's address, or None if no server announced one."""
+    try:
+        with open(discovery_path(config), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict) or not {'host', 'port', 'token', 'cwd'} <= data.keys():
+        return None
+    return data
+
+
+def run_command(args: List[str]) -> Tuple[int, str, str]:
+    """
+    Run a CLI command in this process, capturing its output.
+
+    Args:
+        args: Command line arguments, without the program name
+
+    Returns:
+        Tuple of (exit code, stdout, stderr)
+    """
+    from abm_check.cli.main import cli
+    from abm_check.infrastructure.retry import reset_retry_metrics
+
+    # Counters are per command, as in a fresh process
+    reset_retry_metrics()
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            cli.main(args=args, prog_name='abm_check', obj={})
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def serve(host: str = '127.0.0.1', port: int = 0, config=None) -> None:
+    """
+    Serve CLI commands over HTTP until interrupted.
+
+    Requests are handled one at a time, so commands never overlap. The
+    address and an access token are written to the discovery file, which
+    is removed again on shutdown.
+
+    Args:
+        host: Address to bind (keep it local)
+        port: Port to bind (0 picks a free one)
+        config: Configuration object (optional)
+    """
+    import secrets
+    import signal
+
+    config = config or get_config()
+    server = create_server(host, port, secrets.token_hex(16))
+    path = discovery_path(config)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    announcement = {
+        'host': server.server_address[0],
+        'port': server.server_address[1],
+        'token': server.token,
+        'pid': os.getpid(),
+        'cwd': os.getcwd(),
+    }
+    atomic_write_text(path, json.dumps(announcement), mode=0o600)
+
+    # Shut down cleanly on SIGTERM as well as Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if (read_discovery(config) or {}).get('pid') == os.getpid():
+            path.unlink(missing_ok=True)
+
+
+def create_server(host: str, port: int, token: str):
+    """
+    Create the single-threaded HTTP server.
+
+    Endpoints (all require the token in the ``X-Abm-Check-Token`` header):
+
+    - ``GET /health``: ``{"pid": ...}``
+    - ``POST /cli`` with ``{"args": [...]}``: runs the command and answers
+      ``{"exitCode": ..., "stdout": ..., "stderr": ...}``
+    """
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class CliRequestHandler(BaseHTTPRequestHandler):
+        server_version = 'abm_check'
+
+        def do_GET(self) -> None:
+            if not self._authorized():
+                return
+            if self.path != '/health':
+                self._respond(404, {'error': 'Not found'})
+                return
+            self._respond(200, {'pid': os.getpid()})
+
+        def do_POST(self) -> None:
+            if not self._authorized():
+                return
+            if self.path != '/cli':
+                self._respond(404, {'error': 'Not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                args = json.loads(self.rfile.read(length) or b'{}').get('args')
+            except (ValueError, AttributeError):
+                args = None
+            if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+                self._respond(400, {'error': 'Expected {"args": [str, ...]}'})
+                return
+            if 'serve' in args:
+                self._respond(400, {'error': 'Cannot run serve inside the server'})
+                return
+
+            code, stdout, stderr = run_command(args)
+            self._respond(200, {'exitCode': code, 'stdout': stdout, 'stderr': stderr})
+
+        def log_message(self, format: str, *args) -> None:
+            # Command output is returned to the client; keep the server quiet
+            pass
+
+        def _authorized(self) -> bool:
+            if self.headers.get(TOKEN_HEADER) != token:
+                self._respond(403, {'error': 'Forbidden'})
+                return False
+            return True
+
+        def _respond(self, status: int, body: dict) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = HTTPServer((host, port), CliRequestHandler)
+    server.token = token
+    return server
+
+
+def forward(args: List[str], config=None) -> Optional[int]:
+    """
+    Run a command on the running server, if there is one for this directory.
+
+    Commands are run locally instead when no server is announced, it does
+    not answer, it was started in another directory (relative paths would
+    differ), the command uses standard input or output (``import``,
+    ``export``, ``update --stream`` or a ``-`` argument), or
+    ``ABM_CHECK_NO_DAEMON`` is set.
+
+    Args:
+        args: Command line arguments, without the program name
+        config: Configuration object (optional)
+
+    Returns:
+        Exit code of the forwarded command, or None to run it locally
+    """
+    if os.environ.get(NO_DAEMON_ENV) or runs_locally(args):
+        return None
+    server = read_discovery(config)
+    if server is None or server['cwd'] != os.getcwd():
+        return None
+
+    import urllib.error
+    import urllib.request
+
+    request = urllib.request.Request(
+        f"http://{server['host']}:{server['port']}/cli",
+        data=json.dumps({'args': args}).encode('utf-8'),
+        headers={'Content-Type': 'application/json', TOKEN_HEADER: server['token']},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            result = json.loads(response.read())
+    except (OSError, ValueError):
+        # Stale discovery file or a server from another version; run locally
+        return None
+
+    sys.stdout.write(result.get('stdout', ''))
+    sys.stderr.write(result.get('stderr', ''))
+    return result.get('exitCode', 1)
+
+
+def runs_locally(args: List[str]) -> bool:
+    """
+    Check whether a command must run in the client process.
+
+    The server only returns output once a command has finished, and reads
+    its own standard input, so commands streaming from or to the terminal
+    cannot be forwarded.
+
+    Args:
+        args: Command line arguments, without the program name
+
+    Returns:
+        True if the command must not be forwarded
+    """
+    if '-' in args:
+        return True
+    command = _command_name(args)
+    if command in LOCAL_COMMANDS:
+        return True
+    if command == 'update':
+        return any(arg == '--stream' or arg.startswith('--stream=') for arg in args)
+    return False
+
+
+def _command_name(args: List[str]) -> Optional[str]:
+    """Get the subcommand name, skipping global options."""
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+        elif arg in GLOBAL_VALUE_OPTIONS:
+            skip_value = True
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+
+def main() -> None:
+    """Console entry point: forward to a running server, or run the command here."""
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from abm_check.cli.main import cli
+    cli(obj={})
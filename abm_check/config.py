@@ -21,6 +21,10 @@ class Config:
         'storage': {
             'programs_file': 'programs.yaml',
             'output_dir': 'output',
+            'journal': False,
+            'lock_timeout': 60, # seconds
+            'compact_formats': True,
+            'binary_snapshot': True,
         },
         'ytdlp': {
             'quiet': True,
@@ -31,6 +35,36 @@ class Config:
         'cache': {
             'cache_dir': '.cache',
             'cache_ttl': 3600, # seconds (1 hour)
+            'negative_ttl': 900, # seconds to remember missing programs, seasons and videos
+        },
+        'history': {
+            'enabled': False,
+            'dir': 'history',
+        },
+        'schedule': {
+            'min_interval': 3600, # seconds
+            'max_interval': 1209600, # seconds (2 weeks)
+            'overdue_interval': 10800, # seconds (poll every 3 hours once a release is due)
+            'default_interval': 86400, # seconds, used without release history
+            'full_refresh_interval': 604800, # seconds between full fetches with --strategy latest-season
+            'dormant_after_runs': 5, # checks without changes before a finished program goes dormant
+            'dormant_after_days': 60, # days without a release before a finished program goes dormant
+            'dormant_interval': 604800, # seconds, first check interval of a dormant program (doubles)
+            'dormant_max_interval': 7776000, # seconds (90 days)
+            'platform_intervals': {
+                'abema': 604800,
+                'tver': 604800,
+                'niconico': 86400,
+            },
+        },
+        'retry': {
+            'max_attempts': 3, # per network call, including the first
+            'base_delay': 1.0, # seconds, doubled on every retry
+            'max_delay': 30.0, # seconds
+            'platforms': {}, # per-platform overrides, e.g. {'niconico': {'max_attempts': 5}}
+        },
+        'circuit_breaker': {
+            'failure_threshold': 3, # consecutive failures per platform, 0 to disable
         },
     }
     
@@ -127,6 +161,26 @@ class Config:
         """Get output directory path."""
         return self.get('storage.output_dir', 'output')
     
+    @property
+    def journal_enabled(self) -> bool:
+        """Get whether program changes are appended to a journal."""
+        return bool(self.get('storage.journal', False))
+    
+    @property
+    def compact_formats(self) -> bool:
+        """Get whether episode formats are stored as shared per-program ladders."""
+        return bool(self.get('storage.compact_formats', True))
+    
+    @property
+    def binary_snapshot(self) -> bool:
+        """Get whether a binary snapshot sidecar is kept next to the YAML file."""
+        return bool(self.get('storage.binary_snapshot', True))
+    
+    @property
+    def lock_timeout(self) -> float:
+        """Get seconds to wait for the storage writer lock."""
+        return self.get('storage.lock_timeout', 60)
+    
     @property
     def ytdlp_opts(self) -> dict:
         """Get yt-dlp options."""
@@ -147,6 +201,85 @@ class Config:
         """Get cache Time-To-Live in seconds."""
         return self.get('cache.cache_ttl', 3600)
 
+    @property
+    def negative_cache_ttl(self) -> int:
+        """Get how long in seconds a missing program, season or video is remembered."""
+        return self.get('cache.negative_ttl', 900)
+
+    @property
+    def history_enabled(self) -> bool:
+        """Get whether episode availability history is recorded on update."""
+        return bool(self.get('history.enabled', False))
+
+    @property
+    def history_dir(self) -> str:
+        """Get episode history directory path."""
+        return self.get('history.dir', 'history')
+
+    @property
+    def schedule_min_interval(self) -> int:
+        """Get the shortest time in seconds between scheduled checks."""
+        return self.get('schedule.min_interval', 3600)
+
+    @property
+    def schedule_max_interval(self) -> int:
+        """Get the longest time in seconds between scheduled checks."""
+        return self.get('schedule.max_interval', 1209600)
+
+    @property
+    def schedule_overdue_interval(self) -> int:
+        """Get seconds between checks while an expected release is overdue."""
+        return self.get('schedule.overdue_interval', 10800)
+
+    @property
+    def schedule_default_interval(self) -> int:
+        """Get the release interval in seconds assumed without history."""
+        return self.get('schedule.default_interval', 86400)
+
+    @property
+    def schedule_full_refresh_interval(self) -> int:
+        """Get seconds after which a latest-season update re-fetches every season."""
+        return self.get('schedule.full_refresh_interval', 604800)
+
+    @property
+    def schedule_dormant_after_runs(self) -> int:
+        """Get checks without changes after which a finished program goes dormant."""
+        return self.get('schedule.dormant_after_runs', 5)
+
+    @property
+    def schedule_dormant_after_days(self) -> int:
+        """Get days without a release after which a finished program goes dormant."""
+        return self.get('schedule.dormant_after_days', 60)
+
+    @property
+    def schedule_dormant_interval(self) -> int:
+        """Get the first check interval in seconds of a dormant program."""
+        return self.get('schedule.dormant_interval', 604800)
+
+    @property
+    def schedule_dormant_max_interval(self) -> int:
+        """Get the longest check interval in seconds of a dormant program."""
+        return self.get('schedule.dormant_max_interval', 7776000)
+
+    @property
+    def schedule_platform_intervals(self) -> dict:
+        """Get per-platform release intervals in seconds assumed without history."""
+        intervals = dict(self.DEFAULT_CONFIG['schedule']['platform_intervals'])
+        intervals.update(self.get('schedule.platform_intervals', {}) or {})
+        return intervals
+
+    def retry_settings(self, platform: str) -> dict:
+        """Get retry settings for a platform, with its overrides applied."""
+        settings = {key: value for key, value in self.get('retry', {}).items() if key != 'platforms'}
+        overrides = (self.get('retry.platforms', {}) or {}).get(platform) or {}
+        settings.update(overrides)
+        return settings
+
+    @property
+    def circuit_breaker_threshold(self) -> int:
+        """Get consecutive failures after which a platform is skipped for the rest of a run."""
+        return self.get('circuit_breaker.failure_threshold', 3)
+
 
 _config_instance: Optional[Config] = None
 
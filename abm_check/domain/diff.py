@@ -0,0 +1,125 @@
+"""Episode diff engine."""
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Iterable, List, Optional
+from abm_check.domain.models import Episode
+
+
+@dataclass
+class EpisodeDiff:
+    """Represents changes detected in episodes."""
+
+    new_episodes: List[Episode]
+    premium_to_free: List[Episode]
+    removed: List[Episode] = field(default_factory=list)  # Old versions
+    free_to_premium: List[Episode] = field(default_factory=list)
+    expired: List[Episode] = field(default_factory=list)  # Old versions
+    title_changed: List[Episode] = field(default_factory=list)
+    duration_changed: List[Episode] = field(default_factory=list)
+
+    @property
+    def has_downloads(self) -> bool:
+        """Whether there are episodes to put on the download list."""
+        return bool(self.new_episodes or self.premium_to_free)
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether any change was detected."""
+        return bool(
+            self.new_episodes or self.premium_to_free or self.removed
+            or self.free_to_premium or self.expired
+            or self.title_changed or self.duration_changed
+        )
+
+
+def diff_episodes(
+    old_episodes: Iterable[Episode],
+    new_episodes: Iterable[Episode],
+    now: Optional[datetime] = None
+) -> EpisodeDiff:
+    """
+    Compare two episode lists in a single pass over ID-keyed sets.
+
+    Change classes:
+        - new_episodes: unseen episodes that are downloadable
+        - premium_to_free: premium-only episodes that became downloadable
+        - free_to_premium: downloadable episodes that became premium-only
+        - removed: episodes no longer listed (old versions)
+        - expired: downloadable episodes whose expiration date has passed
+          and that are gone or no longer downloadable (old versions)
+        - title_changed / duration_changed: metadata edits (new versions)
+
+    Args:
+        old_episodes: Stored episodes
+        new_episodes: Freshly fetched episodes
+        now: Reference time for expirations (defaults to now)
+
+    Returns:
+        EpisodeDiff with every change class
+    """
+    now = now or datetime.now()
+    old_by_id = {ep.id: ep for ep in old_episodes}
+    diff = EpisodeDiff(new_episodes=[], premium_to_free=[])
+
+    for new_ep in new_episodes:
+        old_ep = old_by_id.pop(new_ep.id, None)
+
+        if old_ep is None:
+            if new_ep.is_downloadable:
+                diff.new_episodes.append(new_ep)
+            continue
+
+        if old_ep.is_premium_only and new_ep.is_downloadable:
+            diff.premium_to_free.append(new_ep)
+        elif old_ep.is_downloadable and not new_ep.is_downloadable:
+            if new_ep.is_premium_only:
+                diff.free_to_premium.append(new_ep)
+            if has_expired(old_ep, now):
+                diff.expired.append(old_ep)
+
+        if old_ep.title != new_ep.title:
+            diff.title_changed.append(new_ep)
+        if old_ep.duration != new_ep.duration:
+            diff.duration_changed.append(new_ep)
+
+    # Whatever was not matched has disappeared
+    for old_ep in old_by_id.values():
+        diff.removed.append(old_ep)
+        if old_ep.is_downloadable and has_expired(old_ep, now):
+            diff.expired.append(old_ep)
+
+    return diff
+
+
+def merge_diffs(earlier: EpisodeDiff, later: EpisodeDiff) -> EpisodeDiff:
+    """
+    Combine the diffs of two consecutive updates of the same program.
+
+    Every change class keeps the episodes of both diffs; an episode listed
+    in both keeps its later version.
+
+    Args:
+        earlier: Diff of the first update
+        later: Diff of the following update
+
+    Returns:
+        Combined EpisodeDiff
+    """
+    merged = {}
+    for f in fields(EpisodeDiff):
+        episodes = {ep.id: ep for ep in getattr(earlier, f.name)}
+        episodes.update((ep.id, ep) for ep in getattr(later, f.name))
+        merged[f.name] = list(episodes.values())
+    return EpisodeDiff(**merged)
+
+
+def has_expired(episode: Episode, now: datetime) -> bool:
+    """Check whether an episode's expiration date has passed."""
+    if episode.expiration_date is None:
+        return False
+    expiration = episode.expiration_date
+    if expiration.tzinfo is not None and now.tzinfo is None:
+        now = now.astimezone()
+    elif expiration.tzinfo is None and now.tzinfo is not None:
+        expiration = expiration.astimezone()
+    return expiration <= now
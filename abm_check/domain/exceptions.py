@@ -72,6 +72,13 @@ class FetchError(AbmCheckError):
         super().__init__(msg)
 
 
+class SourceNotFoundError(FetchError):
+    """Program no longer exists or is blocked at its source."""
+
+    def __init__(self, program_id: str, reason: str = "Not found"):
+        super().__init__(program_id, reason)
+
+
 class StorageError(AbmCheckError):
     """Storage operation failed."""
     
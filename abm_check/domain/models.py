@@ -62,4 +62,16 @@ class Program:
     fetched_at: datetime
     updated_at: datetime
     platform: str = 'abema'  # 'abema', 'tver', 'niconico'
+    source_fingerprint: Optional[str] = None  # Hash of the raw fetched entries
+    probe_token: Optional[str] = None  # Change token of the cheap listing probe
 
+
+@dataclass
+class ProgramSummary:
+    """Program header information without episodes."""
+    
+    id: str
+    title: str
+    platform: str
+    updated_at: datetime
+    fingerprint: Optional[str] = None  # Content hash excluding timestamps
@@ -0,0 +1,195 @@
+"""Checkpoint of an in-progress update-all run."""
+import json
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from abm_check.domain.diff import EpisodeDiff, merge_diffs
+from abm_check.domain.models import Episode
+from abm_check.config import get_config
+from abm_check.utils.fileio import append_line, atomic_write_text
+
+
+class UpdateCheckpoint:
+    """
+    Record the progress of an update-all run so it can be resumed.
+
+    The checkpoint is a JSON Lines file: a header describing the run, then
+    one line per completed program with its diff. Lines are appended as
+    programs finish, so a crash loses at most the program in flight.
+
+    Diffs carried over from a replaced, unfinished run are stored as
+    records marked ``carried``; they are reported but do not count as
+    completed programs. A ``reported`` marker line records that the diffs
+    before it were written to the run's outputs, so they are not carried
+    over again.
+    """
+
+    def __init__(self, checkpoint_file: str = None, config=None):
+        """
+        Initialize checkpoint.
+
+        Args:
+            checkpoint_file: Path to the checkpoint file (optional)
+            config: Configuration object (optional)
+        """
+        self.config = config or get_config()
+        if checkpoint_file is None:
+            checkpoint_file = Path(self.config.cache_dir) / 'update_checkpoint.json'
+        self.checkpoint_file = Path(checkpoint_file)
+
+    def exists(self) -> bool:
+        """Check whether an unfinished run was recorded."""
+        return self.checkpoint_file.exists()
+
+    def start(self, program_ids: Optional[List[str]] = None,
+              carried: Optional[Dict[str, EpisodeDiff]] = None) -> None:
+        """
+        Start a new run, replacing any previous checkpoint.
+
+        Args:
+            program_ids: Programs the run will update, in order (None for all)
+            carried: Diffs of a previous run not yet reported (optional)
+        """
+        header = {
+            'startedAt': datetime.now().isoformat(timespec='seconds'),
+            'programIds': program_ids,
+        }
+        lines = [self._to_line(header)]
+        for program_id, diff in (carried or {}).items():
+            lines.append(self._to_line({'id': program_id, 'diff': self._diff_to_dict(diff), 'carried': True}))
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.checkpoint_file, '\n'.join(lines) + '\n')
+
+    def mark_done(self, program_id: str, diff: Optional[EpisodeDiff]) -> None:
+        """
+        Record a completed program.
+
+        Args:
+            program_id: Program ID
+            diff: Detected changes (stored only if there are any)
+        """
+        record = {'id': program_id}
+        if diff is not None and diff.has_changes:
+            record['diff'] = self._diff_to_dict(diff)
+        append_line(self.checkpoint_file, self._to_line(record))
+
+    def mark_reported(self) -> None:
+        """Record that the diffs so far were written to the run's outputs."""
+        append_line(self.checkpoint_file, self._to_line({'reported': True}))
+
+    def clear(self) -> None:
+        """Remove the checkpoint after the run finished."""
+        self.checkpoint_file.unlink(missing_ok=True)
+
+    @property
+    def started_at(self) -> Optional[datetime]:
+        """Start time of the recorded run."""
+        header = self._read()[0]
+        return datetime.fromisoformat(header['startedAt']) if header else None
+
+    @property
+    def program_ids(self) -> Optional[List[str]]:
+        """Programs planned for the recorded run (None for all)."""
+        header = self._read()[0]
+        return header.get('programIds') if header else None
+
+    def completed_ids(self) -> Set[str]:
+        """IDs of the programs the recorded run completed."""
+        return {
+            record['id'] for record in self._read()[1]
+            if 'id' in record and not record.get('carried')
+        }
+
+    def diffs(self) -> Dict[str, EpisodeDiff]:
+        """Diffs of the programs that had changes (carried ones first), in completion order."""
+        return self._collect_diffs(self._read()[1])
+
+    def unreported_diffs(self) -> Dict[str, EpisodeDiff]:
+        """Diffs recorded after the outputs were last written, to carry into a new run."""
+        records = self._read()[1]
+        for i in range(len(records) - 1, -1, -1):
+            if records[i].get('reported'):
+                records = records[i + 1:]
+                break
+        return self._collect_diffs(records)
+
+    def _collect_diffs(self, records: List[dict]) -> Dict[str, EpisodeDiff]:
+        """Merge the diffs of program records by program, in completion order."""
+        diffs = {}
+        for record in records:
+            if 'diff' not in record:
+                continue
+            diff = self._dict_to_diff(record['diff'])
+            program_id = record['id']
+            diffs[program_id] = merge_diffs(diffs[program_id], diff) if program_id in diffs else diff
+        return diffs
+
+    def _read(self):
+        """Read the header and program records, ignoring a truncated last line."""
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                lines = [line for line in f.read().split('\n') if line.strip()]
+        except FileNotFoundError:
+            return None, []
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Interrupted append; everything before it is intact
+                break
+        if not records:
+            return None, []
+        return records[0], records[1:]
+
+    def _to_line(self, record: dict) -> str:
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+    def _diff_to_dict(self, diff: EpisodeDiff) -> dict:
+        """Serialize the non-empty change classes of a diff."""
+        return {
+            f.name: [self._episode_to_dict(ep) for ep in getattr(diff, f.name)]
+            for f in fields(diff)
+            if getattr(diff, f.name)
+        }
+
+    def _dict_to_diff(self, data: dict) -> EpisodeDiff:
+        values = {
+            f.name: [self._dict_to_episode(ep) for ep in data.get(f.name, [])]
+            for f in fields(EpisodeDiff)
+        }
+        return EpisodeDiff(**values)
+
+    def _episode_to_dict(self, episode: Episode) -> dict:
+        """Serialize what download lists and logs need; formats are dropped."""
+        return {
+            'id': episode.id,
+            'number': episode.number,
+            'title': episode.title,
+            'description': episode.description,
+            'duration': episode.duration,
+            'thumbnailUrl': episode.thumbnail_url,
+            'isDownloadable': episode.is_downloadable,
+            'isPremiumOnly': episode.is_premium_only,
+            'downloadUrl': episode.download_url,
+            'uploadDate': episode.upload_date,
+            'expirationDate': episode.expiration_date.isoformat() if episode.expiration_date else None,
+        }
+
+    def _dict_to_episode(self, data: dict) -> Episode:
+        return Episode(
+            id=data['id'],
+            number=data['number'],
+            title=data['title'],
+            description=data['description'],
+            duration=data['duration'],
+            thumbnail_url=data['thumbnailUrl'],
+            is_downloadable=data['isDownloadable'],
+            is_premium_only=data['isPremiumOnly'],
+            download_url=data['downloadUrl'],
+            formats=[],
+            upload_date=data['uploadDate'],
+            expiration_date=datetime.fromisoformat(data['expirationDate']) if data['expirationDate'] else None
+        )
@@ -0,0 +1,45 @@
+"""Circuit breaker for failing platforms."""
+from typing import Dict
+
+
+class CircuitBreaker:
+    """
+    Stop calling a platform after repeated consecutive failures.
+
+    Each key (a platform name) has its own count of consecutive failures,
+    reset by any success. Once the count reaches the threshold the circuit
+    is open and stays open for the lifetime of the breaker, so the rest of
+    that platform's work can be skipped without waiting for more timeouts.
+    """
+
+    def __init__(self, threshold: int):
+        """
+        Initialize circuit breaker.
+
+        Args:
+            threshold: Consecutive failures that open a circuit (0 disables)
+        """
+        self.threshold = threshold
+        self._consecutive: Dict[str, int] = {}
+
+    def is_open(self, key: str) -> bool:
+        """Check whether calls for a key should be skipped."""
+        return self.threshold > 0 and self._consecutive.get(key, 0) >= self.threshold
+
+    def record_success(self, key: str) -> None:
+        """Record a successful call."""
+        self._consecutive[key] = 0
+
+    def record_failure(self, key: str) -> bool:
+        """
+        Record a failed call.
+
+        Args:
+            key: Key of the failed call
+
+        Returns:
+            True if this failure opened the circuit
+        """
+        was_open = self.is_open(key)
+        self._consecutive[key] = self._consecutive.get(key, 0) + 1
+        return not was_open and self.is_open(key)
@@ -1,10 +1,11 @@
 """Download list generator."""
+import json
 from pathlib import Path
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, TextIO
 from datetime import datetime
 import yaml
 from abm_check.domain.models import Program, Episode
-from abm_check.infrastructure.updater import EpisodeDiff
+from abm_check.domain.diff import EpisodeDiff
 
 
 class DownloadListGenerator:
@@ -157,16 +158,66 @@ class DownloadListGenerator:
 
     def _create_yaml_entry(self, ep: Episode, program: Program, entry_type: str) -> Dict[str, Any]:
         """Create a single YAML entry dictionary."""
-        return {
-            "id": ep.id,
-            "url": ep.get_episode_url(program.id),
-            "title": ep.title,
-            "series": program.title,
-            "episode_number": ep.number,
-            "season_number": 1,  # TODO: Season support if available in Episode model
-            "duration": ep.duration,
-            "thumbnail": ep.thumbnail_url,
-            "upload_date": ep.upload_date if ep.upload_date else "",
+        return _download_entry(ep, program, entry_type)
+
+
+class ChangeFeedWriter:
+    """
+    Write each program's changes as a JSON line the moment they are detected.
+
+    Lines are flushed immediately so a downloader reading the stream (stdout,
+    a FIFO or a file) can start on new episodes while the update continues.
+    Download entries use the same fields as the YAML download list.
+    """
+
+    def __init__(self, stream: TextIO):
+        """
+        Initialize writer.
+
+        Args:
+            stream: Text stream to write to
+        """
+        self.stream = stream
+
+    def write(self, program: Program, diff: EpisodeDiff) -> None:
+        """
+        Write the changes of one program.
+
+        Args:
+            program: Program the changes belong to
+            diff: Detected changes
+        """
+        record = {
+            "programId": program.id,
+            "title": program.title,
             "platform": program.platform,
-            "entry_type": entry_type
+            "detectedAt": datetime.now().astimezone().isoformat(timespec='seconds'),
+            "entries": (
+                [_download_entry(ep, program, "new") for ep in diff.new_episodes]
+                + [_download_entry(ep, program, "premium_to_free") for ep in diff.premium_to_free]
+            ),
+            "removed": [ep.id for ep in diff.removed],
+            "freeToPremium": [ep.id for ep in diff.free_to_premium],
+            "expired": [ep.id for ep in diff.expired],
+            "titleChanged": [ep.id for ep in diff.title_changed],
+            "durationChanged": [ep.id for ep in diff.duration_changed],
         }
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+def _download_entry(ep: Episode, program: Program, entry_type: str) -> Dict[str, Any]:
+    """Describe an episode to download."""
+    return {
+        "id": ep.id,
+        "url": ep.get_episode_url(program.id),
+        "title": ep.title,
+        "series": program.title,
+        "episode_number": ep.number,
+        "season_number": 1,  # TODO: Season support if available in Episode model
+        "duration": ep.duration,
+        "thumbnail": ep.thumbnail_url,
+        "upload_date": ep.upload_date if ep.upload_date else "",
+        "platform": program.platform,
+        "entry_type": entry_type
+    }
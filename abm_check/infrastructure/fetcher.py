@@ -1,31 +1,233 @@
 """ABEMA program information fetcher using yt-dlp."""
-import yt_dlp
+import hashlib
 import json
+import re
 import time
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
 from abm_check.domain.models import Program, Episode, VideoFormat
-from abm_check.domain.exceptions import FetchError, SeasonDetectionError, YtdlpError
+from abm_check.domain.exceptions import FetchError, SeasonDetectionError, SourceNotFoundError, YtdlpError
 from abm_check.config import get_config
+from abm_check.infrastructure.negative_cache import NegativeCache, is_not_found
+from abm_check.infrastructure.retry import RetryPolicy, call_with_retry, is_transient
 
 
 from abc import ABC, abstractmethod
 
+
+def __getattr__(name: str):
+    # yt-dlp takes hundreds of milliseconds to import, so it is loaded on
+    # first use; ``fetcher.yt_dlp`` still resolves to the module
+    if name == 'yt_dlp':
+        import yt_dlp
+        return yt_dlp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def season_of(episode_id: str) -> Optional[int]:
+    """Get the season number from an ABEMA episode ID (e.g. "26-249_s2_p3" -> 2)."""
+    match = re.search(r'_s(\d+)_', episode_id)
+    return int(match.group(1)) if match else None
+
+
 class BaseFetcher(ABC):
     """Base class for program fetchers."""
+
+    platform = ''  # Platform name used for retry settings and metrics
     
     def __init__(self, config=None):
         """Initialize fetcher with configuration."""
         self.config = config or get_config()
         self.cache_dir = Path(self.config.cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.negative_cache = NegativeCache(config=self.config)
     
     @abstractmethod
-    def fetch_program_info(self, program_id: str) -> Program:
-        """Fetch program information."""
+    def fetch_program_info(self, program_id: str, known_fingerprint: Optional[str] = None) -> Optional[Program]:
+        """
+        Fetch program information.
+
+        Args:
+            program_id: Program ID
+            known_fingerprint: Source fingerprint of the stored program
+                (optional). When the fetched entries still match it, nothing
+                is converted and None is returned.
+
+        Returns:
+            Program with ``source_fingerprint`` set, or None if unchanged
+        """
         pass
 
+    def probe(self, program_id: str, known_token: Optional[str] = None) -> Optional[str]:
+        """
+        Get a change token of a program with a single cheap request.
+
+        The token changes when episodes are added or removed; it does not
+        necessarily change when an episode's availability does. Callers
+        compare it with the token stored from the previous fetch.
+
+        Args:
+            program_id: Program ID
+            known_token: Token from the previous probe (optional), used for
+                conditional requests where the platform supports them
+
+        Returns:
+            Change token, or None if the platform cannot be probed
+        """
+        return None
+
+    def fetch_episodes(self, episode_ids: Iterable[str]) -> Dict[str, Episode]:
+        """
+        Fetch episodes one by one from their episode pages.
+
+        Much cheaper than a full program fetch when only a few stored
+        episodes need checking.
+
+        Args:
+            episode_ids: Episode IDs
+
+        Returns:
+            Dict of episode_id -> Episode for the episodes that could be
+            extracted; episodes that fail or are known to be missing are
+            left out
+
+        Raises:
+            NotImplementedError: If the platform has no episode pages to fetch
+        """
+        episode_ids = list(episode_ids)
+        if not episode_ids:
+            return {}
+        if self._episode_url(episode_ids[0]) is None:
+            raise NotImplementedError(f"{type(self).__name__} cannot fetch single episodes")
+        import yt_dlp
+
+        episodes = {}
+        with yt_dlp.YoutubeDL(self.config.ytdlp_opts) as ydl:
+            for episode_id in episode_ids:
+                if self._is_known_missing('video', episode_id):
+                    continue
+                try:
+                    info = self._call_with_retry(ydl.extract_info, self._episode_url(episode_id), download=False)
+                except Exception as e:
+                    # Still unavailable (or gone); the stored state stays as is
+                    if is_not_found(e):
+                        self._remember_missing('video', episode_id)
+                    continue
+                if info:
+                    episodes[episode_id] = self._convert_to_episode(info)
+        return episodes
+
+    def _episode_url(self, episode_id: str) -> Optional[str]:
+        """Get the page URL of a single episode, or None if the platform has none."""
+        return None
+
+    def fetch_seasons(self, program_id: str, seasons: Iterable[int]) -> Dict[int, List[Episode]]:
+        """
+        Fetch selected seasons of a program.
+
+        Args:
+            program_id: Program ID
+            seasons: Season numbers to fetch
+
+        Returns:
+            Dict of season -> episodes for the seasons that exist
+
+        Raises:
+            NotImplementedError: If the platform has no seasons
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no seasons")
+
+    def _entry_fingerprint(self, entry: Dict[str, Any]) -> str:
+        """Fingerprint the raw entry fields that episode conversion and diffing depend on."""
+        fields = [
+            entry.get('id', ''),
+            entry.get('availability', ''),
+            len(entry.get('formats') or []),
+            entry.get('duration', 0),
+            entry.get('title', ''),
+        ]
+        return hashlib.blake2b(json.dumps(fields, ensure_ascii=False).encode('utf-8'), digest_size=8).hexdigest()
+
+    def _convert_if_changed(
+        self, info: Dict[str, Any], entries: List[Dict[str, Any]], known_fingerprint: Optional[str]
+    ) -> Optional[Program]:
+        """Convert raw entries to a Program unless they still match known_fingerprint."""
+        fingerprint = self._source_fingerprint(info, entries)
+        if known_fingerprint is not None and fingerprint == known_fingerprint:
+            return None
+        program = self._convert_entries(info, entries)
+        program.source_fingerprint = fingerprint
+        return program
+
+    def _convert_entries(self, info: Dict[str, Any], entries: List[Dict[str, Any]]) -> Program:
+        """Convert a raw info dict and its entries to a Program."""
+        return self._convert_to_program_with_episodes(
+            info, [self._convert_to_episode(entry) for entry in entries]
+        )
+
+    def _source_fingerprint(self, info: Dict[str, Any], entries: Iterable[Dict[str, Any]]) -> str:
+        """Fingerprint a program from its header fields and its entries' fingerprints, in order."""
+        digest = hashlib.sha256()
+        header = [info.get('title', ''), info.get('description', ''), info.get('thumbnail', '')]
+        digest.update(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+        for entry in entries:
+            digest.update(self._entry_fingerprint(entry).encode('ascii'))
+        return digest.hexdigest()
+
+    def _listing_token(self, entries: List[Dict[str, Any]]) -> str:
+        """Build a probe token from the entries of a flat listing, in order."""
+        digest = hashlib.sha256(str(len(entries)).encode('ascii'))
+        for entry in entries:
+            fields = [entry.get('id', ''), entry.get('availability', ''), entry.get('title', ''), entry.get('duration', 0)]
+            digest.update(json.dumps(fields, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _extract_program_page(self, ydl, program_id: str, url: str) -> Dict[str, Any]:
+        """
+        Extract a program page, mapping failures to the fetch exceptions.
+
+        Raises:
+            SourceNotFoundError: If the program is gone or blocked
+            YtdlpError: If extraction fails otherwise
+            FetchError: If yt-dlp returns nothing
+        """
+        try:
+            info = self._call_with_retry(ydl.extract_info, url, download=False)
+        except Exception as e:
+            if is_not_found(e):
+                self._remember_missing('program', program_id)
+                raise SourceNotFoundError(program_id, str(e))
+            raise YtdlpError(f"Failed to extract info from {url}: {str(e)}")
+        if info is None:
+            raise FetchError(program_id, "yt-dlp returned no information.")
+        return info
+
+    def _flat_ytdlp_opts(self) -> Dict[str, Any]:
+        """yt-dlp options that list playlist entries without extracting each one."""
+        return dict(self.config.ytdlp_opts, extract_flat='in_playlist')
+
+    def _is_known_missing(self, kind: str, *parts) -> bool:
+        """Check whether a program, season or video was recently found missing."""
+        return self._missing_key(kind, *parts) in self.negative_cache
+
+    def _remember_missing(self, kind: str, *parts) -> None:
+        """Record a missing program, season or video in the negative cache."""
+        self.negative_cache.add(self._missing_key(kind, *parts))
+
+    def _missing_key(self, kind: str, *parts) -> str:
+        return ':'.join([self.platform, kind] + [str(part) for part in parts])
+
+    def _check_not_missing(self, program_id: str) -> None:
+        """Raise SourceNotFoundError without a network call if the program is known to be missing."""
+        if self._is_known_missing('program', program_id):
+            raise SourceNotFoundError(program_id, "Not found (cached)")
+
+    def _call_with_retry(self, func, *args, **kwargs):
+        """Call a network function, retrying transient errors per the platform's retry settings."""
+        policy = RetryPolicy.from_settings(self.config.retry_settings(self.platform))
+        return call_with_retry(func, *args, policy=policy, platform=self.platform, **kwargs)
+
     def _get_cache_path(self, program_id: str) -> Path:
         """Get the path for a program's cache file."""
         return self.cache_dir / f"{program_id}.json"
@@ -62,33 +264,35 @@ class BaseFetcher(ABC):
 
 class AbemaFetcher(BaseFetcher):
     """Fetch ABEMA program information using yt-dlp."""
+
+    platform = 'abema'
     
     def __init__(self, config=None):
         super().__init__(config)
 
-    def fetch_program_info(self, program_id: str) -> Program:
+    def fetch_program_info(self, program_id: str, known_fingerprint: Optional[str] = None) -> Optional[Program]:
         """
         Fetch program information from ABEMA.
         
         Args:
             program_id: Program ID (e.g., "26-249")
+            known_fingerprint: Source fingerprint of the stored program (optional)
             
         Returns:
-            Program object with all information
+            Program object with all information, or None if the source still
+            matches known_fingerprint
             
         Raises:
+            SourceNotFoundError: If the program is gone or blocked
             FetchError: If fetching fails
         """
         # Try to load from cache first
         cached_info = self._load_cache(program_id)
         if cached_info:
-            # If cache hit, convert and return
-            all_episodes = []
-            if 'entries' in cached_info and cached_info['entries']:
-                for entry in cached_info['entries']:
-                    if entry:
-                        all_episodes.append(self._convert_to_episode(entry))
-            return self._convert_to_program_with_episodes(cached_info, all_episodes)
+            entries = [entry for entry in cached_info.get('entries') or [] if entry]
+            return self._convert_if_changed(cached_info, entries, known_fingerprint)
+        self._check_not_missing(program_id)
+        import yt_dlp
 
         # If not in cache, fetch from network
         url = f"{self.config.base_url}/{program_id}"
@@ -96,62 +300,158 @@ class AbemaFetcher(BaseFetcher):
         ydl_opts = self.config.ytdlp_opts
         
         try:
-            all_episodes = []
-            
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                try:
-                    info = ydl.extract_info(url, download=False)
-                except Exception as e:
-                    raise YtdlpError(f"Failed to extract info from {url}: {str(e)}")
-                
-                if info is None:
-                    raise FetchError(program_id, "yt-dlp returned no information.")
-
-                if 'entries' in info and info['entries']:
-                    for entry in info['entries']:
-                        if entry:
-                            all_episodes.append(self._convert_to_episode(entry))
-                
-                first_season_count = len(all_episodes)
-                
-                if first_season_count >= self.config.season_threshold:
-                    season = 2
-                    while season <= self.config.max_seasons:
-                        season_url = self.config.season_url_pattern.format(
-                            program_id=program_id,
-                            season=season
-                        )
-                        try:
-                            season_info = ydl.extract_info(season_url, download=False)
-                            
-                            if 'entries' in season_info and season_info['entries']:
-                                season_episodes = []
-                                for entry in season_info['entries']:
-                                    if entry:
-                                        season_episodes.append(self._convert_to_episode(entry))
-                                
-                                if season_episodes:
-                                    all_episodes.extend(season_episodes)
-                                    season += 1
-                                else:
-                                    break
-                            else:
-                                break
-                        except yt_dlp.utils.DownloadError as e:
-                            # Season not found, which is an expected outcome.
-                            break
+                info = self._extract_program_page(ydl, program_id, url)
+                entries = [entry for entry in info.get('entries') or [] if entry]
+                self._follow_seasons(ydl, program_id, entries)
                 
                 # Save to cache before returning
                 self._save_cache(program_id, info)
-                return self._convert_to_program_with_episodes(info, all_episodes)
+                return self._convert_if_changed(info, entries, known_fingerprint)
                 
         except YtdlpError:
             raise
-        except FetchError: # Re-raise FetchError from inside
+        except FetchError: # Re-raise FetchError (and SourceNotFoundError) from inside
             raise
         except Exception as e:
             raise FetchError(program_id, str(e))
+
     
+    def _follow_seasons(self, ydl, program_id: str, entries: List[Dict[str, Any]]) -> None:
+        """Append the entries of seasons 2 and later while they exist, if season 1 is long enough."""
+        import yt_dlp
+        if len(entries) < self.config.season_threshold:
+            return
+
+        season = 2
+        while season <= self.config.max_seasons:
+            if self._is_known_missing('season', program_id, season):
+                break
+            season_url = self.config.season_url_pattern.format(
+                program_id=program_id,
+                season=season
+            )
+            try:
+                season_info = self._call_with_retry(ydl.extract_info, season_url, download=False)
+
+                if 'entries' in season_info and season_info['entries']:
+                    season_entries = [entry for entry in season_info['entries'] if entry]
+
+                    if season_entries:
+                        entries.extend(season_entries)
+                        season += 1
+                    else:
+                        self._remember_missing('season', program_id, season)
+                        break
+                else:
+                    self._remember_missing('season', program_id, season)
+                    break
+            except yt_dlp.utils.DownloadError as e:
+                # Season not found, which is an expected outcome.
+                if not is_transient(e):
+                    self._remember_missing('season', program_id, season)
+                break
+
+    def probe(self, program_id: str, known_token: Optional[str] = None) -> Optional[str]:
+        """
+        Get a change token from the flat episode listing of an ABEMA program.
+
+        Seasons are followed like in a full fetch, but episode pages are
+        not extracted, so this costs one listing request per season.
+
+        Raises:
+            SourceNotFoundError: If the program is gone or blocked
+            YtdlpError: If the listing cannot be extracted
+        """
+        if self._load_cache(program_id):
+            # A cached fetch is cheaper than any probe
+            return None
+        self._check_not_missing(program_id)
+        import yt_dlp
+        url = f"{self.config.base_url}/{program_id}"
+        try:
+            with yt_dlp.YoutubeDL(self._flat_ytdlp_opts()) as ydl:
+                info = self._extract_program_page(ydl, program_id, url)
+                entries = [entry for entry in info.get('entries') or [] if entry]
+                self._follow_seasons(ydl, program_id, entries)
+        except (YtdlpError, FetchError):
+            raise
+        except Exception as e:
+            raise FetchError(program_id, str(e))
+        return self._listing_token(entries)
+
+    def _episode_url(self, episode_id: str) -> Optional[str]:
+        """Get the ABEMA episode page URL."""
+        return f"{self.config.episode_base_url}/{episode_id}"
+
+    def fetch_seasons(self, program_id: str, seasons: Iterable[int]) -> Dict[int, List[Episode]]:
+        """
+        Fetch selected seasons of an ABEMA program.
+
+        Season 1 is the program page itself; later seasons use
+        ``season_url_pattern``. Seasons after the highest requested one are
+        followed until one is missing, so newly started seasons are found.
+
+        Args:
+            program_id: Program ID (e.g., "26-249")
+            seasons: Season numbers to fetch
+
+        Returns:
+            Dict of season -> episodes for the seasons that exist
+
+        Raises:
+            SourceNotFoundError: If the program is gone or blocked
+            YtdlpError: If the program page cannot be extracted
+        """
+        seasons = sorted(set(seasons))
+        result = {}
+        if not seasons:
+            return result
+        self._check_not_missing(program_id)
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(self.config.ytdlp_opts) as ydl:
+            for season in seasons:
+                episodes = self._fetch_season(ydl, program_id, season)
+                if episodes:
+                    result[season] = episodes
+
+            # Follow seasons started since the latest requested one
+            season = seasons[-1] + 1
+            while seasons[-1] in result and season <= self.config.max_seasons:
+                episodes = self._fetch_season(ydl, program_id, season)
+                if not episodes:
+                    break
+                result[season] = episodes
+                season += 1
+        return result
+
+    def _fetch_season(self, ydl, program_id: str, season: int) -> List[Episode]:
+        """Fetch the episodes of one season, or an empty list if it does not exist."""
+        import yt_dlp
+        if season == 1:
+            url = f"{self.config.base_url}/{program_id}"
+        elif self._is_known_missing('season', program_id, season):
+            return []
+        else:
+            url = self.config.season_url_pattern.format(program_id=program_id, season=season)
+        try:
+            info = self._call_with_retry(ydl.extract_info, url, download=False)
+        except yt_dlp.utils.DownloadError as e:
+            if season == 1:
+                if is_not_found(e):
+                    self._remember_missing('program', program_id)
+                    raise SourceNotFoundError(program_id, str(e))
+                raise YtdlpError(f"Failed to extract info from {url}")
+            # Season not found, which is an expected outcome.
+            if not is_transient(e):
+                self._remember_missing('season', program_id, season)
+            return []
+        entries = [entry for entry in (info or {}).get('entries') or [] if entry]
+        if not entries and season > 1:
+            self._remember_missing('season', program_id, season)
+        return [self._convert_to_episode(entry) for entry in entries]
+
     def _convert_to_program_with_episodes(self, info: Dict[str, Any], episodes: list) -> Program:
         """Convert yt-dlp info dict and episode list to Program model."""
         now = datetime.now()
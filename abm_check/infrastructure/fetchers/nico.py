@@ -1,44 +1,50 @@
 """Nicovideo (Nico Nico Douga) fetcher implementation using RSS."""
-import feedparser
+import json
 import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
-import yt_dlp
 
 from abm_check.domain.models import Program, Episode, VideoFormat
-from abm_check.domain.exceptions import FetchError, YtdlpError
+from abm_check.domain.exceptions import FetchError, SourceNotFoundError, YtdlpError
 from abm_check.infrastructure.fetcher import BaseFetcher
+from abm_check.infrastructure.negative_cache import is_not_found
+from abm_check.infrastructure.retry import is_transient
 
 
 class NicoFetcher(BaseFetcher):
     """Fetch Nicovideo channel information using RSS + yt-dlp."""
 
-    def fetch_program_info(self, program_id: str) -> Program:
+    platform = 'niconico'
+
+    def fetch_program_info(self, program_id: str, known_fingerprint: Optional[str] = None) -> Optional[Program]:
         """
         Fetch program information from Nicovideo channel.
         
         Args:
             program_id: Nicovideo channel name (e.g. "danime")
+            known_fingerprint: Source fingerprint of the stored program (optional)
             
         Returns:
-            Program object
+            Program object, or None if the source still matches known_fingerprint
         """
         # Try cache first
         cached_info = self._load_cache(program_id)
         if cached_info:
-            all_episodes = []
-            if 'entries' in cached_info and cached_info['entries']:
-                for entry in cached_info['entries']:
-                    if entry:
-                        all_episodes.append(self._convert_to_episode(entry))
-            return self._convert_to_program_with_entries(cached_info, all_episodes, program_id)
+            entries = [entry for entry in cached_info.get('entries') or [] if entry]
+            return self._convert_if_changed(cached_info, entries, known_fingerprint)
+        self._check_not_missing(program_id)
+        import yt_dlp
 
         # Fetch RSS feed
         rss_url = f"https://ch.nicovideo.jp/{program_id}/video?rss=2.0"
         
         try:
-            feed = feedparser.parse(rss_url)
+            feed = self._call_with_retry(self._parse_feed, rss_url)
             
+            if feed.get('status') in (404, 410):
+                self._remember_missing('program', program_id)
+                raise SourceNotFoundError(program_id, f"Channel feed returned HTTP {feed.get('status')}")
+
             if feed.bozo and not feed.entries:
                 raise FetchError(program_id, f"Failed to parse RSS feed: {feed.get('bozo_exception', 'Unknown error')}")
             
@@ -55,41 +61,107 @@ class NicoFetcher(BaseFetcher):
                 raise FetchError(program_id, "No video IDs found in RSS feed")
             
             # Fetch details for each video using yt-dlp
-            episodes = []
+            video_infos = []
             ydl_opts = self.config.ytdlp_opts
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 for video_id in video_ids[:50]:  # Limit to 50 most recent
+                    if self._is_known_missing('video', video_id):
+                        continue
                     try:
                         video_url = f"https://www.nicovideo.jp/watch/{video_id}"
-                        info = ydl.extract_info(video_url, download=False)
+                        info = self._call_with_retry(ydl.extract_info, video_url, download=False)
                         if info:
-                            episodes.append(self._convert_to_episode(info))
+                            video_infos.append(info)
                     except Exception as e:
+                        if is_not_found(e):
+                            self._remember_missing('video', video_id)
                         # Log but continue if individual video fails
                         print(f"Warning: Failed to fetch {video_id}: {e}")
                         continue
             
-            # Create synthetic info dict for caching
             # Safely access feed.feed attributes
             feed_info = getattr(feed, 'feed', {})
-            synthetic_info = {
+            header = {
                 'id': program_id,
                 'title': feed_info.get('title', program_id) if feed_info else program_id,
                 'description': feed_info.get('description', '') if feed_info else '',
                 'webpage_url': f"https://ch.nicovideo.jp/{program_id}",
                 'thumbnail': '',
-                'entries': [ep.__dict__ for ep in episodes]
             }
+            program = self._convert_if_changed(header, video_infos, known_fingerprint)
+            if program is None:
+                return None
             
+            # Create synthetic info dict for caching
+            synthetic_info = dict(header, entries=[ep.__dict__ for ep in program.episodes])
             self._save_cache(program_id, synthetic_info)
-            return self._convert_to_program_with_entries(synthetic_info, episodes, program_id)
+            return program
             
         except FetchError:
             raise
         except Exception as e:
             raise FetchError(program_id, str(e))
 
+    def probe(self, program_id: str, known_token: Optional[str] = None) -> Optional[str]:
+        """
+        Get a change token from the channel's RSS feed.
+
+        The token holds the feed's ETag, the newest item and the item
+        count. With a known token the feed is requested conditionally, so
+        an unchanged channel answers 304 without a body.
+
+        Raises:
+            SourceNotFoundError: If the channel is gone
+            FetchError: If the feed cannot be read
+        """
+        if self._load_cache(program_id):
+            # A cached fetch is cheaper than any probe
+            return None
+        self._check_not_missing(program_id)
+        etag = None
+        if known_token:
+            try:
+                etag = json.loads(known_token)[0]
+            except (ValueError, IndexError, TypeError):
+                etag = None
+
+        rss_url = f"https://ch.nicovideo.jp/{program_id}/video?rss=2.0"
+        try:
+            feed = self._call_with_retry(self._parse_feed, rss_url, etag=etag)
+        except Exception as e:
+            raise FetchError(program_id, str(e))
+
+        status = feed.get('status')
+        if status == 304:
+            return known_token
+        if status in (404, 410):
+            self._remember_missing('program', program_id)
+            raise SourceNotFoundError(program_id, f"Channel feed returned HTTP {status}")
+        if feed.bozo and not feed.entries:
+            raise FetchError(program_id, f"Failed to parse RSS feed: {feed.get('bozo_exception', 'Unknown error')}")
+
+        newest = feed.entries[0].get('link', '') if feed.entries else ''
+        return json.dumps([feed.get('etag'), newest, len(feed.entries)], ensure_ascii=False)
+
+    def _episode_url(self, episode_id: str) -> Optional[str]:
+        """Get the Nicovideo watch page URL."""
+        return f"https://www.nicovideo.jp/watch/{episode_id}"
+
+    def _convert_entries(self, info: Dict[str, Any], entries: List[Dict[str, Any]]) -> Program:
+        """Convert a channel info dict and its video entries to a Program."""
+        episodes = [self._convert_to_episode(entry) for entry in entries]
+        return self._convert_to_program_with_entries(info, episodes, info['id'])
+
+    def _parse_feed(self, rss_url: str, etag: Optional[str] = None):
+        """Parse an RSS feed, raising network errors so they can be retried."""
+        import feedparser
+        feed = feedparser.parse(rss_url, etag=etag) if etag else feedparser.parse(rss_url)
+        # feedparser reports fetch errors through bozo instead of raising
+        if feed.bozo and not feed.entries and is_transient(feed.get('bozo_exception')):
+            raise feed.bozo_exception
+        return feed
+
     def _convert_to_program_with_entries(self, info: Dict[str, Any], episodes: list, program_id: str) -> Program:
         """Convert info dict and episode list to Program model."""
         now = datetime.now()
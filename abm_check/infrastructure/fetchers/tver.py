@@ -4,7 +4,6 @@ import time
 from pathlib import Path
 from datetime import datetime
 from typing import Any, Dict, List, Optional
-import yt_dlp
 
 from abm_check.domain.models import Program, Episode, VideoFormat
 from abm_check.domain.exceptions import FetchError, YtdlpError
@@ -13,25 +12,26 @@ from abm_check.infrastructure.fetcher import BaseFetcher
 class TVerFetcher(BaseFetcher):
     """Fetch TVer program information using yt-dlp."""
 
-    def fetch_program_info(self, program_id: str) -> Program:
+    platform = 'tver'
+
+    def fetch_program_info(self, program_id: str, known_fingerprint: Optional[str] = None) -> Optional[Program]:
         """
         Fetch program information from TVer.
         
         Args:
             program_id: TVer Series ID (e.g. "sr12345")
+            known_fingerprint: Source fingerprint of the stored program (optional)
             
         Returns:
-            Program object
+            Program object, or None if the source still matches known_fingerprint
         """
         # Try to load from cache first
         cached_info = self._load_cache(program_id)
         if cached_info:
-            all_episodes = []
-            if 'entries' in cached_info and cached_info['entries']:
-                for entry in cached_info['entries']:
-                    if entry:
-                        all_episodes.append(self._convert_to_episode(entry))
-            return self._convert_to_program_with_episodes(cached_info, all_episodes)
+            entries = [entry for entry in cached_info.get('entries') or [] if entry]
+            return self._convert_if_changed(cached_info, entries, known_fingerprint)
+        self._check_not_missing(program_id)
+        import yt_dlp
 
         # TVer series URL
         url = f"https://tver.jp/series/{program_id}"
@@ -39,30 +39,41 @@ class TVerFetcher(BaseFetcher):
         ydl_opts = self.config.ytdlp_opts
         
         try:
-            all_episodes = []
-            
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                try:
-                    info = ydl.extract_info(url, download=False)
-                except Exception as e:
-                    raise YtdlpError(f"Failed to extract info from {url}: {str(e)}")
-                
-                if info is None:
-                    raise FetchError(program_id, "yt-dlp returned no information.")
-
-                if 'entries' in info and info['entries']:
-                    for entry in info['entries']:
-                        if entry:
-                            all_episodes.append(self._convert_to_episode(entry))
+                info = self._extract_program_page(ydl, program_id, url)
+                entries = [entry for entry in info.get('entries') or [] if entry]
                 
                 # Save to cache
                 self._save_cache(program_id, info)
-                return self._convert_to_program_with_episodes(info, all_episodes)
+                return self._convert_if_changed(info, entries, known_fingerprint)
                 
-        except YtdlpError:
+        except (YtdlpError, FetchError):
+            raise
+        except Exception as e:
+            raise FetchError(program_id, str(e))
+
+    def probe(self, program_id: str, known_token: Optional[str] = None) -> Optional[str]:
+        """
+        Get a change token from the flat episode listing of a TVer series.
+
+        Raises:
+            SourceNotFoundError: If the series is gone or blocked
+            YtdlpError: If the listing cannot be extracted
+        """
+        if self._load_cache(program_id):
+            # A cached fetch is cheaper than any probe
+            return None
+        self._check_not_missing(program_id)
+        import yt_dlp
+        url = f"https://tver.jp/series/{program_id}"
+        try:
+            with yt_dlp.YoutubeDL(self._flat_ytdlp_opts()) as ydl:
+                info = self._extract_program_page(ydl, program_id, url)
+        except (YtdlpError, FetchError):
             raise
         except Exception as e:
             raise FetchError(program_id, str(e))
+        return self._listing_token([entry for entry in info.get('entries') or [] if entry])
 
     def _convert_to_program_with_episodes(self, info: Dict[str, Any], episodes: list) -> Program:
         """Convert yt-dlp info dict and episode list to Program model."""
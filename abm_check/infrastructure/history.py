@@ -0,0 +1,202 @@
+"""Episode availability history stored as per-program delta logs."""
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from abm_check.domain.models import Program
+from abm_check.domain.exceptions import StorageError
+from abm_check.config import get_config
+from abm_check.utils.fileio import append_line
+
+
+# Availability bit flags stored per episode
+FLAG_DOWNLOADABLE = 1
+FLAG_PREMIUM_ONLY = 2
+
+
+@dataclass
+class EpisodeState:
+    """Availability of an episode at a point in time."""
+
+    id: str
+    number: int
+    is_downloadable: bool
+    is_premium_only: bool
+
+
+@dataclass
+class HistoryDelta:
+    """Changes recorded for a program by one update run."""
+
+    timestamp: datetime
+    added: List[EpisodeState] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    flipped: List[EpisodeState] = field(default_factory=list)
+
+
+class HistoryStore:
+    """
+    Record how the episodes of each program change over time.
+
+    Each program has an append-only JSON Lines file with one record per
+    update run that changed something: episodes added, removed, and
+    availability flips. Runs without changes write nothing, so the files
+    only grow with actual changes. Earlier states are rebuilt by replaying
+    the records.
+    """
+
+    def __init__(self, history_dir: str = None, config=None):
+        """
+        Initialize history store.
+
+        Args:
+            history_dir: Directory holding the history files (optional)
+            config: Configuration object (optional)
+        """
+        self.config = config or get_config()
+        self.history_dir = Path(history_dir or self.config.history_dir)
+
+    def record(self, program: Program, at: Optional[datetime] = None) -> Optional[HistoryDelta]:
+        """
+        Record the current episode state of a program.
+
+        Args:
+            program: Freshly fetched program
+            at: Time of the observation (defaults to now)
+
+        Returns:
+            The recorded delta, or None if nothing changed
+
+        Raises:
+            StorageError: If the history cannot be read or written
+        """
+        at = at or datetime.now()
+        previous = self.state_at(program.id)
+
+        delta = HistoryDelta(timestamp=at)
+        current_ids = set()
+        for episode in program.episodes:
+            current_ids.add(episode.id)
+            state = EpisodeState(
+                id=episode.id,
+                number=episode.number,
+                is_downloadable=episode.is_downloadable,
+                is_premium_only=episode.is_premium_only,
+            )
+            old_state = previous.get(episode.id)
+            if old_state is None:
+                delta.added.append(state)
+            elif self._flags(old_state) != self._flags(state):
+                delta.flipped.append(state)
+        delta.removed = [episode_id for episode_id in previous if episode_id not in current_ids]
+
+        if not (delta.added or delta.removed or delta.flipped):
+            return None
+
+        try:
+            self.history_dir.mkdir(parents=True, exist_ok=True)
+            append_line(self._history_file(program.id), self._encode(delta))
+        except OSError as e:
+            raise StorageError("record_history", str(e))
+        return delta
+
+    def deltas(self, program_id: str) -> Iterator[HistoryDelta]:
+        """
+        Iterate the recorded deltas of a program in chronological order.
+
+        Args:
+            program_id: Program ID
+
+        Yields:
+            HistoryDelta objects
+
+        Raises:
+            StorageError: If the history file is corrupted
+        """
+        history_file = self._history_file(program_id)
+        if not history_file.exists():
+            return
+
+        with open(history_file, 'r', encoding='utf-8') as f:
+            lines = [line for line in f.read().split('\n') if line.strip()]
+
+        for i, line in enumerate(lines):
+            try:
+                yield self._decode(json.loads(line))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                # A truncated final line comes from an interrupted append
+                if i == len(lines) - 1:
+                    return
+                raise StorageError("read_history", f"corrupted record at line {i + 1}")
+
+    def state_at(self, program_id: str, at: Optional[datetime] = None) -> Dict[str, EpisodeState]:
+        """
+        Replay the history of a program up to a point in time.
+
+        Args:
+            program_id: Program ID
+            at: Point in time (defaults to the latest state)
+
+        Returns:
+            Dict of episode_id -> EpisodeState, in the order episodes appeared
+        """
+        state: Dict[str, EpisodeState] = {}
+        for delta in self.deltas(program_id):
+            if at is not None and delta.timestamp > at:
+                break
+            for episode in delta.added:
+                state[episode.id] = episode
+            for episode in delta.flipped:
+                state[episode.id] = episode
+            for episode_id in delta.removed:
+                state.pop(episode_id, None)
+        return state
+
+    def has_history(self, program_id: str) -> bool:
+        """Check whether anything was recorded for a program."""
+        return self._history_file(program_id).exists()
+
+    def _history_file(self, program_id: str) -> Path:
+        """Get the history file for a program."""
+        safe_id = re.sub(r'[^\w.-]', '_', program_id)
+        return self.history_dir / f"{safe_id}.jsonl"
+
+    def _flags(self, state: EpisodeState) -> int:
+        """Pack availability into bit flags."""
+        return (
+            (FLAG_DOWNLOADABLE if state.is_downloadable else 0)
+            | (FLAG_PREMIUM_ONLY if state.is_premium_only else 0)
+        )
+
+    def _encode(self, delta: HistoryDelta) -> str:
+        """Encode a delta as a compact JSON line."""
+        record = {'t': delta.timestamp.isoformat(timespec='seconds')}
+        if delta.added:
+            record['a'] = [[s.id, s.number, self._flags(s)] for s in delta.added]
+        if delta.removed:
+            record['r'] = delta.removed
+        if delta.flipped:
+            record['f'] = [[s.id, s.number, self._flags(s)] for s in delta.flipped]
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+    def _decode(self, record: dict) -> HistoryDelta:
+        """Decode a JSON record into a delta."""
+        def states(entries: list) -> List[EpisodeState]:
+            return [
+                EpisodeState(
+                    id=episode_id,
+                    number=number,
+                    is_downloadable=bool(flags & FLAG_DOWNLOADABLE),
+                    is_premium_only=bool(flags & FLAG_PREMIUM_ONLY),
+                )
+                for episode_id, number, flags in entries
+            ]
+
+        return HistoryDelta(
+            timestamp=datetime.fromisoformat(record['t']),
+            added=states(record.get('a', [])),
+            removed=list(record.get('r', [])),
+            flipped=states(record.get('f', [])),
+        )
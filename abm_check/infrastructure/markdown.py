@@ -1,5 +1,6 @@
 """Markdown generator for program information."""
 from pathlib import Path
+from typing import Iterable, List
 from abm_check.domain.models import Program
 
 
@@ -91,6 +92,8 @@ class MarkdownGenerator:
         """
         Save program information as Markdown file.
         
+        The file is left untouched when its content would not change.
+        
         Args:
             program: Program object
             output_dir: Base directory for output
@@ -104,6 +107,24 @@ class MarkdownGenerator:
         md_content = self.generate_program_md(program)
         
         md_file = program_dir / "program.md"
+        if md_file.exists() and md_file.read_text(encoding='utf-8') == md_content:
+            return md_file
         md_file.write_text(md_content, encoding='utf-8')
         
         return md_file
+
+    def save_programs_md(self, programs: Iterable[Program], output_dir: str = "output") -> List[Path]:
+        """
+        Save Markdown files for a stream of programs.
+        
+        Programs are consumed one at a time, so this works with
+        ``ProgramStorage.iter_programs()`` without loading the whole database.
+        
+        Args:
+            programs: Iterable of Program objects
+            output_dir: Base directory for output
+            
+        Returns:
+            Paths to saved files
+        """
+        return [self.save_program_md(program, output_dir) for program in programs]
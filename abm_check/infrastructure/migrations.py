@@ -0,0 +1,108 @@
+"""Schema versions and migration steps for the program database."""
+from typing import Callable, Dict
+
+from abm_check.domain.exceptions import StorageError
+
+
+# Databases written before the schemaVersion field existed
+UNVERSIONED_SCHEMA = 1
+
+# Version written by this release
+CURRENT_SCHEMA_VERSION = 2
+
+# from_version -> step upgrading a single program dict to from_version + 1
+MIGRATIONS: Dict[int, Callable[[dict], dict]] = {}
+
+
+def migration(from_version: int) -> Callable[[Callable[[dict], dict]], Callable[[dict], dict]]:
+    """
+    Register a migration step.
+
+    Args:
+        from_version: Schema version the step upgrades from
+
+    Returns:
+        Decorator registering the step
+    """
+    def register(step: Callable[[dict], dict]) -> Callable[[dict], dict]:
+        if from_version in MIGRATIONS:
+            raise ValueError(f"Duplicate migration from schema version {from_version}")
+        MIGRATIONS[from_version] = step
+        return step
+    return register
+
+
+def check_schema_version(version) -> int:
+    """
+    Validate a schema version read from storage.
+
+    Args:
+        version: Value of the schemaVersion field
+
+    Returns:
+        The version as an int
+
+    Raises:
+        StorageError: If the version is invalid or newer than this release supports
+    """
+    if isinstance(version, bool) or not isinstance(version, int) or version < UNVERSIONED_SCHEMA:
+        raise StorageError("migrate", f"invalid schema version: {version!r}")
+    if version > CURRENT_SCHEMA_VERSION:
+        raise StorageError(
+            "migrate",
+            f"schema version {version} is newer than supported version {CURRENT_SCHEMA_VERSION}; "
+            "please upgrade abm_check"
+        )
+    return version
+
+
+def migrate_program(program: dict, from_version: int) -> dict:
+    """
+    Upgrade a program dict to the current schema version.
+
+    Args:
+        program: Program dict as stored
+        from_version: Schema version the dict was written with
+
+    Returns:
+        Program dict in the current schema
+
+    Raises:
+        StorageError: If the version is unsupported or a step is missing
+    """
+    version = check_schema_version(from_version)
+    while version < CURRENT_SCHEMA_VERSION:
+        step = MIGRATIONS.get(version)
+        if step is None:
+            raise StorageError("migrate", f"no migration from schema version {version}")
+        program = step(program)
+        version += 1
+    return program
+
+
+@migration(1)
+def _make_defaults_explicit(program: dict) -> dict:
+    """
+    v1 -> v2: write out the values the reader used to assume for missing fields.
+
+    Older databases (and hand-edited ones) could omit optional fields; the
+    reader filled them in, e.g. ``platform: abema`` and ``isPremiumOnly: true``.
+    From v2 on every field is present in the file.
+    """
+    program.setdefault('description', '')
+    program.setdefault('thumbnailUrl', '')
+    program.setdefault('totalEpisodes', 0)
+    program.setdefault('latestEpisodeNumber', 0)
+    program.setdefault('platform', 'abema')
+    program.setdefault('episodes', [])
+
+    for episode in program['episodes']:
+        episode.setdefault('description', '')
+        episode.setdefault('duration', 0)
+        episode.setdefault('thumbnailUrl', '')
+        episode.setdefault('isDownloadable', False)
+        episode.setdefault('isPremiumOnly', True)
+        episode.setdefault('downloadUrl', None)
+        episode.setdefault('uploadDate', None)
+        episode.setdefault('expirationDate', None)
+    return program
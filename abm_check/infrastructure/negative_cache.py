@@ -0,0 +1,106 @@
+"""Negative cache of programs, seasons and videos known to be missing."""
+import json
+import re
+import time
+import urllib.error
+from pathlib import Path
+from typing import Dict, Optional
+from abm_check.config import get_config
+from abm_check.utils.fileio import atomic_write_text
+
+
+# Error messages meaning the resource is gone or blocked rather than unreachable
+NOT_FOUND_PATTERNS = re.compile(
+    r'HTTP Error (404|410)|not found|does not exist|no longer available|has been (removed|deleted)'
+    r'|not available (in|from) your (country|location)|geo.?restrict',
+    re.IGNORECASE,
+)
+
+
+def is_not_found(error: Optional[BaseException]) -> bool:
+    """
+    Classify an error as "the resource does not exist (for us)".
+
+    HTTP 404/410, deleted videos and geo-blocks are not-found outcomes.
+    Network trouble and other errors are not.
+
+    Args:
+        error: Raised exception
+
+    Returns:
+        True if asking again soon would give the same answer
+    """
+    if error is None:
+        return False
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in (404, 410)
+    # yt-dlp keeps the original exception (e.g. GeoRestrictedError) in exc_info
+    exc_info = getattr(error, 'exc_info', None)
+    if isinstance(exc_info, tuple) and len(exc_info) > 1 and isinstance(exc_info[1], BaseException):
+        original = exc_info[1]
+        if original is not error:
+            if type(original).__name__ == 'GeoRestrictedError' or is_not_found(original):
+                return True
+    return bool(NOT_FOUND_PATTERNS.search(str(error)))
+
+
+class NegativeCache:
+    """
+    Remember "not found" outcomes for a short time.
+
+    Entries expire after ``cache.negative_ttl`` seconds, which is kept
+    shorter than the regular cache TTL so a program that comes back (or a
+    season that starts) is noticed soon. The file maps keys such as
+    ``abema:season:26-249:3`` to their expiry as a UNIX timestamp.
+    """
+
+    def __init__(self, cache_file: str = None, config=None):
+        """
+        Initialize negative cache.
+
+        Args:
+            cache_file: Path to the cache file (optional)
+            config: Configuration object (optional)
+        """
+        self.config = config or get_config()
+        if cache_file is None:
+            cache_file = Path(self.config.cache_dir) / 'negative_cache.json'
+        self.cache_file = Path(cache_file)
+        self._entries: Optional[Dict[str, float]] = None
+
+    def __contains__(self, key: str) -> bool:
+        if self._entries is None:
+            self._entries = self._load()
+        expires = self._entries.get(key)
+        return expires is not None and expires > time.time()
+
+    def add(self, key: str) -> None:
+        """
+        Record a missing resource until the TTL runs out.
+
+        The file is re-read before writing so entries added meanwhile by
+        other fetchers are kept.
+
+        Args:
+            key: Resource key
+        """
+        entries = self._load()
+        entries[key] = time.time() + float(self.config.negative_cache_ttl)
+        self._entries = entries
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_file, json.dumps(entries, ensure_ascii=False, indent=2))
+
+    def _load(self) -> Dict[str, float]:
+        """Load unexpired entries; a missing or corrupted file counts as empty."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        now = time.time()
+        return {
+            key: expires for key, expires in data.items()
+            if isinstance(expires, (int, float)) and expires > now
+        }
@@ -0,0 +1,159 @@
+"""Retry with capped exponential backoff for network calls."""
+import http.client
+import random
+import re
+import socket
+import time
+import urllib.error
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+# Error messages that indicate a temporary condition (yt-dlp wraps most
+# network errors in DownloadError, so the message is all we have)
+TRANSIENT_PATTERNS = re.compile(
+    r'HTTP Error (429|5\d\d)|timed? ?out|Connection (reset|refused|aborted)'
+    r'|Temporary failure in name resolution|Remote end closed connection'
+    r'|IncompleteRead|EOF occurred|Network is unreachable',
+    re.IGNORECASE,
+)
+
+TRANSIENT_TYPES = (
+    TimeoutError,
+    ConnectionError,
+    socket.timeout,
+    socket.gaierror,
+    http.client.IncompleteRead,
+    http.client.RemoteDisconnected,
+)
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how long to retry a failing call."""
+
+    max_attempts: int = 3
+    base_delay: float = 1.0  # seconds before the first retry
+    max_delay: float = 30.0  # cap on any single wait
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> 'RetryPolicy':
+        """Create a policy from a ``retry`` config mapping."""
+        return cls(
+            max_attempts=max(int(settings.get('max_attempts', cls.max_attempts)), 1),
+            base_delay=float(settings.get('base_delay', cls.base_delay)),
+            max_delay=float(settings.get('max_delay', cls.max_delay)),
+        )
+
+    def delay(self, retry: int) -> float:
+        """
+        Get the wait before a retry, with full jitter.
+
+        Args:
+            retry: Retry number, starting at 1
+
+        Returns:
+            Seconds to wait, uniformly drawn up to the capped exponential backoff
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+@dataclass
+class RetryMetrics:
+    """Retry counters of a platform."""
+
+    calls: int = 0
+    retries: int = 0
+    recovered: int = 0  # Calls that succeeded after retrying
+    exhausted: int = 0  # Transient failures that outlasted every attempt
+    permanent: int = 0  # Failures that were not retried
+
+
+_metrics: Dict[str, RetryMetrics] = {}
+
+
+def get_retry_metrics() -> Dict[str, RetryMetrics]:
+    """Get retry counters per platform since the last reset."""
+    return _metrics
+
+
+def reset_retry_metrics() -> None:
+    """Reset retry counters (mainly for testing)."""
+    _metrics.clear()
+
+
+def is_transient(error: Optional[BaseException]) -> bool:
+    """
+    Classify an error as transient (worth retrying) or permanent.
+
+    Network timeouts, dropped connections, HTTP 429 and 5xx responses are
+    transient. Everything else, including 403/404 and extractor errors,
+    is permanent.
+
+    Args:
+        error: Raised exception
+
+    Returns:
+        True if retrying may succeed
+    """
+    if error is None:
+        return False
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    if isinstance(error, TRANSIENT_TYPES):
+        return True
+    if isinstance(error, urllib.error.URLError):
+        return is_transient(error.reason) if isinstance(error.reason, BaseException) else True
+    # yt-dlp keeps the original exception in exc_info
+    exc_info = getattr(error, 'exc_info', None)
+    if isinstance(exc_info, tuple) and len(exc_info) > 1 and isinstance(exc_info[1], BaseException):
+        if exc_info[1] is not error and is_transient(exc_info[1]):
+            return True
+    return bool(TRANSIENT_PATTERNS.search(str(error)))
+
+
+def call_with_retry(
+    func: Callable[..., Any],
+    *args,
+    policy: RetryPolicy,
+    platform: str = '',
+    **kwargs
+) -> Any:
+    """
+    Call a function, retrying transient errors with backoff.
+
+    Args:
+        func: Function to call
+        *args: Positional arguments for func
+        policy: Retry policy
+        platform: Platform the counters are recorded under
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Result of func
+
+    Raises:
+        Exception: The last error once it is permanent or attempts run out
+    """
+    metrics = _metrics.setdefault(platform, RetryMetrics())
+    metrics.calls += 1
+
+    attempt = 1
+    while True:
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_transient(e):
+                metrics.permanent += 1
+                raise
+            if attempt >= policy.max_attempts:
+                metrics.exhausted += 1
+                raise
+            metrics.retries += 1
+            time.sleep(policy.delay(attempt))
+            attempt += 1
+            continue
+
+        if attempt > 1:
+            metrics.recovered += 1
+        return result
@@ -0,0 +1,440 @@
+"""Release-cadence-aware update scheduling."""
+import heapq
+import json
+import statistics
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from abm_check.domain.diff import has_expired
+from abm_check.domain.models import Program
+from abm_check.config import get_config
+from abm_check.utils.fileio import atomic_write_text
+
+
+# Observed change times kept per program for cadence estimation
+MAX_CHANGE_HISTORY = 8
+
+# Upload-date gaps used for the median (most recent ones)
+MAX_RELEASE_GAPS = 10
+
+# Predicted release intervals without a release after which quiet checks
+# count as a sign that a program has ended
+DORMANT_OVERDUE_FACTOR = 3
+
+# Expected-value weights for time-budgeted runs
+OVERDUE_WEIGHT = 1.0            # per day past the planned check (capped)
+MAX_OVERDUE_DAYS = 7
+ACTIVITY_WEIGHT = 2.0           # halves every ACTIVITY_HALF_LIFE_DAYS since the last change
+ACTIVITY_HALF_LIFE_DAYS = 7
+PREMIUM_WEIGHT = 1.0            # scaled by premium-only episodes that may turn free
+PREMIUM_SATURATION = 10
+
+
+@dataclass
+class ProgramState:
+    """Persisted scheduling state of a program."""
+
+    program_id: str
+    next_check: Optional[datetime] = None
+    last_checked: Optional[datetime] = None
+    changes: List[datetime] = field(default_factory=list)
+    premium_episodes: int = 0
+    last_full_fetch: Optional[datetime] = None  # Last time every season was fetched
+    unchanged_runs: int = 0  # Consecutive checks without changes
+    dormant_level: int = 0  # 0 while active; grows with every dormant check
+
+    @property
+    def dormant(self) -> bool:
+        """Whether the program is considered to have ended."""
+        return self.dormant_level > 0
+
+
+class ProgramStateStore:
+    """
+    Per-program scheduling state persisted as JSON in the cache directory.
+    """
+
+    def __init__(self, state_file: str = None, config=None):
+        """
+        Initialize state store.
+
+        Args:
+            state_file: Path to the state file (optional)
+            config: Configuration object (optional)
+        """
+        self.config = config or get_config()
+        if state_file is None:
+            state_file = Path(self.config.cache_dir) / 'program_state.json'
+        self.state_file = Path(state_file)
+        self._states: Optional[Dict[str, ProgramState]] = None
+
+    def get(self, program_id: str) -> ProgramState:
+        """
+        Get the state of a program, creating an empty one if needed.
+
+        Args:
+            program_id: Program ID
+
+        Returns:
+            ProgramState (mutable; call save() to persist changes)
+        """
+        states = self._load()
+        if program_id not in states:
+            states[program_id] = ProgramState(program_id=program_id)
+        return states[program_id]
+
+    def find(self, program_id: str) -> Optional[ProgramState]:
+        """Get the state of a program if one was recorded."""
+        return self._load().get(program_id)
+
+    def save(self) -> None:
+        """Write all states to the state file."""
+        if self._states is None:
+            return
+
+        data = {
+            'programs': {
+                program_id: {
+                    'nextCheck': self._format(state.next_check),
+                    'lastChecked': self._format(state.last_checked),
+                    'changes': [self._format(t) for t in state.changes],
+                    'premiumEpisodes': state.premium_episodes,
+                    'lastFullFetch': self._format(state.last_full_fetch),
+                    'unchangedRuns': state.unchanged_runs,
+                    'dormantLevel': state.dormant_level,
+                }
+                for program_id, state in self._states.items()
+            }
+        }
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.state_file, json.dumps(data, ensure_ascii=False))
+
+    def _load(self) -> Dict[str, ProgramState]:
+        """Load states from disk once; a missing or corrupted file starts empty."""
+        if self._states is not None:
+            return self._states
+
+        self._states = {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for program_id, entry in data.get('programs', {}).items():
+                self._states[program_id] = ProgramState(
+                    program_id=program_id,
+                    next_check=self._parse(entry.get('nextCheck')),
+                    last_checked=self._parse(entry.get('lastChecked')),
+                    changes=[self._parse(t) for t in entry.get('changes', [])],
+                    premium_episodes=entry.get('premiumEpisodes', 0),
+                    last_full_fetch=self._parse(entry.get('lastFullFetch')),
+                    unchanged_runs=entry.get('unchangedRuns', 0),
+                    dormant_level=entry.get('dormantLevel', 0),
+                )
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Scheduling state is advisory; without it every program is due
+            self._states = {}
+        return self._states
+
+    def _format(self, value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat(timespec='seconds') if value else None
+
+    def _parse(self, value: Optional[str]) -> Optional[datetime]:
+        return datetime.fromisoformat(value) if value else None
+
+
+class UpdateScheduler:
+    """
+    Decide which programs are worth fetching now.
+
+    Each program's release cadence is estimated from the median gap between
+    its episodes' upload dates (or, lacking those, between observed changes),
+    falling back to a per-platform default. The next check is planned for the
+    expected release; once a release is overdue the program is polled more
+    often until it shows up or a full interval has passed.
+
+    Programs that look finished (no release for ``dormant_after_days``, or
+    no changes for ``dormant_after_runs`` checks while the next release is
+    long overdue, and no premium-only episode left that could still turn
+    free) become dormant: their check
+    interval starts at ``dormant_interval`` and doubles with every quiet
+    check up to ``dormant_max_interval``. Any change makes them active again.
+    """
+
+    def __init__(self, state_store: ProgramStateStore = None, config=None):
+        """
+        Initialize scheduler.
+
+        Args:
+            state_store: Persisted program states (optional)
+            config: Configuration object (optional)
+        """
+        self.config = config or get_config()
+        self.state_store = state_store or ProgramStateStore(config=self.config)
+
+    def due(self, program_ids: Iterable[str], now: Optional[datetime] = None) -> List[str]:
+        """
+        Select the programs whose next check has arrived.
+
+        Programs that were never checked are always due.
+
+        Args:
+            program_ids: Candidate program IDs
+            now: Current time (defaults to now)
+
+        Returns:
+            Due program IDs, most overdue first
+        """
+        now = now or datetime.now()
+        queue = []
+        for program_id in program_ids:
+            state = self.state_store.find(program_id)
+            next_check = state.next_check if state and state.next_check else datetime.min
+            queue.append((next_check, program_id))
+        heapq.heapify(queue)
+
+        due = []
+        while queue and queue[0][0] <= now:
+            due.append(heapq.heappop(queue)[1])
+        return due
+
+    def prioritize(self, program_ids: Iterable[str], now: Optional[datetime] = None) -> List[str]:
+        """
+        Order programs by the expected value of checking them now.
+
+        Args:
+            program_ids: Candidate program IDs
+            now: Current time (defaults to now)
+
+        Returns:
+            Program IDs, most valuable first; ties go to the least recently checked
+        """
+        now = now or datetime.now()
+
+        def key(program_id: str):
+            state = self.state_store.find(program_id)
+            last_checked = state.last_checked if state and state.last_checked else datetime.min
+            return (-self.expected_value(program_id, now), last_checked)
+
+        return sorted(program_ids, key=key)
+
+    def expected_value(self, program_id: str, now: Optional[datetime] = None) -> float:
+        """
+        Score how likely a check of the program is to find something.
+
+        Programs never checked score infinity. Otherwise the score adds up
+        how overdue the planned check is, how recently the program changed,
+        and how many premium-only episodes it has that could turn free.
+
+        Args:
+            program_id: Program ID
+            now: Current time (defaults to now)
+
+        Returns:
+            Expected value score
+        """
+        now = now or datetime.now()
+        state = self.state_store.find(program_id)
+        if state is None or state.last_checked is None:
+            return float('inf')
+
+        day = timedelta(days=1)
+        score = 0.0
+
+        planned = state.next_check or state.last_checked
+        if now > planned:
+            score += OVERDUE_WEIGHT * min((now - planned) / day, MAX_OVERDUE_DAYS)
+
+        if state.changes:
+            age_days = max((now - state.changes[-1]) / day, 0)
+            score += ACTIVITY_WEIGHT * 0.5 ** (age_days / ACTIVITY_HALF_LIFE_DAYS)
+
+        score += PREMIUM_WEIGHT * min(state.premium_episodes, PREMIUM_SATURATION) / PREMIUM_SATURATION
+        return score
+
+    def dormant(self, program_ids: Iterable[str]) -> List[str]:
+        """Select the dormant programs."""
+        result = []
+        for program_id in program_ids:
+            state = self.state_store.find(program_id)
+            if state is not None and state.dormant:
+                result.append(program_id)
+        return result
+
+    def resting(self, program_ids: Iterable[str], now: Optional[datetime] = None) -> List[str]:
+        """
+        Select the dormant programs whose backed-off check has not arrived.
+
+        Args:
+            program_ids: Candidate program IDs
+            now: Current time (defaults to now)
+
+        Returns:
+            Program IDs to leave out of a regular update
+        """
+        now = now or datetime.now()
+        return [
+            program_id for program_id in self.dormant(program_ids)
+            if self.state_store.find(program_id).next_check > now
+        ]
+
+    def next_check_time(self, program_ids: Iterable[str]) -> Optional[datetime]:
+        """Get the earliest planned check among the given programs."""
+        times = []
+        for program_id in program_ids:
+            state = self.state_store.find(program_id)
+            if state is None or state.next_check is None:
+                return None
+            times.append(state.next_check)
+        return min(times) if times else None
+
+    def record(self, program: Program, changed: bool, now: Optional[datetime] = None) -> datetime:
+        """
+        Record a completed check and plan the next one.
+
+        Args:
+            program: Freshly fetched program
+            changed: Whether the check detected changes
+            now: Time of the check (defaults to now)
+
+        Returns:
+            Planned time of the next check
+        """
+        now = now or datetime.now()
+        state = self.state_store.get(program.id)
+        state.last_checked = now
+        if changed:
+            state.changes = (state.changes + [now])[-MAX_CHANGE_HISTORY:]
+            state.unchanged_runs = 0
+        else:
+            state.unchanged_runs += 1
+        state.premium_episodes = sum(
+            1 for ep in program.episodes if ep.is_premium_only and not ep.is_downloadable
+        )
+
+        if not changed and self.is_ended(program, state, now):
+            state.dormant_level += 1
+            state.next_check = now + self.dormant_interval(state.dormant_level)
+        else:
+            state.dormant_level = 0
+            state.next_check = self.plan_next_check(program, state, now)
+        return state.next_check
+
+    def is_ended(self, program: Program, state: ProgramState, now: datetime) -> bool:
+        """
+        Check whether a program looks like it has finished airing.
+
+        Args:
+            program: Latest program state
+            state: Scheduling state
+            now: Current time
+
+        Returns:
+            True if nothing new is expected and no premium-only episode can still turn free
+        """
+        for episode in program.episodes:
+            if episode.is_premium_only and not episode.is_downloadable and not has_expired(episode, now):
+                return False
+
+        last_release = self._last_release(program, state)
+        if last_release is None:
+            return False
+        silence = now - last_release
+        if silence >= timedelta(days=self.config.schedule_dormant_after_days):
+            return True
+        # Quiet checks alone say nothing while a release is not even due yet
+        return (
+            state.unchanged_runs >= self.config.schedule_dormant_after_runs
+            and silence >= self.predict_interval(program, state) * DORMANT_OVERDUE_FACTOR
+        )
+
+    def dormant_interval(self, level: int) -> timedelta:
+        """Get the backed-off check interval of a dormant program."""
+        seconds = self.config.schedule_dormant_interval * 2 ** max(level - 1, 0)
+        return timedelta(seconds=min(seconds, self.config.schedule_dormant_max_interval))
+
+    def save(self) -> None:
+        """Persist program states."""
+        self.state_store.save()
+
+    def plan_next_check(self, program: Program, state: ProgramState, now: datetime) -> datetime:
+        """
+        Plan the next check of a program.
+
+        Args:
+            program: Latest program state
+            state: Scheduling state
+            now: Current time
+
+        Returns:
+            Time of the next check
+        """
+        last_release = self._last_release(program, state)
+        if last_release is None:
+            # Nothing to anchor a cadence to yet
+            return now + timedelta(seconds=self.config.schedule_default_interval)
+
+        interval = self.predict_interval(program, state)
+
+        expected = last_release + interval
+        if expected > now:
+            return max(expected, now + self._min_interval)
+        if now < expected + interval:
+            # Release is due: poll more often until it shows up
+            return now + max(self._min_interval, min(self._overdue_interval, interval))
+        return now + interval
+
+    def predict_interval(self, program: Program, state: Optional[ProgramState] = None) -> timedelta:
+        """
+        Estimate the release interval of a program.
+
+        Args:
+            program: Program with episodes
+            state: Scheduling state with observed change times (optional)
+
+        Returns:
+            Interval clamped to the configured bounds
+        """
+        release_times = self._release_dates(program)
+        if len(release_times) < 2 and state is not None:
+            release_times = sorted(state.changes)
+
+        gaps = [
+            (later - earlier).total_seconds()
+            for earlier, later in zip(release_times, release_times[1:])
+        ][-MAX_RELEASE_GAPS:]
+        gaps = [gap for gap in gaps if gap > 0]
+
+        if gaps:
+            seconds = statistics.median(gaps)
+        else:
+            seconds = self.config.schedule_platform_intervals.get(
+                program.platform, self.config.schedule_default_interval
+            )
+
+        seconds = min(max(seconds, self.config.schedule_min_interval), self.config.schedule_max_interval)
+        return timedelta(seconds=seconds)
+
+    @property
+    def _min_interval(self) -> timedelta:
+        return timedelta(seconds=self.config.schedule_min_interval)
+
+    @property
+    def _overdue_interval(self) -> timedelta:
+        return timedelta(seconds=self.config.schedule_overdue_interval)
+
+    def _release_dates(self, program: Program) -> List[datetime]:
+        """Distinct episode upload dates, oldest first."""
+        dates = set()
+        for episode in program.episodes:
+            if not episode.upload_date:
+                continue
+            try:
+                dates.add(datetime.strptime(episode.upload_date, '%Y%m%d'))
+            except ValueError:
+                continue
+        return sorted(dates)
+
+    def _last_release(self, program: Program, state: ProgramState) -> Optional[datetime]:
+        """Most recent known release: latest upload date or observed change."""
+        candidates = self._release_dates(program)[-1:] + state.changes[-1:]
+        return max(candidates) if candidates else None
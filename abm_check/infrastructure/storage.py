@@ -1,15 +1,102 @@
 """Program storage using YAML."""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
 import yaml
+from collections import UserList
 from pathlib import Path
-from typing import List, Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 from datetime import datetime
-from abm_check.domain.models import Program, Episode, VideoFormat
+from abm_check.domain.models import Program, ProgramSummary, Episode, VideoFormat
 from abm_check.domain.exceptions import StorageError, ProgramNotFoundError
 from abm_check.config import get_config
+from abm_check.infrastructure.migrations import (
+    CURRENT_SCHEMA_VERSION, UNVERSIONED_SCHEMA, check_schema_version, migrate_program
+)
+from abm_check.utils.fileio import FileLock, append_line, atomic_write_text, atomic_writer
+
+
+EPISODE_ID_PLACEHOLDER = '{episodeId}'
+
+# Program fields left out of content fingerprints
+VOLATILE_PROGRAM_FIELDS = ('fetchedAt', 'updatedAt')
+
+# Bump when the layout of the binary snapshot sidecar changes
+BINARY_SNAPSHOT_VERSION = 3
+
+# Parsed summary indexes by index file, kept for the life of the process so
+# that a long-running process (abm_check serve) does not re-read them:
+# index_file -> (index signature, snapshot signature, journal signature, summaries)
+_index_memo: Dict[Path, tuple] = {}
+
+
+class LadderFormats(UserList):
+    """
+    Episode format list backed by a shared, templated format ladder.
+    
+    The VideoFormat objects are only built on first access, so loading a
+    program does not pay for formats nobody reads.
+    """
+    
+    def __init__(self, initlist=None, ladder: Optional[List[dict]] = None,
+                 episode_id: str = ''):
+        self._ladder = ladder
+        self._episode_id = episode_id
+        self._data = None
+        if ladder is None:
+            self._data = [] if initlist is None else list(initlist)
+    
+    @property
+    def data(self) -> List[VideoFormat]:
+        if self._data is None:
+            self._data = [
+                VideoFormat(
+                    format_id=fmt.get('formatId', ''),
+                    resolution=fmt.get('resolution', ''),
+                    tbr=fmt.get('tbr', 0.0),
+                    url=fmt.get('url', '').replace(EPISODE_ID_PLACEHOLDER, self._episode_id)
+                )
+                for fmt in self._ladder
+            ]
+        return self._data
+    
+    @data.setter
+    def data(self, value: List[VideoFormat]) -> None:
+        self._data = value
+    
+    def __len__(self) -> int:
+        if self._data is None:
+            return len(self._ladder)
+        return len(self._data)
+    
+    def __copy__(self) -> 'LadderFormats':
+        # UserList.__copy__ reads data from __dict__, where it never is
+        if self._data is None:
+            return LadderFormats(ladder=self._ladder, episode_id=self._episode_id)
+        return LadderFormats(self._data)
+    
+    def __reduce__(self):
+        if self._data is None:
+            return (LadderFormats, (None, self._ladder, self._episode_id))
+        return (LadderFormats, (self._data,))
+    
+    def unexpanded_ladder(self, episode_id: str) -> Optional[List[dict]]:
+        """Return the source ladder if it was never expanded or modified."""
+        if self._data is None and self._episode_id == episode_id:
+            return self._ladder
+        return None
 
 
 class ProgramStorage:
-    """Manage program data in YAML format."""
+    """
+    Manage program data in YAML format.
+    
+    Writes hold an advisory lock on ``<data_file>.lock`` for the whole
+    read-modify-write cycle and replace files atomically, so readers never
+    take the lock and always see a complete snapshot.
+    """
     
     def __init__(self, data_file: str = None, config=None):
         """
@@ -23,41 +110,79 @@ class ProgramStorage:
         if data_file is None:
             data_file = self.config.programs_file
         self.data_file = Path(data_file)
+        self.journal_file = self.data_file.with_name(self.data_file.name + '.journal')
+        self.index_file = self.data_file.with_name(self.data_file.name + '.index.json')
+        self.binary_snapshot_file = self.data_file.with_name(self.data_file.name + '.pickle')
+        self.binary_snapshot_enabled = self.config.binary_snapshot
+        self.journal_enabled = self.config.journal_enabled
+        self.compact_formats = self.config.compact_formats
+        self.lock_file = self.data_file.with_name(self.data_file.name + '.lock')
+        self._lock = FileLock(self.lock_file, timeout=self.config.lock_timeout)
+    
+    def lock(self) -> FileLock:
+        """
+        Get the writer lock for this data file.
+        
+        Hold it to make a longer read-modify-write sequence atomic with
+        respect to other processes. The lock is reentrant, so storage
+        methods called while holding it do not deadlock.
+        
+        Returns:
+            FileLock usable as a context manager
+        """
+        return self._lock
     
-    def save_program(self, program: Program) -> None:
+    def save_program(self, program: Program) -> bool:
         """
         Save program to YAML file.
         
+        Nothing is written when the stored program has the same content
+        fingerprint, i.e. when only ``fetched_at``/``updated_at`` differ.
+        
         Args:
             program: Program to save
             
+        Returns:
+            True if the program was written, False if it was unchanged
+            
         Raises:
             StorageError: If save fails
         """
         try:
-            programs = self.load_programs()
-            
-            # Update existing or add new
-            existing_index = None
-            for i, p in enumerate(programs):
-                if p.id == program.id:
-                    existing_index = i
-                    break
-            
-            if existing_index is not None:
-                programs[existing_index] = program
-            else:
-                programs.append(program)
-            
-            # Convert to dict for YAML
-            data = {
-                'programs': [self._program_to_dict(p) for p in programs],
-                'lastUpdated': datetime.now().isoformat()
-            }
-            
-            # Write to file
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+            with self._lock:
+                program_dict = self._program_to_dict(program)
+                fingerprint = self._fingerprint_dict(program_dict)
+                if self._stored_fingerprint(program.id) == fingerprint:
+                    return False
+                
+                if self.journal_enabled:
+                    summaries = self._read_index()
+                    self._append_journal({
+                        'op': 'save',
+                        'v': CURRENT_SCHEMA_VERSION,
+                        'program': program_dict,
+                    })
+                    if summaries is not None:
+                        summaries[program.id] = self._dict_to_summary(program_dict, fingerprint)
+                        self._write_index(summaries.values())
+                    return True
+                
+                programs = self.load_programs()
+                
+                # Update existing or add new
+                existing_index = None
+                for i, p in enumerate(programs):
+                    if p.id == program.id:
+                        existing_index = i
+                        break
+                
+                if existing_index is not None:
+                    programs[existing_index] = program
+                else:
+                    programs.append(program)
+                
+                self._write_snapshot(programs)
+                return True
                 
         except Exception as e:
             raise StorageError("save_program", str(e))
@@ -72,22 +197,76 @@ class ProgramStorage:
         Raises:
             StorageError: If load fails
         """
-        if not self.data_file.exists():
-            return []
-        
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+            return [self._dict_to_program(p) for p in self._load_program_dicts()]
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError("load_programs", str(e))
+    
+    def iter_programs(self, program_ids: Optional[Iterable[str]] = None) -> Iterator[Program]:
+        """
+        Stream programs one at a time in storage order.
+        
+        Peak memory is bounded by the largest single program rather than the
+        whole database. Saving programs while iterating is supported; the
+        iteration keeps seeing the snapshot it started from.
+        
+        Args:
+            program_ids: Only yield programs with these IDs (optional)
             
-            if not data or 'programs' not in data:
-                return []
+        Yields:
+            Program objects
             
-            return [self._dict_to_program(p) for p in data['programs']]
+        Raises:
+            StorageError: If load fails
+        """
+        wanted = set(program_ids) if program_ids is not None else None
+        
+        try:
+            for program_dict in self._iter_program_dicts():
+                if wanted is not None and program_dict['id'] not in wanted:
+                    continue
+                yield self._dict_to_program(program_dict)
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError("iter_programs", str(e))
+    
+    def load_program_summaries(self) -> List[ProgramSummary]:
+        """
+        Load program headers without materializing episodes.
+        
+        Summaries are served from the sidecar index when it matches the
+        current data and journal files; otherwise the index is rebuilt.
+        
+        Returns:
+            List of ProgramSummary objects in storage order
             
-        except yaml.YAMLError as e:
-            raise StorageError("load_programs", "YAML parsing error") from e
+        Raises:
+            StorageError: If load fails
+        """
+        summaries = self._read_index()
+        if summaries is not None:
+            return list(summaries.values())
+        
+        # Taken before parsing: readers do not hold the lock, so a write may land
+        # while we read, and the index must not vouch for content it does not hold
+        signatures = self._index_signatures()
+        try:
+            summaries = [self._dict_to_summary(p) for p in self._load_program_dicts()]
+        except StorageError:
+            raise
         except Exception as e:
-            raise StorageError("load_programs", str(e))
+            raise StorageError("load_program_summaries", str(e))
+        
+        if summaries and self._index_signatures() == signatures:
+            try:
+                self._write_index(summaries, signatures)
+            except OSError:
+                # The index is only an accelerator; a read-only directory is fine
+                pass
+        return summaries
     
     def find_program(self, program_id: str) -> Optional[Program]:
         """
@@ -99,10 +278,8 @@ class ProgramStorage:
         Returns:
             Program if found, None otherwise
         """
-        programs = self.load_programs()
-        for program in programs:
-            if program.id == program_id:
-                return program
+        for program in self.iter_programs([program_id]):
+            return program
         return None
     
     def delete_program(self, program_id: str) -> None:
@@ -117,31 +294,194 @@ class ProgramStorage:
             StorageError: If delete fails
         """
         try:
-            programs = self.load_programs()
+            with self._lock:
+                programs = self.load_programs()
+                
+                existing_index = None
+                for i, p in enumerate(programs):
+                    if p.id == program_id:
+                        existing_index = i
+                        break
+                
+                if existing_index is None:
+                    raise ProgramNotFoundError(program_id)
+                
+                if self.journal_enabled:
+                    summaries = self._read_index()
+                    self._append_journal({'op': 'delete', 'id': program_id})
+                    if summaries is not None:
+                        summaries.pop(program_id, None)
+                        self._write_index(summaries.values())
+                    return
+                
+                programs.pop(existing_index)
+                
+                self._write_snapshot(programs)
+                
+        except ProgramNotFoundError:
+            raise
+        except Exception as e:
+            raise StorageError("delete_program", str(e))
+    
+    def compact(self) -> int:
+        """
+        Fold the change journal back into the YAML snapshot.
+        
+        Returns:
+            Number of journal records that were folded
+            
+        Raises:
+            StorageError: If compaction fails
+        """
+        if not self.journal_file.exists():
+            return 0
+        
+        try:
+            with self._lock:
+                records = len(self._read_journal())
+                programs = self.load_programs()
+                self._write_snapshot(programs)
+                return records
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError("compact", str(e))
+    
+    def migrate(self) -> Tuple[int, int]:
+        """
+        Rewrite the database in the current schema version.
+        
+        Every program is passed through the registered migration steps and
+        the YAML file is rewritten one program at a time. The journal is
+        folded in as part of the rewrite.
+        
+        Returns:
+            Tuple of (schema version before, schema version after)
             
-            existing_index = None
-            for i, p in enumerate(programs):
-                if p.id == program_id:
-                    existing_index = i
-                    break
+        Raises:
+            StorageError: If the database is newer than supported or the
+                rewrite fails
+        """
+        try:
+            with self._lock:
+                version = self._read_schema_version()
+                if version == CURRENT_SCHEMA_VERSION and not self.journal_file.exists():
+                    return version, version
+                self._write_snapshot_stream(self._iter_program_dicts())
+                return version, CURRENT_SCHEMA_VERSION
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError("migrate", str(e))
+    
+    def export_jsonl(self, out: TextIO, per_episode: bool = False) -> int:
+        """
+        Stream the database as JSON Lines.
+        
+        Each line uses the same field mapping as the YAML file, with formats
+        inlined so every line is self-contained. With ``per_episode``, each
+        program is written as a header line without ``episodes`` followed by
+        one line per episode carrying a ``programId`` field.
+        
+        Args:
+            out: Text stream to write to
+            per_episode: Write one episode per line instead of one program
             
-            if existing_index is None:
-                raise ProgramNotFoundError(program_id)
+        Returns:
+            Number of programs exported
             
-            programs.pop(existing_index)
+        Raises:
+            StorageError: If export fails
+        """
+        count = 0
+        try:
+            for program in self.iter_programs():
+                program_dict = self._program_to_dict(program, compact_formats=False)
+                if per_episode:
+                    episodes = program_dict.pop('episodes')
+                    out.write(self._to_json_line(program_dict))
+                    for episode_dict in episodes:
+                        out.write(self._to_json_line({'programId': program.id, **episode_dict}))
+                else:
+                    out.write(self._to_json_line(program_dict))
+                count += 1
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError("export_jsonl", str(e))
+        return count
+    
+    def import_jsonl(self, src: TextIO, replace: bool = False) -> int:
+        """
+        Import programs from JSON Lines written by ``export_jsonl``.
+        
+        Both program-per-line and episode-per-line streams are accepted.
+        Imported programs replace stored programs with the same ID in place;
+        new ones are appended. Memory use is bounded by the largest program:
+        the input is spooled to a temporary file and merged with the stored
+        programs in a single streaming rewrite.
+        
+        Args:
+            src: Text stream to read from
+            replace: Discard all stored programs not present in the input
             
-            data = {
-                'programs': [self._program_to_dict(p) for p in programs],
-                'lastUpdated': datetime.now().isoformat()
-            }
+        Returns:
+            Number of programs imported
             
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+        Raises:
+            StorageError: If the input is invalid or the import fails
+        """
+        try:
+            with tempfile.TemporaryFile() as spool:
+                offsets = {}
+                for program_dict in self._iter_jsonl_program_dicts(src):
+                    # Validate and normalize through the model
+                    program = self._dict_to_program(program_dict)
+                    # A later line for the same ID wins, like a later save
+                    offsets[program.id] = spool.tell()
+                    pickle.dump(self._program_to_dict(program), spool, protocol=pickle.HIGHEST_PROTOCOL)
                 
-        except ProgramNotFoundError:
+                def imported(program_id: str) -> dict:
+                    spool.seek(offsets[program_id])
+                    return pickle.load(spool)
+                
+                def merged() -> Iterator[dict]:
+                    done = set()
+                    if not replace:
+                        for program_dict in self._iter_program_dicts():
+                            program_id = program_dict['id']
+                            if program_id in offsets:
+                                done.add(program_id)
+                                yield imported(program_id)
+                            else:
+                                yield program_dict
+                    for program_id in offsets:
+                        if program_id not in done:
+                            yield imported(program_id)
+                
+                with self._lock:
+                    self._write_snapshot_stream(merged())
+                return len(offsets)
+        except StorageError:
             raise
         except Exception as e:
-            raise StorageError("delete_program", str(e))
+            raise StorageError("import_jsonl", str(e))
+    
+    def fingerprint(self, program: Program) -> str:
+        """
+        Compute the content fingerprint of a program.
+        
+        The hash covers the stored representation except the volatile
+        ``fetchedAt``/``updatedAt`` timestamps, so it only changes when
+        something meaningful about the program or its episodes changes.
+        
+        Args:
+            program: Program to fingerprint
+            
+        Returns:
+            Hex digest
+        """
+        return self._fingerprint_dict(self._program_to_dict(program))
     
     def get_all_program_ids(self) -> list[str]:
         """
@@ -153,9 +493,544 @@ class ProgramStorage:
         programs = self.load_programs()
         return [p.id for p in programs]
     
-    def _program_to_dict(self, program: Program) -> dict:
-        """Convert Program to dict for YAML."""
-        return {
+    def _load_program_dicts(self) -> List[dict]:
+        """Load raw program dicts from the YAML snapshot with the journal applied."""
+        if not self.data_file.exists() and not self.journal_file.exists():
+            return []
+        
+        program_dicts = []
+        if self.data_file.exists():
+            program_dicts = self._read_binary_snapshot()
+            if program_dicts is None:
+                program_dicts, signature = self._read_yaml_snapshot()
+                self._try_write_binary_snapshot(program_dicts, signature)
+        
+        return list(self._merge_journal(program_dicts))
+    
+    def _iter_program_dicts(self) -> Iterator[dict]:
+        """Stream raw program dicts one at a time with the journal applied."""
+        if not self.data_file.exists() and not self.journal_file.exists():
+            return
+        
+        yield from self._merge_journal(self._iter_snapshot_dicts())
+    
+    def _iter_snapshot_dicts(self) -> Iterator[dict]:
+        """
+        Stream program dicts from the snapshot.
+        
+        Records are always streamed from a binary file: the fresh sidecar if
+        there is one, otherwise one rebuilt from an incremental YAML parse.
+        The YAML file is therefore never held open while the caller works,
+        so writes during iteration can still replace it.
+        """
+        if not self.data_file.exists():
+            return
+        
+        f = self._open_binary_snapshot()
+        if f is None:
+            f = self._spool_yaml_snapshot()
+        
+        with f:
+            while True:
+                try:
+                    record = pickle.load(f)
+                except Exception as e:
+                    raise StorageError("iter_programs", f"unreadable snapshot record: {e}")
+                if record is None:
+                    return
+                yield record
+    
+    def _read_yaml_snapshot(self) -> Tuple[List[dict], List[int]]:
+        """
+        Parse program dicts from the YAML file.
+        
+        Returns:
+            Tuple of (program dicts, signature of the file that was read)
+        """
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                stat = os.fstat(f.fileno())
+                data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise StorageError("load_programs", "YAML parsing error") from e
+        
+        signature = [stat.st_mtime_ns, stat.st_size]
+        if data and 'programs' in data:
+            version = data.get('schemaVersion', UNVERSIONED_SCHEMA)
+            return [migrate_program(p, version) for p in data['programs']], signature
+        return [], signature
+    
+    def _iter_yaml_program_dicts(self, f: TextIO) -> Iterator[dict]:
+        """
+        Incrementally parse the ``programs`` sequence of a YAML document.
+        
+        Only one program node is composed at a time, so memory is bounded
+        by the largest program rather than the whole file. Programs are
+        migrated to the current schema as they are yielded; ``schemaVersion``
+        must therefore precede ``programs``, which is how it is written.
+        """
+        version = UNVERSIONED_SCHEMA
+        loader = yaml.SafeLoader(f)
+        try:
+            loader.get_event()  # StreamStartEvent
+            if loader.check_event(yaml.StreamEndEvent):
+                return
+            loader.get_event()  # DocumentStartEvent
+            if not loader.check_event(yaml.MappingStartEvent):
+                return
+            loader.get_event()
+            
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = loader.construct_document(loader.compose_node(None, None))
+                if key == 'schemaVersion':
+                    version = check_schema_version(
+                        loader.construct_document(loader.compose_node(None, None))
+                    )
+                elif key == 'programs' and loader.check_event(yaml.SequenceStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(yaml.SequenceEndEvent):
+                        program = loader.construct_document(loader.compose_node(None, None))
+                        yield migrate_program(program, version)
+                    loader.get_event()
+                else:
+                    loader.compose_node(None, None)
+        except yaml.YAMLError as e:
+            raise StorageError("iter_programs", "YAML parsing error") from e
+        finally:
+            loader.dispose()
+    
+    def _read_schema_version(self) -> int:
+        """
+        Read the schema version of the YAML file without parsing the programs.
+        
+        Returns:
+            Schema version (the current one if there is no YAML file yet)
+        """
+        if not self.data_file.exists():
+            return CURRENT_SCHEMA_VERSION
+        
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            loader = yaml.SafeLoader(f)
+            try:
+                loader.get_event()  # StreamStartEvent
+                if loader.check_event(yaml.StreamEndEvent):
+                    return CURRENT_SCHEMA_VERSION
+                loader.get_event()  # DocumentStartEvent
+                if not loader.check_event(yaml.MappingStartEvent):
+                    return UNVERSIONED_SCHEMA
+                loader.get_event()
+                
+                while not loader.check_event(yaml.MappingEndEvent):
+                    key = loader.construct_document(loader.compose_node(None, None))
+                    if key == 'schemaVersion':
+                        return check_schema_version(
+                            loader.construct_document(loader.compose_node(None, None))
+                        )
+                    if key == 'programs':
+                        break
+                    loader.compose_node(None, None)
+            except yaml.YAMLError as e:
+                raise StorageError("migrate", "YAML parsing error") from e
+            finally:
+                loader.dispose()
+        return UNVERSIONED_SCHEMA
+    
+    def _open_binary_snapshot(self) -> Optional[BinaryIO]:
+        """
+        Open the binary snapshot sidecar if it is fresh.
+        
+        Returns:
+            File positioned at the first program record, or None if the
+            sidecar is disabled, missing, from another format or schema version, or
+            does not match the YAML file
+        """
+        if not self.binary_snapshot_enabled:
+            return None
+        
+        try:
+            f = open(self.binary_snapshot_file, 'rb')
+        except FileNotFoundError:
+            return None
+        
+        try:
+            header = pickle.load(f)
+        except Exception:
+            f.close()
+            return None
+        
+        if (not isinstance(header, dict)
+                or header.get('version') != BINARY_SNAPSHOT_VERSION
+                or header.get('schemaVersion') != CURRENT_SCHEMA_VERSION
+                or header.get('source') != self._file_signature(self.data_file)):
+            f.close()
+            return None
+        return f
+    
+    def _read_binary_snapshot(self) -> Optional[List[dict]]:
+        """
+        Read all program dicts from the binary snapshot sidecar if it is fresh.
+        
+        Returns:
+            Program dicts, or None if the sidecar cannot be used
+        """
+        f = self._open_binary_snapshot()
+        if f is None:
+            return None
+        
+        program_dicts = []
+        with f:
+            try:
+                for record in iter(lambda: pickle.load(f), None):
+                    program_dicts.append(record)
+            except Exception:
+                # Truncated or unreadable sidecar; the YAML file is authoritative
+                return None
+        return program_dicts
+    
+    def _spool_yaml_snapshot(self) -> BinaryIO:
+        """
+        Convert the YAML file into binary records without loading it whole.
+        
+        The result is written as the sidecar when enabled, otherwise to an
+        anonymous temporary file.
+        
+        Returns:
+            File positioned at the first program record
+        """
+        with open(self.data_file, 'r', encoding='utf-8') as src:
+            stat = os.fstat(src.fileno())
+            signature = [stat.st_mtime_ns, stat.st_size]
+            
+            if self.binary_snapshot_enabled:
+                try:
+                    with atomic_writer(self.binary_snapshot_file) as out:
+                        self._dump_binary_records(out, self._iter_yaml_program_dicts(src), signature)
+                except OSError:
+                    src.seek(0)
+                else:
+                    f = self._open_binary_snapshot()
+                    if f is not None:
+                        return f
+                    src.seek(0)
+            
+            spool = tempfile.TemporaryFile()
+            try:
+                self._dump_binary_records(spool, self._iter_yaml_program_dicts(src), signature)
+                spool.seek(0)
+                pickle.load(spool)  # header
+            except BaseException:
+                spool.close()
+                raise
+            return spool
+    
+    def _dump_binary_records(self, out: BinaryIO, program_dicts: Iterable[dict],
+                             source_signature: Optional[List[int]]) -> None:
+        """Write the sidecar header, one record per program, and the end marker."""
+        header = {
+            'version': BINARY_SNAPSHOT_VERSION,
+            'schemaVersion': CURRENT_SCHEMA_VERSION,
+            'source': source_signature,
+        }
+        pickle.dump(header, out, protocol=pickle.HIGHEST_PROTOCOL)
+        for program_dict in program_dicts:
+            pickle.dump(program_dict, out, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(None, out, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def _try_write_binary_snapshot(self, program_dicts: List[dict],
+                                   source_signature: Optional[List[int]]) -> None:
+        """
+        Write the binary snapshot sidecar.
+        
+        Args:
+            program_dicts: Program dicts parsed from the YAML file
+            source_signature: Signature of the YAML file they came from
+        """
+        if not self.binary_snapshot_enabled:
+            return
+        
+        try:
+            with atomic_writer(self.binary_snapshot_file) as out:
+                self._dump_binary_records(out, program_dicts, source_signature)
+        except OSError:
+            # The sidecar is only an accelerator; a read-only directory or a
+            # sidecar still open by a running iterator (Windows) is fine
+            pass
+    
+    def _write_snapshot(self, programs: List[Program]) -> None:
+        """Write all programs to the YAML file and discard the journal."""
+        program_dicts = [self._program_to_dict(p) for p in programs]
+        data = {
+            'schemaVersion': CURRENT_SCHEMA_VERSION,
+            'programs': program_dicts,
+            'lastUpdated': datetime.now().isoformat()
+        }
+        
+        atomic_write_text(
+            self.data_file,
+            yaml.safe_dump(data, allow_unicode=True, sort_keys=False)
+        )
+        self._try_write_binary_snapshot(program_dicts, self._file_signature(self.data_file))
+        
+        # The snapshot now contains every journaled change
+        self.journal_file.unlink(missing_ok=True)
+        self._write_index(self._dict_to_summary(p) for p in program_dicts)
+    
+    def _write_snapshot_stream(self, program_dicts: Iterable[dict]) -> None:
+        """
+        Write program dicts to the YAML file one at a time and discard the journal.
+        
+        Produces the same layout as ``_write_snapshot`` without holding the
+        whole document in memory. The binary sidecar is left stale and is
+        rebuilt on the next read.
+        """
+        summaries = []
+        with atomic_writer(self.data_file) as out:
+            out.write(f'schemaVersion: {CURRENT_SCHEMA_VERSION}\nprograms:'.encode('utf-8'))
+            empty = True
+            for program_dict in program_dicts:
+                if empty:
+                    out.write(b'\n')
+                    empty = False
+                out.write(yaml.safe_dump(
+                    [program_dict], allow_unicode=True, sort_keys=False
+                ).encode('utf-8'))
+                summaries.append(self._dict_to_summary(program_dict))
+            if empty:
+                out.write(b' []\n')
+            out.write(yaml.safe_dump(
+                {'lastUpdated': datetime.now().isoformat()}, allow_unicode=True, sort_keys=False
+            ).encode('utf-8'))
+        
+        self.journal_file.unlink(missing_ok=True)
+        self._write_index(summaries)
+    
+    def _iter_jsonl_program_dicts(self, src: TextIO) -> Iterator[dict]:
+        """Group JSON Lines records into program dicts, one program at a time."""
+        current = None
+        for line_number, line in enumerate(src, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise StorageError("import_jsonl", f"invalid JSON at line {line_number}: {e}")
+            
+            if 'programId' in record:
+                program_id = record.pop('programId')
+                if current is None or current['id'] != program_id:
+                    raise StorageError(
+                        "import_jsonl",
+                        f"episode at line {line_number} does not follow its program {program_id}"
+                    )
+                current['episodes'].append(record)
+                continue
+            
+            if current is not None:
+                yield current
+            current = record
+            current.setdefault('episodes', [])
+        
+        if current is not None:
+            yield current
+    
+    def _to_json_line(self, record: dict) -> str:
+        """Serialize a record as a single JSON line."""
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+    
+    def _file_signature(self, path: Path) -> Optional[List[int]]:
+        """Return [mtime_ns, size] for a file, or None if it does not exist."""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def _read_index(self) -> Optional[Dict[str, ProgramSummary]]:
+        """
+        Read the summary index if it is still valid.
+        
+        Returns:
+            Dict of program_id -> ProgramSummary, or None if the index is
+            missing, unreadable or stale
+        """
+        index_signature = self._file_signature(self.index_file)
+        if index_signature is None:
+            return None
+        snapshot_signature = self._file_signature(self.data_file)
+        journal_signature = self._file_signature(self.journal_file)
+
+        memo = _index_memo.get(self.index_file)
+        if memo is not None and memo[:3] == (index_signature, snapshot_signature, journal_signature):
+            return dict(memo[3])
+
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+        if index.get('snapshot') != snapshot_signature or index.get('journal') != journal_signature:
+            return None
+        
+        try:
+            summaries = {
+                s['id']: ProgramSummary(
+                    id=s['id'],
+                    title=s['title'],
+                    platform=s['platform'],
+                    updated_at=datetime.fromisoformat(s['updatedAt']),
+                    fingerprint=s.get('fingerprint'),
+                )
+                for s in index['programs']
+            }
+        except (KeyError, TypeError, ValueError):
+            return None
+        _index_memo[self.index_file] = (index_signature, snapshot_signature, journal_signature, summaries)
+        return dict(summaries)
+    
+    def _index_signatures(self) -> Tuple[Optional[List[int]], Optional[List[int]]]:
+        """Signatures of the data and journal files an index is valid for."""
+        return self._file_signature(self.data_file), self._file_signature(self.journal_file)
+    
+    def _write_index(self, summaries: Iterable[ProgramSummary],
+                     signatures: Optional[Tuple[Optional[List[int]], Optional[List[int]]]] = None) -> None:
+        """
+        Write the summary index.
+        
+        Args:
+            summaries: Summaries of every stored program
+            signatures: Data and journal signatures the summaries were read
+                from (default: the current files, for writers holding the lock)
+        """
+        snapshot_signature, journal_signature = signatures or self._index_signatures()
+        index = {
+            'snapshot': snapshot_signature,
+            'journal': journal_signature,
+            'programs': [
+                {
+                    'id': s.id,
+                    'title': s.title,
+                    'platform': s.platform,
+                    'updatedAt': s.updated_at.isoformat(),
+                    'fingerprint': s.fingerprint,
+                }
+                for s in summaries
+            ],
+        }
+        atomic_write_text(self.index_file, json.dumps(index, ensure_ascii=False))
+    
+    def _stored_fingerprint(self, program_id: str) -> Optional[str]:
+        """
+        Get the fingerprint of the stored version of a program.
+        
+        Served from the summary index when it is fresh; otherwise the stored
+        program is looked up by streaming the database.
+        
+        Returns:
+            Fingerprint, or None if the program is not stored
+        """
+        summaries = self._read_index()
+        if summaries is not None:
+            if program_id not in summaries:
+                return None
+            if summaries[program_id].fingerprint is not None:
+                return summaries[program_id].fingerprint
+        
+        for program_dict in self._iter_program_dicts():
+            if program_dict['id'] == program_id:
+                return self._fingerprint_dict(program_dict)
+        return None
+    
+    def _fingerprint_dict(self, program_dict: dict) -> str:
+        """Hash a stored program dict, ignoring volatile timestamps."""
+        content = {k: v for k, v in program_dict.items() if k not in VOLATILE_PROGRAM_FIELDS}
+        encoded = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+    
+    def _append_journal(self, record: dict) -> None:
+        """Append a single change record to the journal as a JSON line."""
+        append_line(self.journal_file, self._to_json_line(record).rstrip('\n'))
+    
+    def _read_journal(self) -> List[dict]:
+        """
+        Read change records from the journal.
+        
+        An unterminated final line (e.g. from a crash during append) is
+        ignored; corruption anywhere else raises StorageError.
+        """
+        if not self.journal_file.exists():
+            return []
+        
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        # Every complete record ends with a newline, so the last piece is
+        # either empty or a torn append
+        lines.pop()
+        
+        records = []
+        for i, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                raise StorageError("read_journal", f"corrupted record at line {i + 1}")
+        return records
+    
+    def _merge_journal(self, program_dicts: Iterable[dict]) -> Iterator[dict]:
+        """
+        Apply journaled changes on top of a stream of snapshot program dicts.
+        
+        The result matches replaying the journal record by record onto the
+        snapshot list: saved programs are replaced in place, deleted ones are
+        dropped, and new or re-added programs follow in the order they were
+        (re)added.
+        """
+        records = self._read_journal()
+        if not records:
+            yield from program_dicts
+            return
+        
+        latest = {}       # program_id -> latest saved dict
+        deleted = set()   # ids deleted at any point
+        appended = {}     # ids that would be (re)appended, in append order
+        for record in records:
+            if record['op'] == 'save':
+                program = migrate_program(record['program'], record.get('v', UNVERSIONED_SCHEMA))
+                latest[program['id']] = program
+                appended.setdefault(program['id'], None)
+            elif record['op'] == 'delete':
+                latest.pop(record['id'], None)
+                deleted.add(record['id'])
+                appended.pop(record['id'], None)
+        
+        snapshot_ids = set()
+        for program in program_dicts:
+            program_id = program['id']
+            snapshot_ids.add(program_id)
+            if program_id in deleted:
+                continue
+            yield latest.get(program_id, program)
+        
+        for program_id in appended:
+            if program_id not in snapshot_ids or program_id in deleted:
+                yield latest[program_id]
+    
+    def _program_to_dict(self, program: Program, compact_formats: Optional[bool] = None) -> dict:
+        """
+        Convert Program to dict for YAML.
+        
+        Args:
+            program: Program to convert
+            compact_formats: Intern formats into ladders (defaults to the
+                storage setting)
+        """
+        if compact_formats is None:
+            compact_formats = self.compact_formats
+        ladders = [] if compact_formats else None
+        episodes = [self._episode_to_dict(ep, ladders) for ep in program.episodes]
+        
+        program_dict = {
             'id': program.id,
             'title': program.title,
             'description': program.description,
@@ -166,11 +1041,26 @@ class ProgramStorage:
             'fetchedAt': program.fetched_at.isoformat(),
             'updatedAt': program.updated_at.isoformat(),
             'platform': program.platform,
-            'episodes': [self._episode_to_dict(ep) for ep in program.episodes]
         }
+        if program.source_fingerprint:
+            program_dict['sourceFingerprint'] = program.source_fingerprint
+        if program.probe_token:
+            program_dict['probeToken'] = program.probe_token
+        if ladders:
+            program_dict['formatLadders'] = ladders
+        program_dict['episodes'] = episodes
+        return program_dict
     
-    def _episode_to_dict(self, episode: Episode) -> dict:
-        """Convert Episode to dict for YAML."""
+    def _episode_to_dict(self, episode: Episode, ladders: Optional[List[list]] = None) -> dict:
+        """
+        Convert Episode to dict for YAML.
+        
+        Args:
+            episode: Episode to convert
+            ladders: Per-program format ladder table. When given, the formats
+                are interned into it as URL templates and the episode only
+                stores the ladder index.
+        """
         episode_dict = {
             'id': episode.id,
             'number': episode.number,
@@ -186,21 +1076,68 @@ class ProgramStorage:
         }
         
         if episode.formats:
-            episode_dict['formats'] = [
-                {
-                    'formatId': fmt.format_id,
-                    'resolution': fmt.resolution,
-                    'tbr': fmt.tbr,
-                    'url': fmt.url,
-                }
-                for fmt in episode.formats
-            ]
+            ladder_index = None
+            if ladders is not None:
+                ladder_index = self._intern_format_ladder(episode, ladders)
+            
+            if ladder_index is not None:
+                episode_dict['formatLadder'] = ladder_index
+            else:
+                episode_dict['formats'] = [
+                    {
+                        'formatId': fmt.format_id,
+                        'resolution': fmt.resolution,
+                        'tbr': fmt.tbr,
+                        'url': fmt.url,
+                    }
+                    for fmt in episode.formats
+                ]
         
         return episode_dict
     
+    def _intern_format_ladder(self, episode: Episode, ladders: List[list]) -> Optional[int]:
+        """
+        Add the episode's formats to the ladder table as URL templates.
+        
+        Returns:
+            Ladder index, or None if the formats cannot be templated exactly
+        """
+        if not episode.id:
+            return None
+        
+        ladder = None
+        if isinstance(episode.formats, LadderFormats):
+            ladder = episode.formats.unexpanded_ladder(episode.id)
+        if ladder is not None:
+            ladder = [dict(fmt) for fmt in ladder]
+        else:
+            ladder = self._build_format_ladder(episode)
+            if ladder is None:
+                return None
+        
+        if ladder in ladders:
+            return ladders.index(ladder)
+        ladders.append(ladder)
+        return len(ladders) - 1
+    
+    def _build_format_ladder(self, episode: Episode) -> Optional[List[dict]]:
+        """Build a templated format ladder, or None if it would not round-trip."""
+        ladder = []
+        for fmt in episode.formats:
+            if EPISODE_ID_PLACEHOLDER in fmt.url:
+                return None
+            ladder.append({
+                'formatId': fmt.format_id,
+                'resolution': fmt.resolution,
+                'tbr': fmt.tbr,
+                'url': fmt.url.replace(episode.id, EPISODE_ID_PLACEHOLDER),
+            })
+        return ladder
+    
     def _dict_to_program(self, data: dict) -> Program:
         """Convert dict to Program."""
-        episodes = [self._dict_to_episode(ep) for ep in data.get('episodes', [])]
+        ladders = data.get('formatLadders', [])
+        episodes = [self._dict_to_episode(ep, ladders) for ep in data.get('episodes', [])]
         
         return Program(
             id=data['id'],
@@ -213,13 +1150,27 @@ class ProgramStorage:
             episodes=episodes,
             fetched_at=datetime.fromisoformat(data['fetchedAt']),
             updated_at=datetime.fromisoformat(data['updatedAt']),
-            platform=data.get('platform', 'abema')
+            platform=data.get('platform', 'abema'),
+            source_fingerprint=data.get('sourceFingerprint'),
+            probe_token=data.get('probeToken')
+        )
+    
+    def _dict_to_summary(self, data: dict, fingerprint: Optional[str] = None) -> ProgramSummary:
+        """Convert program dict to ProgramSummary without building episodes."""
+        return ProgramSummary(
+            id=data['id'],
+            title=data['title'],
+            platform=data.get('platform', 'abema'),
+            updated_at=datetime.fromisoformat(data['updatedAt']),
+            fingerprint=fingerprint or self._fingerprint_dict(data)
         )
     
-    def _dict_to_episode(self, data: dict) -> Episode:
+    def _dict_to_episode(self, data: dict, ladders: Optional[List[list]] = None) -> Episode:
         """Convert dict to Episode."""
         formats = []
-        if 'formats' in data:
+        if 'formatLadder' in data:
+            formats = LadderFormats(ladder=ladders[data['formatLadder']], episode_id=data['id'])
+        elif 'formats' in data:
             formats = [
                 VideoFormat(
                     format_id=fmt.get('formatId', ''),
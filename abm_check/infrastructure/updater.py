@@ -1,28 +1,59 @@
 """Program update functionality with diff detection."""
-from dataclasses import dataclass
-from typing import List, Optional
+import logging
+import time
+from dataclasses import replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
-from abm_check.domain.models import Program, Episode
+from abm_check.domain.models import Program
+from abm_check.domain.diff import EpisodeDiff, diff_episodes, merge_diffs  # EpisodeDiff is re-exported here
 from abm_check.infrastructure.storage import ProgramStorage
 from abm_check.infrastructure.fetcher_factory import FetcherFactory
+from abm_check.infrastructure.fetcher import season_of
+from abm_check.infrastructure.schedule import ProgramStateStore
+from abm_check.infrastructure.history import HistoryStore
+from abm_check.infrastructure.circuit_breaker import CircuitBreaker
+from abm_check.domain.exceptions import AbmCheckError, SourceNotFoundError, StorageError
 from abm_check.config import get_config
 
 
-@dataclass
-class EpisodeDiff:
-    """Represents changes detected in episodes."""
+logger = logging.getLogger(__name__)
 
-    new_episodes: List[Episode]
-    premium_to_free: List[Episode]
+# Update strategies
+STRATEGY_FULL = 'full'        # Re-fetch the whole program
+STRATEGY_PREMIUM = 'premium'  # Re-check only premium-only episodes, one by one
+STRATEGY_LATEST_SEASON = 'latest-season'  # Re-fetch the latest season and seasons with premium episodes
+STRATEGIES = (STRATEGY_FULL, STRATEGY_PREMIUM, STRATEGY_LATEST_SEASON)
 
 
 class ProgramUpdater:
     """Handle program updates with diff detection."""
 
-    def __init__(self, fetcher=None, storage=None, data_file=None):
+    def __init__(
+        self, fetcher=None, storage=None, data_file=None, history=None, scheduler=None, checkpoint=None,
+        strategy: str = STRATEGY_FULL, probe: bool = True
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown update strategy: {strategy}")
         self.fetcher = fetcher  # This will be used if provided, otherwise determined per program
         self.storage = storage or ProgramStorage(data_file=data_file)
         self.fetcher_factory = FetcherFactory(config=get_config())
+        if history is None and get_config().history_enabled:
+            history = HistoryStore()
+        self.history = history
+        self.scheduler = scheduler  # Records each check and plans the next one when set
+        self.pending: List[str] = []  # Programs left over when the last run hit its time limit
+        self.checkpoint = checkpoint  # Records update-all progress for resuming when set
+        self.strategy = strategy
+        self.probe = probe  # Skip full fetches when the cheap probe reports no change
+        # Tracks full fetches so latest-season updates revalidate every season now and then
+        if scheduler is not None:
+            self.state_store = scheduler.state_store
+        elif strategy == STRATEGY_LATEST_SEASON:
+            self.state_store = ProgramStateStore()
+        else:
+            self.state_store = None
+        self.failures: Dict[str, Dict[str, str]] = {}  # platform -> {program_id: error} of the last run
+        self.skipped: Dict[str, List[str]] = {}  # platform -> program IDs skipped by an open circuit
     
     def update_program(self, program_id: str) -> Optional[EpisodeDiff]:
         """
@@ -38,6 +69,127 @@ class ProgramUpdater:
         if not old_program:
             return None
 
+        try:
+            return self._update(old_program)
+        finally:
+            self._save_state()
+    
+    def update_all_programs(
+        self,
+        program_ids: Optional[Iterable[str]] = None,
+        max_duration: Optional[float] = None,
+        on_result: Optional[Callable[[Program, EpisodeDiff], None]] = None
+    ) -> dict[str, EpisodeDiff]:
+        """
+        Update all programs.
+
+        Programs are streamed from storage one at a time, so peak memory is
+        bounded by the largest program rather than the whole database.
+
+        With a checkpoint, programs it already lists as completed are skipped,
+        their recorded diffs are included in the result, and each program is
+        marked done as soon as it is updated.
+
+        A program whose fetch fails is recorded in ``failures`` and the run
+        goes on. After ``circuit_breaker.failure_threshold`` consecutive
+        failures on a platform, its remaining programs are skipped and listed
+        in ``skipped``. Storage errors still abort the run.
+
+        Args:
+            program_ids: Only update these programs, in this order (optional)
+            max_duration: Seconds after which no further program is started
+                (optional). Programs not reached are left in ``pending``.
+            on_result: Called with the stored program and its diff as soon as
+                a program with changes is updated (optional)
+
+        Returns:
+            Dict mapping program_id to EpisodeDiff for changed programs
+        """
+        results = {}
+        completed = set()
+        deadline = None if max_duration is None else time.monotonic() + max_duration
+        breaker = CircuitBreaker(get_config().circuit_breaker_threshold)
+        self.pending = []
+        self.failures = {}
+        self.skipped = {}
+
+        if program_ids is not None:
+            program_ids = list(program_ids)
+        if self.checkpoint:
+            if self.checkpoint.exists():
+                results = self.checkpoint.diffs()
+                completed = self.checkpoint.completed_ids()
+            else:
+                self.checkpoint.start(program_ids)
+
+        if program_ids is None:
+            programs = self.storage.iter_programs()
+        else:
+            programs = self._iter_programs_in_order(
+                [program_id for program_id in program_ids if program_id not in completed]
+            )
+
+        try:
+            for program in programs:
+                if program.id in completed:
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.pending = [
+                        program_id for program_id in self._remaining_ids(program, program_ids)
+                        if program_id not in completed
+                    ]
+                    break
+                if breaker.is_open(program.platform):
+                    self.skipped.setdefault(program.platform, []).append(program.id)
+                    continue
+                try:
+                    diff = self._update(program)
+                except StorageError:
+                    raise
+                except AbmCheckError as e:
+                    # Left out of the checkpoint so a resumed run retries it.
+                    # A missing program says nothing about the platform's health.
+                    if not isinstance(e, SourceNotFoundError):
+                        breaker.record_failure(program.platform)
+                    self.failures.setdefault(program.platform, {})[program.id] = str(e)
+                    continue
+                breaker.record_success(program.platform)
+                if self.checkpoint:
+                    self.checkpoint.mark_done(program.id, diff)
+                if diff and diff.has_changes:
+                    # A diff carried over from a replaced run may already be there
+                    previous = results.get(program.id)
+                    results[program.id] = merge_diffs(previous, diff) if previous else diff
+                    if on_result:
+                        on_result(program, diff)
+        finally:
+            self._save_state()
+
+        return results
+
+    def _iter_programs_in_order(self, program_ids: List[str]) -> Iterator[Program]:
+        """
+        Yield programs in the given order.
+
+        The selected programs are loaded in a single storage pass (a pass
+        per batch would re-read the whole database each time) and released
+        as soon as they have been yielded.
+        """
+        loaded = {program.id: program for program in self.storage.iter_programs(program_ids)}
+        for program_id in program_ids:
+            program = loaded.pop(program_id, None)
+            if program is not None:
+                yield program
+
+    def _remaining_ids(self, current: Program, program_ids: Optional[List[str]]) -> List[str]:
+        """IDs of the current program and every program after it."""
+        if program_ids is not None:
+            return program_ids[program_ids.index(current.id):]
+        ids = [summary.id for summary in self.storage.load_program_summaries()]
+        return ids[ids.index(current.id):] if current.id in ids else [current.id]
+    
+    def _update(self, old_program: Program) -> EpisodeDiff:
+        """Fetch the latest state of a stored program, save it if changed, and return the diff."""
         # Use provided fetcher if available, otherwise create one based on platform
         if self.fetcher:
             fetcher = self.fetcher
@@ -45,51 +197,197 @@ class ProgramUpdater:
             # Create appropriate fetcher based on program platform
             fetcher, _ = self.fetcher_factory.create_fetcher(old_program.url)
 
-        new_program = fetcher.fetch_program_info(program_id)
+        if self.strategy == STRATEGY_PREMIUM:
+            new_program = self._fetch_premium_episodes(fetcher, old_program)
+        elif self.strategy == STRATEGY_LATEST_SEASON:
+            new_program = self._fetch_latest_seasons(fetcher, old_program)
+        else:
+            new_program = self._fetch_program(fetcher, old_program)
+
+        if new_program is None:
+            # Nothing to convert or diff
+            if self.scheduler:
+                self.scheduler.record(old_program, False)
+            return EpisodeDiff(new_episodes=[], premium_to_free=[])
+
         new_program.fetched_at = old_program.fetched_at
         new_program.updated_at = datetime.now()
 
+        if self.history:
+            self.history.record(new_program, at=new_program.updated_at)
+
         diff = self._detect_changes(old_program, new_program)
 
-        if diff.new_episodes or diff.premium_to_free:
+        if self.scheduler:
+            self.scheduler.record(new_program, diff.has_changes, now=new_program.updated_at)
+
+        # A new source fingerprint or probe token is saved even without
+        # episode changes so that the next update can skip work
+        if (diff.has_changes
+                or new_program.source_fingerprint != old_program.source_fingerprint
+                or new_program.probe_token != old_program.probe_token):
             self.storage.save_program(new_program)
 
         return diff
     
-    def update_all_programs(self) -> dict[str, EpisodeDiff]:
+    def _save_state(self) -> None:
+        """Persist scheduling state."""
+        if self.scheduler:
+            self.scheduler.save()
+        elif self.state_store:
+            self.state_store.save()
+
+    def _fetch_program(self, fetcher, old_program: Program) -> Optional[Program]:
         """
-        Update all programs.
+        Fetch the whole program, or None if it is unchanged.
+
+        A cheap probe runs first; when its token matches the stored one the
+        full fetch is skipped. Otherwise the fetch is skipped at conversion
+        if the source still matches the stored fingerprint.
+        """
+        token = self._probe(fetcher, old_program)
+        if token is not None and token == old_program.probe_token:
+            return None
+
+        if old_program.source_fingerprint:
+            new_program = fetcher.fetch_program_info(
+                old_program.id, known_fingerprint=old_program.source_fingerprint
+            )
+        else:
+            new_program = fetcher.fetch_program_info(old_program.id)
+        if self.state_store:
+            self.state_store.get(old_program.id).last_full_fetch = datetime.now()
+
+        if new_program is not None:
+            new_program.probe_token = token
+        elif token is not None and token != old_program.probe_token:
+            # Same source but a new token; keep it so the next update stops at the probe
+            new_program = replace(old_program, probe_token=token)
+        return new_program
+
+    def _probe(self, fetcher, old_program: Program) -> Optional[str]:
+        """
+        Get the program's change token, or None if it cannot be relied on.
+
+        Listings do not show availability changes, so programs with
+        premium-only episodes that may turn free are always fully fetched.
+        A failed probe also falls back to the full fetch, except when the
+        program is gone.
+        """
+        if not self.probe:
+            return None
+        if any(ep.is_premium_only and not ep.is_downloadable for ep in old_program.episodes):
+            return None
+        try:
+            return fetcher.probe(old_program.id, known_token=old_program.probe_token)
+        except SourceNotFoundError:
+            raise
+        except Exception as e:
+            logger.debug(f"Probe failed for {old_program.id}, fetching in full: {e}")
+            return None
+
+    def _fetch_latest_seasons(self, fetcher, old_program: Program) -> Optional[Program]:
+        """
+        Re-fetch only the latest season and older seasons with premium-only episodes.
+
+        Fetched seasons replace their stored episodes; other seasons keep
+        theirs. Every season is fetched again once
+        ``schedule.full_refresh_interval`` has passed since the last full
+        fetch, and whenever seasons cannot be told apart (other platforms,
+        episode IDs without a season).
 
         Returns:
-            Dict mapping program_id to EpisodeDiff for changed programs
+            The stored program with the fetched seasons merged in, or None
+            if nothing changed
         """
-        programs = self.storage.load_programs()
-        results = {}
+        seasons = {season_of(ep.id) for ep in old_program.episodes}
+        if not seasons or None in seasons or self._full_refresh_due(old_program):
+            return self._fetch_program(fetcher, old_program)
 
-        for program in programs:
-            diff = self.update_program(program.id)
-            if diff and (diff.new_episodes or diff.premium_to_free):
-                results[program.id] = diff
+        latest = max(seasons)
+        wanted = {latest} | {season_of(ep.id) for ep in old_program.episodes if ep.is_premium_only}
+        try:
+            fetched = fetcher.fetch_seasons(old_program.id, wanted)
+        except NotImplementedError:
+            return self._fetch_program(fetcher, old_program)
+        if latest not in fetched:
+            # The latest season disappeared; only a full fetch can tell what happened
+            return self._fetch_program(fetcher, old_program)
 
-        return results
-    
-    def _detect_changes(self, old_program: Program, new_program: Program) -> EpisodeDiff:
-        """Detect new episodes and premium-to-free changes."""
-        old_episodes = {ep.id: ep for ep in old_program.episodes}
-        new_episodes_list = []
-        premium_to_free_list = []
-        
-        for new_ep in new_program.episodes:
-            old_ep = old_episodes.get(new_ep.id)
-            
-            if old_ep is None:
-                if new_ep.is_downloadable:
-                    new_episodes_list.append(new_ep)
+        episodes = []
+        for season in sorted(seasons | set(fetched)):
+            if season in fetched:
+                episodes.extend(fetched[season])
             else:
-                if old_ep.is_premium_only and new_ep.is_downloadable:
-                    premium_to_free_list.append(new_ep)
-        
-        return EpisodeDiff(
-            new_episodes=new_episodes_list,
-            premium_to_free=premium_to_free_list
+                episodes.extend(ep for ep in old_program.episodes if season_of(ep.id) == season)
+        return self._merge_episodes(old_program, episodes)
+
+    def _full_refresh_due(self, old_program: Program) -> bool:
+        """Check whether a program's seasons are due for a full revalidation."""
+        last_full_fetch = self.state_store.get(old_program.id).last_full_fetch
+        if last_full_fetch is None:
+            return True
+        age = (datetime.now() - last_full_fetch).total_seconds()
+        return age >= get_config().schedule_full_refresh_interval
+
+    def _merge_episodes(self, old_program: Program, episodes: list) -> Optional[Program]:
+        """
+        Build the program with partially re-fetched episodes.
+
+        The source fingerprint and probe token are dropped because they no
+        longer describe a full fetch; the next full fetch stores new ones.
+
+        Returns:
+            Merged program, or None if the episodes did not change
+        """
+        if episodes == old_program.episodes:
+            return None
+        regular = [ep.number for ep in episodes if ep.number and ep.number < 100]
+        return replace(
+            old_program,
+            episodes=episodes,
+            total_episodes=len(episodes),
+            latest_episode_number=max(regular) if regular else 0,
+            source_fingerprint=None,
+            probe_token=None,
         )
+
+    def _fetch_premium_episodes(self, fetcher, old_program: Program) -> Optional[Program]:
+        """
+        Re-check the premium-only episodes of a program from their episode pages.
+
+        Only availability is taken from the fetched episodes; everything else
+        keeps its stored value. Platforms without episode pages fall back to
+        a full fetch.
+
+        Returns:
+            The stored program with the changed episodes merged in, or None
+            if no availability changed
+        """
+        premium_ids = [ep.id for ep in old_program.episodes if ep.is_premium_only]
+        try:
+            fetched = fetcher.fetch_episodes(premium_ids)
+        except NotImplementedError:
+            return self._fetch_program(fetcher, old_program)
+
+        episodes = []
+        for episode in old_program.episodes:
+            new_episode = fetched.get(episode.id)
+            if new_episode is None or (
+                (new_episode.is_downloadable, new_episode.is_premium_only)
+                == (episode.is_downloadable, episode.is_premium_only)
+            ):
+                episodes.append(episode)
+                continue
+            episodes.append(replace(
+                episode,
+                is_downloadable=new_episode.is_downloadable,
+                is_premium_only=new_episode.is_premium_only,
+                download_url=new_episode.download_url,
+                formats=new_episode.formats,
+            ))
+        return self._merge_episodes(old_program, episodes)
+
+    def _detect_changes(self, old_program: Program, new_program: Program) -> EpisodeDiff:
+        """Detect every class of episode change between two program states."""
+        return diff_episodes(old_program.episodes, new_program.episodes)
@@ -0,0 +1,252 @@
+"""Crash-safe file writing and inter-process locking helpers."""
+import os
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+def atomic_write_text(path: Union[str, Path], text: str, encoding: str = 'utf-8',
+                      mode: Optional[int] = None) -> None:
+    """
+    Write text to a file atomically.
+
+    The content is written to a temporary file in the same directory, flushed
+    and fsynced, then renamed over the target. Readers see either the old or
+    the new file, never a truncated one.
+
+    Args:
+        path: Target file path
+        text: Content to write
+        encoding: Text encoding
+        mode: Permission bits for the file (default: keep the existing ones)
+    """
+    atomic_write_bytes(path, text.encode(encoding), mode=mode)
+
+
+def atomic_write_bytes(path: Union[str, Path], data: bytes, mode: Optional[int] = None) -> None:
+    """
+    Write bytes to a file atomically.
+
+    Args:
+        path: Target file path
+        data: Content to write
+        mode: Permission bits for the file (default: keep the existing ones)
+    """
+    with atomic_writer(path, mode=mode) as f:
+        f.write(data)
+
+
+@contextmanager
+def atomic_writer(path: Union[str, Path], mode: Optional[int] = None) -> Iterator[BinaryIO]:
+    """
+    Open a binary temporary file that replaces ``path`` atomically on exit.
+
+    Use this to stream large content without holding it in memory. If the
+    block raises, the target is left untouched. Unless ``mode`` is given,
+    the new file keeps the permissions of the file it replaces, or gets the
+    usual umask-based permissions if there was none.
+
+    Args:
+        path: Target file path
+        mode: Permission bits for the file (optional)
+
+    Yields:
+        Binary file object to write to
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        # mkstemp creates the file as 0600; don't narrow the target's mode
+        os.chmod(tmp_name, _target_mode(path) if mode is None else mode)
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    _fsync_directory(path.parent)
+
+
+def _target_mode(path: Path) -> int:
+    """Get the permission bits a rewritten file should have."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        pass
+    # The umask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def append_line(path: Union[str, Path], line: str, encoding: str = 'utf-8') -> None:
+    """
+    Append a single line to a file with one write call and fsync it.
+
+    An unterminated last line, left by a crash during an earlier append, is
+    cut off first. Otherwise the new line would be glued onto it and both
+    would turn into one corrupted line that is no longer the last.
+
+    Args:
+        path: Target file path
+        line: Line content without the trailing newline
+        encoding: Text encoding
+    """
+    data = (line + '\n').encode(encoding)
+    fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        _truncate_torn_tail(fd)
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _truncate_torn_tail(fd: int, chunk_size: int = 4096) -> None:
+    """Cut a line-oriented file back to its last newline if it does not end with one."""
+    size = os.fstat(fd).st_size
+    if size == 0:
+        return
+    os.lseek(fd, size - 1, os.SEEK_SET)
+    if os.read(fd, 1) == b'\n':
+        return
+
+    end = size
+    while end > 0:
+        start = max(0, end - chunk_size)
+        os.lseek(fd, start, os.SEEK_SET)
+        newline = os.read(fd, end - start).rfind(b'\n')
+        if newline >= 0:
+            end = start + newline + 1
+            break
+        end = start
+    os.ftruncate(fd, end)
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename by fsyncing its directory (no-op where unsupported)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class LockTimeoutError(TimeoutError):
+    """Raised when a file lock could not be acquired in time."""
+
+
+class FileLock:
+    """
+    Advisory exclusive lock on a lock file.
+
+    The lock is reentrant within a single instance, so nested
+    read-modify-write helpers can share it.
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: Optional[float] = None,
+                 poll_interval: float = 0.05):
+        """
+        Initialize lock.
+
+        Args:
+            path: Lock file path
+            timeout: Seconds to wait for the lock (None waits forever)
+            poll_interval: Seconds between attempts while waiting
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._depth = 0
+
+    def acquire(self) -> None:
+        """
+        Acquire the lock.
+
+        Raises:
+            LockTimeoutError: If the lock is not acquired within the timeout
+        """
+        if self._depth:
+            self._depth += 1
+            return
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        try:
+            while not self._try_lock(fd, blocking=deadline is None):
+                if time.monotonic() >= deadline:
+                    raise LockTimeoutError(f"Timed out waiting for lock: {self.path}")
+                time.sleep(self.poll_interval)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self._fd = fd
+        self._depth = 1
+
+    def release(self) -> None:
+        """Release the lock."""
+        if not self._depth:
+            return
+        self._depth -= 1
+        if self._depth:
+            return
+
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    @property
+    def is_locked(self) -> bool:
+        """Whether this instance currently holds the lock."""
+        return self._depth > 0
+
+    def _try_lock(self, fd: int, blocking: bool) -> bool:
+        """Try to take the OS-level lock."""
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(fd, flags)
+            except BlockingIOError:
+                return False
+            return True
+
+        os.lseek(fd, 0, os.SEEK_SET)  # pragma: no cover - Windows
+        mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+        try:
+            msvcrt.locking(fd, mode, 1)
+        except OSError:
+            return False
+        return True
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,87 @@
+"""Tests for UpdateCheckpoint."""
+import pytest
+from datetime import datetime
+from abm_check.domain.diff import EpisodeDiff
+from abm_check.infrastructure.checkpoint import UpdateCheckpoint
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    return UpdateCheckpoint(str(tmp_path / "update_checkpoint.json"))
+
+
+def test_start_and_mark_done(checkpoint, create_episode):
+    """Test that completed programs and their diffs survive a reload."""
+    episode = create_episode("ep2", 2)
+    episode.expiration_date = datetime(2025, 7, 1, 12, 0)
+    checkpoint.start(["p1", "p2", "p3"])
+    checkpoint.mark_done("p1", EpisodeDiff(new_episodes=[episode], premium_to_free=[]))
+    checkpoint.mark_done("p2", EpisodeDiff(new_episodes=[], premium_to_free=[]))
+
+    reloaded = UpdateCheckpoint(str(checkpoint.checkpoint_file))
+    assert reloaded.exists()
+    assert reloaded.program_ids == ["p1", "p2", "p3"]
+    assert reloaded.completed_ids() == {"p1", "p2"}
+
+    diffs = reloaded.diffs()
+    assert list(diffs) == ["p1"]
+    restored = diffs["p1"].new_episodes[0]
+    assert restored.id == "ep2"
+    assert restored.title == episode.title
+    assert restored.expiration_date == datetime(2025, 7, 1, 12, 0)
+    assert restored.formats == []
+
+
+def test_start_discards_previous_run(checkpoint):
+    """Test that starting a run replaces the old checkpoint."""
+    checkpoint.start(["p1"])
+    checkpoint.mark_done("p1", None)
+    checkpoint.start(None)
+
+    assert checkpoint.program_ids is None
+    assert checkpoint.completed_ids() == set()
+
+
+def test_start_with_carried_diffs(checkpoint, create_episode):
+    """Test that carried diffs are reported, merged with new ones, and not counted as done."""
+    carried = EpisodeDiff(new_episodes=[create_episode("ep2", 2)], premium_to_free=[])
+    checkpoint.start(["p1", "p2"], carried={"p1": carried})
+    assert checkpoint.completed_ids() == set()
+    assert [ep.id for ep in checkpoint.diffs()["p1"].new_episodes] == ["ep2"]
+
+    checkpoint.mark_done("p1", EpisodeDiff(new_episodes=[create_episode("ep3", 3)], premium_to_free=[]))
+    assert checkpoint.completed_ids() == {"p1"}
+    assert [ep.id for ep in checkpoint.diffs()["p1"].new_episodes] == ["ep2", "ep3"]
+
+
+def test_reported_diffs_are_not_carried(checkpoint, create_episode):
+    """Test that only diffs recorded after the last report are carried over."""
+    checkpoint.start(["p1", "p2"])
+    checkpoint.mark_done("p1", EpisodeDiff(new_episodes=[create_episode("ep1", 1)], premium_to_free=[]))
+    checkpoint.mark_reported()
+    checkpoint.mark_done("p2", EpisodeDiff(new_episodes=[create_episode("ep2", 2)], premium_to_free=[]))
+
+    assert list(checkpoint.unreported_diffs()) == ["p2"]
+    # --resume still reports everything the run found
+    assert list(checkpoint.diffs()) == ["p1", "p2"]
+    assert checkpoint.completed_ids() == {"p1", "p2"}
+
+
+def test_truncated_last_line_is_ignored(checkpoint):
+    """Test that an interrupted append does not lose earlier records."""
+    checkpoint.start(["p1", "p2"])
+    checkpoint.mark_done("p1", None)
+    with open(checkpoint.checkpoint_file, 'a', encoding='utf-8') as f:
+        f.write('{"id":"p2","di')
+
+    assert checkpoint.completed_ids() == {"p1"}
+
+
+def test_clear(checkpoint):
+    """Test that clearing removes the checkpoint."""
+    checkpoint.start(["p1"])
+    checkpoint.clear()
+
+    assert not checkpoint.exists()
+    assert checkpoint.started_at is None
+    checkpoint.clear()
@@ -0,0 +1,33 @@
+"""Tests for CircuitBreaker."""
+from abm_check.infrastructure.circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    """Test that a circuit opens at the threshold and reports the trip once."""
+    breaker = CircuitBreaker(2)
+
+    assert breaker.record_failure("abema") is False
+    assert not breaker.is_open("abema")
+    assert breaker.record_failure("abema") is True
+    assert breaker.is_open("abema")
+    assert breaker.record_failure("abema") is False
+    assert not breaker.is_open("tver")
+
+
+def test_success_resets_count():
+    """Test that only consecutive failures count."""
+    breaker = CircuitBreaker(2)
+    breaker.record_failure("abema")
+    breaker.record_success("abema")
+    breaker.record_failure("abema")
+
+    assert not breaker.is_open("abema")
+
+
+def test_zero_threshold_disables():
+    """Test that a threshold of 0 never opens."""
+    breaker = CircuitBreaker(0)
+    for _ in range(10):
+        breaker.record_failure("abema")
+
+    assert not breaker.is_open("abema")
@@ -17,13 +17,23 @@ def mock_infra():
     with patch('abm_check.cli.main.ProgramStorage') as ms, \
          patch('abm_check.cli.main.MarkdownGenerator') as mmg, \
          patch('abm_check.cli.main.ProgramUpdater') as mu, \
-         patch('abm_check.cli.main.DownloadListGenerator') as mdlg:
+         patch('abm_check.cli.main.DownloadListGenerator') as mdlg, \
+         patch('abm_check.cli.main.UpdateCheckpoint') as mc, \
+         patch('abm_check.cli.main.UpdateScheduler') as msch:
 
+        msch.return_value.resting.return_value = []
+        msch.return_value.dormant.return_value = []
+        mu.return_value.pending = []
+        mu.return_value.failures = {}
+        mu.return_value.skipped = {}
+        mc.return_value.exists.return_value = False
         yield {
             "storage": ms.return_value,
             "md_gen": mmg.return_value,
             "updater": mu.return_value,
-            "dl_gen": mdlg.return_value
+            "dl_gen": mdlg.return_value,
+            "checkpoint": mc.return_value,
+            "scheduler": msch.return_value
         }
 
 def test_add_command_success(runner, mock_infra, create_program, create_episode):
@@ -94,16 +104,30 @@ def test_list_command_success(runner, mock_infra, create_program):
     """Test the 'list' command with existing programs."""
     prog1 = create_program("p1", [], title="Program 1")
     prog2 = create_program("p2", [], title="Program 2")
-    mock_infra["storage"].load_programs.return_value = [prog1, prog2]
+    mock_infra["storage"].load_program_summaries.return_value = [prog1, prog2]
     
     result = runner.invoke(cli, ['list'])
     
     assert "p1 Program 1" in result.output
     assert result.exit_code == 0
 
+def test_list_command_dormant(runner, mock_infra, create_program):
+    """Test that 'list --dormant' shows only dormant programs."""
+    mock_infra["storage"].load_program_summaries.return_value = [
+        create_program("p1", [], title="Program 1"),
+        create_program("p2", [], title="Program 2"),
+    ]
+    mock_infra["scheduler"].dormant.return_value = ["p2"]
+
+    result = runner.invoke(cli, ['list', '--dormant'])
+
+    assert "p2 Program 2" in result.output
+    assert "p1 Program 1" not in result.output
+    assert result.exit_code == 0
+
 def test_list_command_empty(runner, mock_infra):
     """Test the 'list' command when no programs are stored."""
-    mock_infra["storage"].load_programs.return_value = []
+    mock_infra["storage"].load_program_summaries.return_value = []
     
     result = runner.invoke(cli, ['list'])
     
@@ -156,13 +180,14 @@ def test_update_all_programs_success(runner, mock_infra, create_program, create_
     diff1 = EpisodeDiff(new_episodes=[create_episode("p1e2", 2)], premium_to_free=[])
 
     mock_infra["updater"].update_all_programs.return_value = {"p1": diff1}
-    mock_infra["storage"].find_program.return_value = prog1
+    mock_infra["storage"].iter_programs.return_value = iter([prog1])
 
     result = runner.invoke(cli, ['update'])
 
     mock_infra["updater"].update_all_programs.assert_called_once()
     mock_infra["dl_gen"].generate_combined_list.assert_called_once()
     assert '[INFO] Updated 1 programs' in result.output
+    assert '[INFO]   Prog 1:' in result.output
     assert result.exit_code == 0
 
 def test_cli_with_data_file_option(runner, mock_infra, create_program, create_episode):
@@ -183,7 +208,7 @@ def test_cli_with_data_file_option(runner, mock_infra, create_program, create_ep
         assert "custom_programs.yaml" in result.output
 
     # Test 'list' command with --data-file
-    mock_infra["storage"].load_programs.return_value = [mock_program]
+    mock_infra["storage"].load_program_summaries.return_value = [mock_program]
     result = runner.invoke(cli, ['--data-file', custom_file, 'list'])
     assert program_id in result.output
     assert result.exit_code == 0
@@ -199,3 +224,315 @@ def test_cli_with_data_file_option(runner, mock_infra, create_program, create_ep
     result = runner.invoke(cli, ['--data-file', custom_file, 'update', program_id])
     assert result.exit_code == 0
 
+
+def test_storage_compact_command(runner, mock_infra):
+    """Test the 'storage compact' command."""
+    mock_infra["storage"].compact.return_value = 3
+
+    result = runner.invoke(cli, ['storage', 'compact'])
+
+    mock_infra["storage"].compact.assert_called_once()
+    assert "Compacted 3 journal records" in result.output
+    assert result.exit_code == 0
+
+
+def test_export_command(runner, mock_infra):
+    """Test the 'export' command writing to stdout."""
+    mock_infra["storage"].export_jsonl.side_effect = lambda out, per_episode: out.write('{"id":"a"}\n') and 1
+
+    result = runner.invoke(cli, ['export', '--format', 'jsonl', '--per-episode'])
+
+    assert result.exit_code == 0
+    assert '{"id":"a"}' in result.output
+    assert mock_infra["storage"].export_jsonl.call_args.kwargs == {"per_episode": True}
+
+
+def test_import_command(runner, mock_infra):
+    """Test the 'import' command reading from stdin."""
+    mock_infra["storage"].import_jsonl.return_value = 2
+
+    result = runner.invoke(cli, ['import', '--replace'], input='{"id":"a"}\n')
+
+    assert result.exit_code == 0
+    assert "Imported 2 programs" in result.output
+    args, kwargs = mock_infra["storage"].import_jsonl.call_args
+    assert args[0].read() == '{"id":"a"}\n'
+    assert kwargs == {"replace": True}
+
+
+def test_storage_migrate_command(runner, mock_infra):
+    """Test the 'storage migrate' command."""
+    mock_infra["storage"].migrate.return_value = (1, 2)
+
+    result = runner.invoke(cli, ['storage', 'migrate'])
+
+    mock_infra["storage"].migrate.assert_called_once()
+    assert "from schema version 1 to 2" in result.output
+    assert result.exit_code == 0
+
+
+def test_history_command(runner, tmp_path, create_program, create_episode):
+    """Test the 'history' command timeline and --at replay."""
+    from datetime import datetime
+    from abm_check.infrastructure.history import HistoryStore
+
+    store = HistoryStore(str(tmp_path))
+    store.record(create_program("p", [create_episode("ep7", 7, is_downloadable=False, is_premium_only=True)]),
+                 at=datetime(2025, 1, 1))
+    store.record(create_program("p", [create_episode("ep7", 7)]), at=datetime(2025, 2, 1))
+
+    with patch('abm_check.cli.main.HistoryStore', return_value=store):
+        timeline = runner.invoke(cli, ['history', 'p'])
+        state = runner.invoke(cli, ['history', 'p', '--at', '2025-01-15'])
+        missing = runner.invoke(cli, ['history', 'other'])
+
+    assert timeline.exit_code == 0
+    assert "2025/01/01 00:00:00 + ep7 第7話 🔒" in timeline.output
+    assert "2025/02/01 00:00:00 ~ ep7 第7話 ✅" in timeline.output
+    assert state.output.strip() == "07 🔒 ep7"
+    assert missing.exit_code == 1
+
+
+def test_update_command_metadata_changes_only(runner, mock_infra, create_program, create_episode):
+    """Test that changes without downloads are reported but produce no download list."""
+    diff = EpisodeDiff(new_episodes=[], premium_to_free=[], removed=[create_episode("ep1", 1)])
+    mock_infra["updater"].update_program.return_value = diff
+    mock_infra["storage"].find_program.return_value = create_program("p", [])
+
+    result = runner.invoke(cli, ['update', 'p'])
+
+    assert "Removed: 1" in result.output
+    mock_infra["dl_gen"].generate_download_list.assert_not_called()
+    assert result.exit_code == 0
+
+
+def test_update_scheduled_nothing_due(runner, mock_infra):
+    """Test that a scheduled run with nothing due fetches nothing."""
+    from datetime import datetime
+    from abm_check.domain.models import ProgramSummary
+
+    mock_infra["storage"].load_program_summaries.return_value = [
+        ProgramSummary(id="p1", title="P1", platform="abema", updated_at=datetime(2025, 1, 1))
+    ]
+    with patch('abm_check.cli.main.UpdateScheduler') as ms:
+        ms.return_value.due.return_value = []
+        ms.return_value.next_check_time.return_value = datetime(2025, 6, 8)
+        result = runner.invoke(cli, ['update', '--scheduled'])
+
+    ms.return_value.due.assert_called_once_with(["p1"])
+    mock_infra["updater"].update_all_programs.assert_not_called()
+    assert "0 of 1 programs due" in result.output
+    assert "Next check: 2025/06/08 00:00:00" in result.output
+    assert result.exit_code == 0
+
+
+def test_update_scheduled_due_programs(runner, mock_infra):
+    """Test that a scheduled run updates only the due programs."""
+    with patch('abm_check.cli.main.UpdateScheduler') as ms:
+        ms.return_value.due.return_value = ["p1"]
+        mock_infra["updater"].update_all_programs.return_value = {}
+        result = runner.invoke(cli, ['update', '--scheduled'])
+
+    mock_infra["updater"].update_all_programs.assert_called_once_with(["p1"], max_duration=None, on_result=None)
+    assert result.exit_code == 0
+
+
+def test_update_max_duration(runner, mock_infra):
+    """Test that a time-limited run goes in priority order and reports leftovers."""
+    from datetime import datetime
+    from abm_check.domain.models import ProgramSummary
+
+    mock_infra["storage"].load_program_summaries.return_value = [
+        ProgramSummary(id=pid, title=pid, platform="abema", updated_at=datetime(2025, 1, 1))
+        for pid in ("p1", "p2", "p3")
+    ]
+    mock_infra["updater"].update_all_programs.return_value = {}
+    mock_infra["updater"].pending = ["p1"]
+    with patch('abm_check.cli.main.UpdateScheduler') as ms:
+        ms.return_value.prioritize.return_value = ["p3", "p2", "p1"]
+        result = runner.invoke(cli, ['update', '--max-duration', '600'])
+
+    ms.return_value.prioritize.assert_called_once_with(["p1", "p2", "p3"])
+    mock_infra["updater"].update_all_programs.assert_called_once_with(["p3", "p2", "p1"], max_duration=600.0, on_result=None)
+    assert "1 programs left for the next run" in result.output
+    assert result.exit_code == 0
+
+
+def test_update_resume(runner, mock_infra):
+    """Test that --resume reuses the interrupted run's selection and clears the checkpoint when done."""
+    from datetime import datetime
+
+    checkpoint = mock_infra["checkpoint"]
+    checkpoint.exists.return_value = True
+    checkpoint.program_ids = ["p2", "p1"]
+    checkpoint.started_at = datetime(2025, 6, 1, 3, 0)
+    checkpoint.completed_ids.return_value = {"p2"}
+    mock_infra["updater"].update_all_programs.return_value = {}
+    result = runner.invoke(cli, ['update', '--resume'])
+
+    mock_infra["storage"].load_program_summaries.assert_not_called()
+    mock_infra["updater"].update_all_programs.assert_called_once_with(["p2", "p1"], max_duration=None, on_result=None)
+    assert "Resuming run started at 2025/06/01 03:00:00: 1 programs already done" in result.output
+    checkpoint.clear.assert_called_once()
+    assert result.exit_code == 0
+
+
+def test_update_keeps_checkpoint_when_time_runs_out(runner, mock_infra):
+    """Test that an unfinished run leaves its checkpoint for --resume."""
+    with patch('abm_check.cli.main.UpdateScheduler') as ms:
+        ms.return_value.prioritize.return_value = []
+        mock_infra["updater"].update_all_programs.return_value = {}
+        mock_infra["updater"].pending = ["p1"]
+        result = runner.invoke(cli, ['update', '--max-duration', '0'])
+
+    # Started for the new run, not cleared at the end
+    mock_infra["checkpoint"].start.assert_called_once_with([], carried={})
+    mock_infra["checkpoint"].clear.assert_not_called()
+    assert "--resume" in result.output
+    assert result.exit_code == 0
+
+
+def test_update_carries_over_unfinished_run(runner, mock_infra, create_program, create_episode):
+    """Test that a new run reports the changes an unfinished run found instead of dropping them."""
+    from datetime import datetime
+
+    program = create_program("p1", [create_episode("ep1", 1), create_episode("ep2", 2)], title="Carried")
+    diff = EpisodeDiff(new_episodes=[program.episodes[1]], premium_to_free=[])
+    checkpoint = mock_infra["checkpoint"]
+    checkpoint.exists.return_value = True
+    checkpoint.started_at = datetime(2025, 6, 1, 3, 0)
+    checkpoint.unreported_diffs.return_value = {"p1": diff}
+    mock_infra["updater"].update_all_programs.return_value = {"p1": diff}
+    mock_infra["storage"].iter_programs.return_value = iter([program])
+    result = runner.invoke(cli, ['update'])
+
+    assert "Replacing unfinished run started at 2025/06/01 03:00:00" in result.output
+    checkpoint.start.assert_called_once_with(None, carried={"p1": diff})
+    mock_infra["dl_gen"].generate_combined_list.assert_called_once()
+    checkpoint.clear.assert_called_once()
+    assert result.exit_code == 0
+
+
+def test_update_does_not_repeat_changes_around_a_failing_program(runner, mock_infra, tmp_path,
+                                                               create_program, create_episode):
+    """Test that a permanently failing program does not make later runs re-report old changes."""
+    from abm_check.infrastructure.checkpoint import UpdateCheckpoint
+
+    program = create_program("p2", [create_episode("ep1", 1), create_episode("ep2", 2)])
+    diff = EpisodeDiff(new_episodes=[program.episodes[1]], premium_to_free=[])
+    checkpoint = UpdateCheckpoint(str(tmp_path / "update_checkpoint.json"))
+    updater = mock_infra["updater"]
+    runs = []
+
+    def update_all(program_ids, max_duration=None, on_result=None):
+        # Mimic ProgramUpdater: p1 always fails, p2 has a new episode on the first run only
+        results = checkpoint.diffs()
+        completed = checkpoint.completed_ids()
+        if "p2" not in completed:
+            if not runs:
+                checkpoint.mark_done("p2", diff)
+                results["p2"] = diff
+            else:
+                checkpoint.mark_done("p2", None)
+        updater.failures = {"abema": {"p1": "Program not found: p1"}}
+        runs.append(program_ids)
+        return results
+
+    updater.update_all_programs.side_effect = update_all
+    mock_infra["storage"].iter_programs.side_effect = lambda ids: iter([program])
+    dl_gen = mock_infra["dl_gen"]
+    with patch('abm_check.cli.main.UpdateCheckpoint', return_value=checkpoint):
+        outputs = [runner.invoke(cli, ['update']).output for _ in range(3)]
+
+    assert len(runs) == 3
+    dl_gen.generate_combined_list.assert_called_once()
+    assert all("Replacing unfinished run" not in output for output in outputs)
+    assert "No changes detected in any program" in outputs[1]
+    assert "No changes detected in any program" in outputs[2]
+    assert not checkpoint.exists()
+
+
+def test_update_stream_jsonl(runner, mock_infra, create_program, create_episode):
+    """Test that --stream jsonl writes each program's changes to stdout as they arrive."""
+    import json
+
+    program = create_program("p1", [create_episode("ep1", 1), create_episode("ep2", 2)], title="Streamed")
+    diff = EpisodeDiff(new_episodes=[program.episodes[1]], premium_to_free=[])
+
+    def update_all(program_ids, max_duration=None, on_result=None):
+        on_result(program, diff)
+        return {"p1": diff}
+
+    mock_infra["updater"].update_all_programs.side_effect = update_all
+    mock_infra["storage"].iter_programs.return_value = iter([program])
+    result = runner.invoke(cli, ['update', '--stream', 'jsonl'])
+
+    lines = result.stdout.splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["programId"] == "p1"
+    assert [entry["id"] for entry in record["entries"]] == ["ep2"]
+    assert record["entries"][0]["entry_type"] == "new"
+    assert result.exit_code == 0
+
+
+def test_update_stream_to_requires_stream(runner, mock_infra, tmp_path):
+    """Test that --stream-to alone is rejected without touching the feed file."""
+    feed = tmp_path / "feed.jsonl"
+    feed.write_text('{"programId":"p0"}\n', encoding="utf-8")
+
+    result = runner.invoke(cli, ['update', '--stream-to', str(feed)])
+
+    assert result.exit_code == 2
+    assert "--stream-to requires --stream" in result.output
+    assert feed.read_text(encoding="utf-8") == '{"programId":"p0"}\n'
+    mock_infra["updater"].update_all_programs.assert_not_called()
+
+
+def test_update_reports_platform_failures(runner, mock_infra):
+    """Test that failed and skipped programs are reported per platform with a failing exit code."""
+    mock_infra["updater"].update_all_programs.return_value = {}
+    mock_infra["updater"].failures = {"abema": {"p1": "Failed to fetch program p1: timeout"}}
+    mock_infra["updater"].skipped = {"abema": ["p2", "p3"]}
+    result = runner.invoke(cli, ['update'])
+
+    assert "abema: 1 programs failed, 2 skipped after repeated failures" in result.output
+    assert "p1: Failed to fetch program p1: timeout" in result.output
+    # Kept for --resume because of the skipped programs; the failed one is retried anyway
+    mock_infra["checkpoint"].clear.assert_not_called()
+    assert result.exit_code == 1
+
+
+def test_update_skips_dormant_programs(runner, mock_infra):
+    """Test that resting dormant programs are left out unless --include-dormant is given."""
+    from datetime import datetime
+    from abm_check.domain.models import ProgramSummary
+
+    mock_infra["storage"].load_program_summaries.return_value = [
+        ProgramSummary(id=pid, title=pid, platform="abema", updated_at=datetime(2025, 1, 1))
+        for pid in ("p1", "p2", "p3")
+    ]
+    mock_infra["scheduler"].resting.return_value = ["p2"]
+    mock_infra["updater"].update_all_programs.return_value = {}
+
+    result = runner.invoke(cli, ['update'])
+
+    mock_infra["updater"].update_all_programs.assert_called_once_with(["p1", "p3"], max_duration=None, on_result=None)
+    assert "Skipping 1 dormant programs" in result.output
+
+    mock_infra["updater"].update_all_programs.reset_mock()
+    result = runner.invoke(cli, ['update', '--include-dormant'])
+
+    mock_infra["updater"].update_all_programs.assert_called_once_with(None, max_duration=None, on_result=None)
+    assert result.exit_code == 0
+
+
+def test_setup_logger_replaces_handler():
+    """Test that repeated invocations in one process do not stack log handlers."""
+    from abm_check.cli.main import setup_logger
+
+    setup_logger()
+    logger = setup_logger(verbose=True)
+
+    assert len(logger.handlers) == 1
+
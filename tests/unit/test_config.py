@@ -135,3 +135,14 @@ class TestConfig:
         
         assert config.season_threshold == 12
         assert config.max_seasons == 10
+
+    def test_config_retry_settings_platform_override(self, tmp_path: Path) -> None:
+        """Test that per-platform retry settings override the defaults."""
+        config_file = tmp_path / "abm_check.yaml"
+        config_data = {"retry": {"base_delay": 2.0, "platforms": {"niconico": {"max_attempts": 5}}}}
+        config_file.write_text(yaml.safe_dump(config_data), encoding="utf-8")
+
+        config = Config(str(config_file))
+
+        assert config.retry_settings("niconico") == {"max_attempts": 5, "base_delay": 2.0, "max_delay": 30.0}
+        assert config.retry_settings("abema")["max_attempts"] == 3
@@ -0,0 +1,105 @@
+"""Unit tests for the episode diff engine."""
+import time
+from datetime import datetime
+
+from abm_check.domain.diff import EpisodeDiff, diff_episodes, merge_diffs
+
+
+def test_new_and_premium_to_free(create_episode):
+    """Test the original change classes."""
+    old = [create_episode("ep1", 1, is_downloadable=False, is_premium_only=True)]
+    new = [
+        create_episode("ep1", 1),
+        create_episode("ep2", 2),
+        create_episode("ep3", 3, is_downloadable=False, is_premium_only=True),
+    ]
+
+    diff = diff_episodes(old, new)
+
+    assert [ep.id for ep in diff.new_episodes] == ["ep2"]
+    assert [ep.id for ep in diff.premium_to_free] == ["ep1"]
+    assert diff.has_downloads
+
+
+def test_removed_and_free_to_premium(create_episode):
+    """Test disappearing episodes and free-to-premium flips."""
+    old = [create_episode("ep1", 1), create_episode("ep2", 2)]
+    new = [create_episode("ep2", 2, is_downloadable=False, is_premium_only=True)]
+
+    diff = diff_episodes(old, new)
+
+    assert [ep.id for ep in diff.removed] == ["ep1"]
+    assert [ep.id for ep in diff.free_to_premium] == ["ep2"]
+    assert not diff.has_downloads
+    assert diff.has_changes
+
+
+def test_expired(create_episode):
+    """Test that only past expirations of lost episodes are reported."""
+    now = datetime(2025, 6, 1)
+    gone = create_episode("ep1", 1)
+    gone.expiration_date = datetime(2025, 5, 31)
+    locked = create_episode("ep2", 2)
+    locked.expiration_date = datetime(2025, 5, 31)
+    still_free = create_episode("ep3", 3)
+    still_free.expiration_date = datetime(2025, 5, 31)
+    future = create_episode("ep4", 4)
+    future.expiration_date = datetime(2025, 7, 1)
+
+    new = [
+        create_episode("ep2", 2, is_downloadable=False, is_premium_only=False),
+        create_episode("ep3", 3),
+    ]
+    diff = diff_episodes([gone, locked, still_free, future], new, now=now)
+
+    assert sorted(ep.id for ep in diff.expired) == ["ep1", "ep2"]
+    assert sorted(ep.id for ep in diff.removed) == ["ep1", "ep4"]
+
+
+def test_metadata_changes(create_episode):
+    """Test title and duration edits."""
+    old = [create_episode("ep1", 1, title="Old"), create_episode("ep2", 2, duration=100)]
+    new = [create_episode("ep1", 1, title="New"), create_episode("ep2", 2, duration=200)]
+
+    diff = diff_episodes(old, new)
+
+    assert [ep.title for ep in diff.title_changed] == ["New"]
+    assert [ep.duration for ep in diff.duration_changed] == [200]
+    assert not diff.has_downloads
+
+
+def test_no_changes(create_episode):
+    """Test identical lists."""
+    episodes = [create_episode("ep1", 1)]
+    diff = diff_episodes(episodes, [create_episode("ep1", 1)])
+
+    assert diff == EpisodeDiff(new_episodes=[], premium_to_free=[])
+    assert not diff.has_changes
+
+
+def test_merge_diffs(create_episode):
+    """Test that merged diffs keep both updates' episodes, later versions winning."""
+    earlier = EpisodeDiff(new_episodes=[create_episode("ep2", 2, title="Old")], premium_to_free=[])
+    later = EpisodeDiff(
+        new_episodes=[create_episode("ep2", 2, title="New"), create_episode("ep3", 3)],
+        premium_to_free=[create_episode("ep1", 1)],
+    )
+
+    merged = merge_diffs(earlier, later)
+
+    assert [(ep.id, ep.title) for ep in merged.new_episodes] == [("ep2", "New"), ("ep3", later.new_episodes[1].title)]
+    assert [ep.id for ep in merged.premium_to_free] == ["ep1"]
+
+
+def test_scales_linearly(create_episode):
+    """Test that thousands of episodes diff quickly."""
+    old = [create_episode(f"ep{i}", i) for i in range(20000)]
+    new = [create_episode(f"ep{i}", i) for i in range(10000, 30000)]
+
+    start = time.perf_counter()
+    diff = diff_episodes(old, new)
+    elapsed = time.perf_counter() - start
+
+    assert len(diff.removed) == 10000
+    assert len(diff.new_episodes) == 10000
+    assert elapsed < 1.0
@@ -3,7 +3,7 @@ import pytest
 from pathlib import Path
 from abm_check.domain.models import Program, Episode, VideoFormat
 from abm_check.infrastructure.updater import EpisodeDiff
-from abm_check.infrastructure.download_list import DownloadListGenerator
+from abm_check.infrastructure.download_list import DownloadListGenerator, ChangeFeedWriter
 
 @pytest.fixture
 def test_program(create_program, create_episode) -> Program:
@@ -204,3 +204,27 @@ def test_generate_combined_list_yaml(tmp_path, create_program, create_episode):
     assert data["metadata"]["total_entries"] == 2
     assert data["metadata"]["new_episodes"] == 1
     assert data["metadata"]["premium_to_free"] == 1
+
+def test_change_feed_writes_one_line_per_program(test_program, create_episode):
+    """Test that the change feed writes a flushed JSON line per program."""
+    import io
+    import json
+
+    stream = io.StringIO()
+    diff = EpisodeDiff(
+        new_episodes=[create_episode("ep2", 2)],
+        premium_to_free=[create_episode("ep1", 1)],
+        removed=[create_episode("ep0", 0)],
+    )
+    writer = ChangeFeedWriter(stream)
+    writer.write(test_program, diff)
+    writer.write(test_program, EpisodeDiff(new_episodes=[], premium_to_free=[], title_changed=[create_episode("ep1", 1)]))
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2
+    first = json.loads(lines[0])
+    assert first["programId"] == "prog-1"
+    assert [(e["id"], e["entry_type"]) for e in first["entries"]] == [("ep2", "new"), ("ep1", "premium_to_free")]
+    assert first["entries"][0]["url"] == "https://abema.tv/video/episode/ep2"
+    assert first["removed"] == ["ep0"]
+    assert json.loads(lines[1])["titleChanged"] == ["ep1"]
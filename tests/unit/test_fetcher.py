@@ -131,6 +131,115 @@ class TestAbemaFetcher:
         assert "Failed to extract info" in str(exc_info.value)
         mock_ydl_extract_info.assert_called_once()
 
+    def test_fetch_program_retries_transient_error(
+        self, fetcher: AbemaFetcher, mock_program_info: dict[str, Any], mock_ydl_extract_info: MagicMock
+    ) -> None:
+        """Test that a transient network error is retried with backoff."""
+        mock_ydl_extract_info.side_effect = [Exception("HTTP Error 503: Service Unavailable"), mock_program_info]
+
+        with patch("abm_check.infrastructure.retry.time.sleep") as mock_sleep:
+            program = fetcher.fetch_program_info("26-249")
+
+        assert program.id == "26-249"
+        assert mock_ydl_extract_info.call_count == 2
+        mock_sleep.assert_called_once()
+
+    def test_fetch_program_skips_unchanged_source(
+        self, fetcher: AbemaFetcher, mock_program_info: dict[str, Any], mock_ydl_extract_info: MagicMock
+    ) -> None:
+        """Test that a matching source fingerprint skips conversion and a changed entry does not."""
+        mock_ydl_extract_info.return_value = mock_program_info
+        program = fetcher.fetch_program_info("26-249")
+        assert program.source_fingerprint
+
+        with patch.object(fetcher, "_convert_to_episode") as mock_convert:
+            assert fetcher.fetch_program_info("26-249", known_fingerprint=program.source_fingerprint) is None
+        mock_convert.assert_not_called()
+
+        mock_program_info["entries"][1]["availability"] = "premium_only"
+        changed = fetcher.fetch_program_info("26-249", known_fingerprint=program.source_fingerprint)
+        assert changed is not None
+        assert changed.source_fingerprint != program.source_fingerprint
+
+    def test_fetch_episodes(self, fetcher: AbemaFetcher, mock_ydl_extract_info: MagicMock) -> None:
+        """Test fetching single episodes from their episode pages."""
+        def extract(url, download=False):
+            if url.endswith("_p2"):
+                raise Exception("HTTP Error 404: Not Found")
+            return {"id": "26-249_s1_p1", "title": "第1話", "episode_number": 1, "duration": 1440,
+                    "formats": [{"format_id": "1080p", "url": "https://example.com/1080.m3u8"}]}
+
+        mock_ydl_extract_info.side_effect = extract
+
+        episodes = fetcher.fetch_episodes(["26-249_s1_p1", "26-249_s1_p2"])
+
+        assert list(episodes) == ["26-249_s1_p1"]
+        assert episodes["26-249_s1_p1"].is_downloadable
+        urls = [call.args[0] for call in mock_ydl_extract_info.call_args_list]
+        assert urls == ["https://abema.tv/video/episode/26-249_s1_p1", "https://abema.tv/video/episode/26-249_s1_p2"]
+
+    def test_fetch_seasons_follows_new_seasons(self, fetcher: AbemaFetcher, mock_ydl_extract_info: MagicMock) -> None:
+        """Test fetching selected seasons, following seasons after the latest requested one."""
+        import yt_dlp
+
+        def extract(url, download=False):
+            season = 1 if url == "https://abema.tv/video/title/26-249" else int(url.split("_s")[1].split("&")[0])
+            if season > 4:
+                raise yt_dlp.utils.DownloadError("not found")
+            return {"entries": [{"id": f"26-249_s{season}_p1", "episode_number": 1, "duration": 1440}]}
+
+        mock_ydl_extract_info.side_effect = extract
+
+        seasons = fetcher.fetch_seasons("26-249", [1, 3])
+
+        assert sorted(seasons) == [1, 3, 4]
+        assert seasons[4][0].id == "26-249_s4_p1"
+        assert mock_ydl_extract_info.call_count == 4
+
+    def test_fetch_program_not_found_is_cached(self, fetcher: AbemaFetcher, mock_ydl_extract_info: MagicMock) -> None:
+        """Test that a missing program is remembered and not requested again."""
+        from abm_check.domain.exceptions import SourceNotFoundError
+
+        mock_ydl_extract_info.side_effect = Exception("HTTP Error 404: Not Found")
+
+        with pytest.raises(SourceNotFoundError):
+            fetcher.fetch_program_info("26-999")
+        with pytest.raises(SourceNotFoundError, match="cached"):
+            fetcher.fetch_program_info("26-999")
+
+        mock_ydl_extract_info.assert_called_once()
+
+    def test_fetch_seasons_skips_known_missing_season(self, fetcher: AbemaFetcher, mock_ydl_extract_info: MagicMock) -> None:
+        """Test that the probe for the season after the latest is not repeated while remembered."""
+        import yt_dlp
+
+        def extract(url, download=False):
+            if "_s3" in url:
+                raise yt_dlp.utils.DownloadError("HTTP Error 404: Not Found")
+            season = 1 if url == "https://abema.tv/video/title/26-249" else int(url.split("_s")[1].split("&")[0])
+            return {"entries": [{"id": f"26-249_s{season}_p1", "episode_number": 1, "duration": 1440}]}
+
+        mock_ydl_extract_info.side_effect = extract
+
+        assert sorted(fetcher.fetch_seasons("26-249", [2])) == [2]
+        assert mock_ydl_extract_info.call_count == 2
+        assert sorted(fetcher.fetch_seasons("26-249", [2])) == [2]
+        assert mock_ydl_extract_info.call_count == 3
+
+    def test_probe_lists_without_extracting_episodes(
+        self, fetcher: AbemaFetcher, mock_program_info: dict[str, Any]
+    ) -> None:
+        """Test that the probe uses a flat listing and its token follows the entries."""
+        with patch("abm_check.infrastructure.fetcher.yt_dlp.YoutubeDL") as mock_ydl:
+            mock_ydl.return_value.__enter__.return_value.extract_info.return_value = mock_program_info
+            token = fetcher.probe("26-249")
+            assert fetcher.probe("26-249") == token
+
+            mock_program_info["entries"].append({"id": "26-249_s1_p3", "title": "第3話"})
+            assert fetcher.probe("26-249") != token
+
+        assert mock_ydl.call_args.args[0]["extract_flat"] == "in_playlist"
+
     def test_fetch_multi_season_program(self, fetcher: AbemaFetcher, mock_ydl_extract_info: MagicMock) -> None:
         """Test fetching program with multiple seasons (>= 12 episodes triggers season detection)."""
         first_season_info = {
@@ -0,0 +1,124 @@
+"""Tests for crash-safe file helpers."""
+import os
+import stat
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from abm_check.utils.fileio import FileLock, LockTimeoutError, append_line, atomic_write_text
+
+
+def test_atomic_write_text_replaces_content(tmp_path: Path) -> None:
+    """Test that atomic_write_text writes the full content."""
+    target = tmp_path / "data.yaml"
+    target.write_text("old", encoding="utf-8")
+
+    atomic_write_text(target, "new content")
+
+    assert target.read_text(encoding="utf-8") == "new content"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.yaml"]
+
+
+def test_atomic_write_text_failure_keeps_original(tmp_path: Path) -> None:
+    """Test that a failed write leaves the original file and no temp files."""
+    target = tmp_path / "data.yaml"
+    target.write_text("original", encoding="utf-8")
+
+    with patch("abm_check.utils.fileio.os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            atomic_write_text(target, "partial")
+
+    assert target.read_text(encoding="utf-8") == "original"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.yaml"]
+
+
+def test_atomic_write_text_keeps_mode(tmp_path: Path) -> None:
+    """Test that rewriting a file keeps its permissions and new files follow the umask."""
+    target = tmp_path / "data.yaml"
+    target.write_text("old", encoding="utf-8")
+    os.chmod(target, 0o644)
+
+    atomic_write_text(target, "new")
+    assert stat.S_IMODE(target.stat().st_mode) == 0o644
+
+    umask = os.umask(0o027)
+    try:
+        atomic_write_text(tmp_path / "new.yaml", "new")
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE((tmp_path / "new.yaml").stat().st_mode) == 0o640
+
+    atomic_write_text(tmp_path / "secret.json", "{}", mode=0o600)
+    assert stat.S_IMODE((tmp_path / "secret.json").stat().st_mode) == 0o600
+
+
+def test_append_line(tmp_path: Path) -> None:
+    """Test appending lines."""
+    target = tmp_path / "log.jsonl"
+
+    append_line(target, "first")
+    append_line(target, "second")
+
+    assert target.read_text(encoding="utf-8") == "first\nsecond\n"
+
+
+def test_append_line_truncates_torn_tail(tmp_path: Path) -> None:
+    """Test that a partial last line from an interrupted append is cut off first."""
+    target = tmp_path / "log.jsonl"
+    target.write_text("first\n" + "x" * 5000, encoding="utf-8")
+
+    append_line(target, "second")
+    append_line(target, "third")
+
+    assert target.read_text(encoding="utf-8") == "first\nsecond\nthird\n"
+
+    target.write_text("torn", encoding="utf-8")
+    append_line(target, "only")
+    assert target.read_text(encoding="utf-8") == "only\n"
+
+
+def test_file_lock_is_reentrant(tmp_path: Path) -> None:
+    """Test that the same lock instance can be nested."""
+    lock = FileLock(tmp_path / "db.lock")
+
+    with lock:
+        with lock:
+            assert lock.is_locked
+        assert lock.is_locked
+    assert not lock.is_locked
+
+
+def test_file_lock_excludes_other_holders(tmp_path: Path) -> None:
+    """Test that a second holder times out while the lock is held."""
+    holder = FileLock(tmp_path / "db.lock")
+    contender = FileLock(tmp_path / "db.lock", timeout=0.1)
+
+    with holder:
+        with pytest.raises(LockTimeoutError):
+            contender.acquire()
+
+    contender.acquire()
+    assert contender.is_locked
+    contender.release()
+
+
+def test_file_lock_serializes_threads(tmp_path: Path) -> None:
+    """Test that read-modify-write cycles under the lock do not interleave."""
+    counter_file = tmp_path / "counter.txt"
+    counter_file.write_text("0", encoding="utf-8")
+
+    def increment() -> None:
+        for _ in range(20):
+            with FileLock(tmp_path / "counter.lock"):
+                value = int(counter_file.read_text(encoding="utf-8"))
+                atomic_write_text(counter_file, str(value + 1))
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert counter_file.read_text(encoding="utf-8") == "80"
@@ -0,0 +1,93 @@
+"""Unit tests for the episode history store."""
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from abm_check.domain.exceptions import StorageError
+from abm_check.infrastructure.history import HistoryStore
+
+
+class TestHistoryStore:
+    """Test HistoryStore."""
+
+    @pytest.fixture
+    def store(self, tmp_path: Path) -> HistoryStore:
+        """Create HistoryStore instance."""
+        return HistoryStore(str(tmp_path / "history"))
+
+    def test_first_record_is_baseline(self, store: HistoryStore, create_program, create_episode) -> None:
+        """Test that the first observation records every episode as added."""
+        program = create_program("26-249", [create_episode("ep1", 1), create_episode("ep2", 2)])
+
+        delta = store.record(program, at=datetime(2025, 11, 8, 7, 0))
+
+        assert [s.id for s in delta.added] == ["ep1", "ep2"]
+        assert set(store.state_at("26-249")) == {"ep1", "ep2"}
+
+    def test_unchanged_runs_write_nothing(self, store: HistoryStore, create_program, create_episode) -> None:
+        """Test that repeated identical observations do not grow the file."""
+        program = create_program("26-249", [create_episode("ep1", 1)])
+        store.record(program, at=datetime(2025, 11, 8, 7, 0))
+        size = store._history_file("26-249").stat().st_size
+
+        for minute in (15, 30, 45):
+            assert store.record(program, at=datetime(2025, 11, 8, 7, minute)) is None
+
+        assert store._history_file("26-249").stat().st_size == size
+
+    def test_replay_flips_and_removals(self, store: HistoryStore, create_program, create_episode) -> None:
+        """Test replaying the state at earlier points in time."""
+        premium = create_episode("ep7", 7, is_downloadable=False, is_premium_only=True)
+        store.record(create_program("p", [create_episode("ep1", 1), premium]), at=datetime(2025, 1, 1))
+
+        free = create_episode("ep7", 7, is_downloadable=True, is_premium_only=False)
+        delta = store.record(create_program("p", [free]), at=datetime(2025, 2, 1))
+
+        assert [s.id for s in delta.flipped] == ["ep7"]
+        assert delta.removed == ["ep1"]
+
+        january = store.state_at("p", datetime(2025, 1, 15))
+        assert set(january) == {"ep1", "ep7"}
+        assert january["ep7"].is_premium_only and not january["ep7"].is_downloadable
+
+        latest = store.state_at("p")
+        assert set(latest) == {"ep7"}
+        assert latest["ep7"].is_downloadable
+
+        assert store.state_at("p", datetime(2024, 12, 31)) == {}
+
+    def test_truncated_last_line_ignored(self, store: HistoryStore, create_program, create_episode) -> None:
+        """Test that an interrupted append does not break reading."""
+        store.record(create_program("p", [create_episode("ep1", 1)]), at=datetime(2025, 1, 1))
+        with open(store._history_file("p"), "a", encoding="utf-8") as f:
+            f.write('{"t":"2025-02-01T00:00:00","a":[["ep2"')
+
+        assert set(store.state_at("p")) == {"ep1"}
+
+    def test_records_after_torn_tail(self, store: HistoryStore, create_program, create_episode) -> None:
+        """Test that records appended after an interrupted append stay readable."""
+        store.record(create_program("p", [create_episode("ep1", 1)]), at=datetime(2025, 1, 1))
+        with open(store._history_file("p"), "a", encoding="utf-8") as f:
+            f.write('{"t":"2025-02-01T00:00:00","a":[["ep2"')
+
+        store.record(create_program("p", [create_episode("ep1", 1), create_episode("ep2", 2)]),
+                     at=datetime(2025, 2, 2))
+        store.record(create_program("p", [create_episode("ep2", 2)]), at=datetime(2025, 2, 3))
+
+        assert set(store.state_at("p", datetime(2025, 2, 2, 12))) == {"ep1", "ep2"}
+        assert set(store.state_at("p")) == {"ep2"}
+        assert len(list(store.deltas("p"))) == 3
+
+    def test_corrupted_record_raises(self, store: HistoryStore, create_program, create_episode) -> None:
+        """Test that corruption before the last line raises StorageError."""
+        store.record(create_program("p", [create_episode("ep1", 1)]), at=datetime(2025, 1, 1))
+        history_file = store._history_file("p")
+        history_file.write_text("garbage\n" + history_file.read_text(encoding="utf-8"), encoding="utf-8")
+
+        with pytest.raises(StorageError):
+            store.state_at("p")
+
+    def test_program_id_is_sanitized(self, store: HistoryStore) -> None:
+        """Test that program IDs cannot escape the history directory."""
+        assert store._history_file("../x/y").parent == store.history_dir
@@ -2,6 +2,7 @@
 
 from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -95,6 +96,25 @@ class TestMarkdownGenerator:
         assert "# Test Program" in content
         assert "Episode 1" in content
 
+    def test_save_program_md_skips_identical_content(
+        self,
+        generator: MarkdownGenerator,
+        sample_program: Program,
+        temp_output_dir: Path,
+    ) -> None:
+        """Test that an unchanged Markdown file is not rewritten."""
+        file_path = generator.save_program_md(sample_program, str(temp_output_dir))
+        mtime = file_path.stat().st_mtime_ns
+
+        with patch.object(Path, "write_text") as mock_write:
+            generator.save_program_md(sample_program, str(temp_output_dir))
+        mock_write.assert_not_called()
+        assert file_path.stat().st_mtime_ns == mtime
+
+        sample_program.title = "Changed"
+        generator.save_program_md(sample_program, str(temp_output_dir))
+        assert "# Changed" in file_path.read_text(encoding="utf-8")
+
     def test_generate_md_with_no_episodes(
         self, generator: MarkdownGenerator
     ) -> None:
@@ -136,3 +156,12 @@ class TestMarkdownGenerator:
         content = generator.generate_program_md(program)
         assert "# Test" in content
         assert "A" * 100 in content  # Should contain at least part of description
+
+    def test_save_programs_md_consumes_iterator(
+        self, generator: MarkdownGenerator, sample_program: Program, temp_output_dir: Path
+    ) -> None:
+        """Test saving markdown for a stream of programs."""
+        paths = generator.save_programs_md(iter([sample_program]), str(temp_output_dir))
+
+        assert paths == [temp_output_dir / "26-249" / "program.md"]
+        assert paths[0].exists()
@@ -0,0 +1,66 @@
+"""Unit tests for storage schema migrations."""
+import pytest
+
+from abm_check.domain.exceptions import StorageError
+from abm_check.infrastructure import migrations
+from abm_check.infrastructure.migrations import (
+    CURRENT_SCHEMA_VERSION,
+    MIGRATIONS,
+    check_schema_version,
+    migrate_program,
+)
+
+
+def test_every_version_has_a_step():
+    """Test that the registry covers every version below the current one."""
+    assert sorted(MIGRATIONS) == list(range(1, CURRENT_SCHEMA_VERSION))
+
+
+def test_v1_defaults_made_explicit():
+    """Test that v1 dicts get the values the reader used to assume."""
+    program = {
+        "id": "26-249",
+        "title": "Test",
+        "url": "https://abema.tv/video/title/26-249",
+        "fetchedAt": "2025-11-08T07:00:00",
+        "updatedAt": "2025-11-08T07:00:00",
+        "episodes": [{"id": "26-249_s1_p1", "number": 1, "title": "Ep 1"}],
+    }
+
+    migrated = migrate_program(program, 1)
+
+    assert migrated["platform"] == "abema"
+    assert migrated["totalEpisodes"] == 0
+    episode = migrated["episodes"][0]
+    assert episode["isPremiumOnly"] is True
+    assert episode["isDownloadable"] is False
+    assert episode["downloadUrl"] is None
+
+
+def test_existing_values_kept():
+    """Test that migration does not overwrite stored values."""
+    program = {"id": "a", "platform": "tver", "episodes": [{"id": "e", "isPremiumOnly": False}]}
+
+    migrated = migrate_program(program, 1)
+
+    assert migrated["platform"] == "tver"
+    assert migrated["episodes"][0]["isPremiumOnly"] is False
+
+
+def test_current_version_untouched():
+    """Test that current dicts pass through unchanged."""
+    program = {"id": "a"}
+    assert migrate_program(program, CURRENT_SCHEMA_VERSION) == {"id": "a"}
+
+
+@pytest.mark.parametrize("version", [CURRENT_SCHEMA_VERSION + 1, 0, "2", None, True])
+def test_unsupported_versions_rejected(version):
+    """Test that newer or malformed versions raise StorageError."""
+    with pytest.raises(StorageError):
+        check_schema_version(version)
+
+
+def test_duplicate_registration_rejected():
+    """Test that two steps cannot claim the same version."""
+    with pytest.raises(ValueError):
+        migrations.migration(1)(lambda program: program)
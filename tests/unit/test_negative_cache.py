@@ -0,0 +1,57 @@
+"""Tests for the negative cache."""
+import json
+import time
+from pathlib import Path
+
+import yt_dlp
+
+from abm_check.config import Config
+from abm_check.infrastructure.negative_cache import NegativeCache, is_not_found
+
+
+def make_cache(tmp_path: Path, ttl: int = 900) -> NegativeCache:
+    config = Config()
+    config.config['cache']['negative_ttl'] = ttl
+    return NegativeCache(str(tmp_path / "negative_cache.json"), config=config)
+
+
+def test_remembers_until_ttl(tmp_path: Path):
+    """Test that a missing resource is remembered across instances until it expires."""
+    cache = make_cache(tmp_path)
+    cache.add("abema:season:26-249:3")
+
+    assert "abema:season:26-249:3" in make_cache(tmp_path)
+    assert "abema:season:26-249:4" not in cache
+
+    expired = make_cache(tmp_path, ttl=-1)
+    expired.add("abema:program:gone")
+    assert "abema:program:gone" not in make_cache(tmp_path)
+
+
+def test_add_keeps_entries_of_other_instances(tmp_path: Path):
+    """Test that fetchers sharing the file do not overwrite each other's entries."""
+    first = make_cache(tmp_path)
+    second = make_cache(tmp_path)
+    assert "tver:program:sr1" not in second  # loads the (empty) file
+
+    first.add("tver:program:sr1")
+    second.add("niconico:video:so2")
+
+    data = json.loads((tmp_path / "negative_cache.json").read_text(encoding="utf-8"))
+    assert set(data) == {"tver:program:sr1", "niconico:video:so2"}
+
+
+def test_corrupted_file_counts_as_empty(tmp_path: Path):
+    """Test that an unreadable file is ignored."""
+    (tmp_path / "negative_cache.json").write_text("{not json", encoding="utf-8")
+
+    assert "abema:program:x" not in make_cache(tmp_path)
+
+
+def test_is_not_found():
+    """Test classifying not-found outcomes against other failures."""
+    assert is_not_found(yt_dlp.utils.DownloadError("ERROR: Unable to download JSON metadata: HTTP Error 404: Not Found"))
+    assert is_not_found(Exception("This video is not available in your country"))
+    assert not is_not_found(Exception("HTTP Error 503: Service Unavailable"))
+    assert not is_not_found(Exception("HTTP Error 403: Forbidden"))
+    assert not is_not_found(None)
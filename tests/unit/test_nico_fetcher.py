@@ -82,3 +82,23 @@ def test_fetch_program_info_no_videos(nico_fetcher):
         with patch.object(nico_fetcher, '_load_cache', return_value=None):
             with pytest.raises(FetchError):
                 nico_fetcher.fetch_program_info('testchannel')
+
+
+def test_probe_uses_conditional_request(nico_fetcher):
+    """Test that the probe token carries the ETag and a 304 keeps the known token."""
+    import feedparser
+
+    feed = feedparser.FeedParserDict(
+        bozo=False, status=200, etag='"v1"',
+        entries=[{'link': 'https://www.nicovideo.jp/watch/so2'}, {'link': 'https://www.nicovideo.jp/watch/so1'}],
+    )
+    with patch('feedparser.parse', return_value=feed) as mock_parse:
+        token = nico_fetcher.probe('testchannel')
+    mock_parse.assert_called_once_with('https://ch.nicovideo.jp/testchannel/video?rss=2.0')
+    assert 'so2' in token
+
+    not_modified = feedparser.FeedParserDict(bozo=False, status=304, entries=[])
+    with patch('feedparser.parse', return_value=not_modified) as mock_parse:
+        assert nico_fetcher.probe('testchannel', known_token=token) == token
+    assert mock_parse.call_args.kwargs == {'etag': '"v1"'}
+
@@ -0,0 +1,101 @@
+"""Tests for retry with backoff."""
+import socket
+import urllib.error
+import pytest
+from unittest.mock import MagicMock, patch
+from abm_check.infrastructure.retry import (
+    RetryPolicy,
+    call_with_retry,
+    get_retry_metrics,
+    is_transient,
+    reset_retry_metrics,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_retry_metrics()
+    yield
+    reset_retry_metrics()
+
+
+@pytest.fixture
+def no_sleep():
+    with patch('abm_check.infrastructure.retry.time.sleep') as mock_sleep:
+        yield mock_sleep
+
+
+@pytest.mark.parametrize("error, expected", [
+    (socket.timeout("timed out"), True),
+    (ConnectionResetError(), True),
+    (urllib.error.HTTPError("u", 503, "Service Unavailable", None, None), True),
+    (urllib.error.HTTPError("u", 429, "Too Many Requests", None, None), True),
+    (urllib.error.HTTPError("u", 404, "Not Found", None, None), False),
+    (urllib.error.URLError("Temporary failure in name resolution"), True),
+    (Exception("ERROR: [abematv] 26-249: HTTP Error 502: Bad Gateway"), True),
+    (Exception("ERROR: Unsupported URL"), False),
+    (Exception("HTTP Error 404: Not Found"), False),
+    (None, False),
+])
+def test_is_transient(error, expected):
+    """Test classification of transient and permanent errors."""
+    assert is_transient(error) is expected
+
+
+def test_is_transient_uses_wrapped_error():
+    """Test that the original exception kept by yt-dlp is classified."""
+    wrapped = Exception("ERROR: unable to download webpage")
+    wrapped.exc_info = (socket.timeout, socket.timeout("timed out"), None)
+
+    assert is_transient(wrapped)
+
+
+def test_delay_is_capped_with_jitter():
+    """Test that waits grow exponentially up to the cap."""
+    policy = RetryPolicy(max_attempts=10, base_delay=1.0, max_delay=5.0)
+
+    with patch('abm_check.infrastructure.retry.random.uniform', side_effect=lambda a, b: b):
+        assert [policy.delay(n) for n in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_recovers_after_transient_errors(no_sleep):
+    """Test that a call succeeding after retries is counted as recovered."""
+    func = MagicMock(side_effect=[TimeoutError(), TimeoutError(), "ok"])
+
+    result = call_with_retry(func, "url", policy=RetryPolicy(max_attempts=3), platform="abema", download=False)
+
+    assert result == "ok"
+    func.assert_called_with("url", download=False)
+    assert no_sleep.call_count == 2
+    metrics = get_retry_metrics()["abema"]
+    assert (metrics.calls, metrics.retries, metrics.recovered) == (1, 2, 1)
+
+
+def test_gives_up_after_max_attempts(no_sleep):
+    """Test that the last transient error is raised once attempts run out."""
+    func = MagicMock(side_effect=TimeoutError("slow"))
+
+    with pytest.raises(TimeoutError):
+        call_with_retry(func, policy=RetryPolicy(max_attempts=2), platform="tver")
+
+    assert func.call_count == 2
+    assert get_retry_metrics()["tver"].exhausted == 1
+
+
+def test_permanent_error_is_not_retried(no_sleep):
+    """Test that permanent errors fail immediately."""
+    func = MagicMock(side_effect=Exception("HTTP Error 403: Forbidden"))
+
+    with pytest.raises(Exception):
+        call_with_retry(func, policy=RetryPolicy(max_attempts=5), platform="abema")
+
+    func.assert_called_once()
+    no_sleep.assert_not_called()
+    assert get_retry_metrics()["abema"].permanent == 1
+
+
+def test_policy_from_settings():
+    """Test building a policy from config settings."""
+    policy = RetryPolicy.from_settings({"max_attempts": 0, "base_delay": 0.5})
+
+    assert policy == RetryPolicy(max_attempts=1, base_delay=0.5, max_delay=30.0)
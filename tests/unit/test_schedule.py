@@ -0,0 +1,218 @@
+"""Unit tests for the update scheduler."""
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from abm_check.config import Config
+from abm_check.infrastructure.schedule import ProgramStateStore, UpdateScheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path: Path) -> UpdateScheduler:
+    """Create UpdateScheduler with a temporary state file."""
+    config = Config()
+    return UpdateScheduler(ProgramStateStore(str(tmp_path / "state.json"), config=config), config=config)
+
+
+def weekly_program(create_program, create_episode, last: datetime, count: int = 4):
+    """Create a program with one episode per week ending at ``last``."""
+    episodes = []
+    for i in range(count):
+        episode = create_episode(f"ep{i}", i + 1)
+        episode.upload_date = (last - timedelta(weeks=count - 1 - i)).strftime("%Y%m%d")
+        episodes.append(episode)
+    return create_program("weekly", episodes)
+
+
+def test_predicts_weekly_cadence(scheduler, create_program, create_episode):
+    """Test that the median upload gap drives the interval."""
+    program = weekly_program(create_program, create_episode, datetime(2025, 6, 1))
+
+    assert scheduler.predict_interval(program) == timedelta(weeks=1)
+
+
+def test_next_check_at_expected_release(scheduler, create_program, create_episode):
+    """Test that a fresh release schedules the next check a week later."""
+    program = weekly_program(create_program, create_episode, datetime(2025, 6, 1))
+
+    next_check = scheduler.record(program, changed=False, now=datetime(2025, 6, 2, 12, 0))
+
+    assert next_check == datetime(2025, 6, 8)
+
+
+def test_overdue_release_polled_often(scheduler, create_program, create_episode):
+    """Test that an overdue release is polled at the overdue interval."""
+    program = weekly_program(create_program, create_episode, datetime(2025, 6, 1))
+    now = datetime(2025, 6, 8, 6, 0)
+
+    next_check = scheduler.record(program, changed=False, now=now)
+
+    assert next_check == now + timedelta(hours=3)
+
+
+def test_long_overdue_backs_off(scheduler, create_program, create_episode):
+    """Test that a release missing for a full interval stops fast polling."""
+    program = weekly_program(create_program, create_episode, datetime(2025, 6, 1))
+    now = datetime(2025, 6, 20)
+
+    assert scheduler.record(program, changed=False, now=now) == now + timedelta(weeks=1)
+
+
+def test_platform_default_with_single_release(scheduler, create_program, create_episode):
+    """Test the per-platform interval when there is no cadence to measure."""
+    program = weekly_program(create_program, create_episode, datetime(2025, 6, 1), count=1)
+    program.platform = "niconico"
+
+    assert scheduler.predict_interval(program) == timedelta(days=1)
+
+
+def test_observed_changes_used_without_upload_dates(scheduler, create_program, create_episode):
+    """Test that observed change times serve as release history."""
+    program = create_program("p", [create_episode("ep1", 1)])
+    program.episodes[0].upload_date = None
+    start = datetime(2025, 6, 1)
+    for day in (0, 2, 4):
+        scheduler.record(program, changed=True, now=start + timedelta(days=day))
+
+    assert scheduler.predict_interval(program, scheduler.state_store.get("p")) == timedelta(days=2)
+
+
+def test_due_orders_by_next_check_and_persists(scheduler, tmp_path, create_program, create_episode):
+    """Test the priority queue and state persistence."""
+    now = datetime(2025, 6, 10)
+    for program_id, offset in (("late", -1), ("later", -5), ("future", 5)):
+        state = scheduler.state_store.get(program_id)
+        state.next_check = now + timedelta(days=offset)
+    scheduler.save()
+
+    reloaded = UpdateScheduler(ProgramStateStore(str(tmp_path / "state.json")))
+    due = reloaded.due(["future", "late", "never", "later"], now=now)
+
+    assert due == ["never", "later", "late"]
+    assert reloaded.next_check_time(["future", "late"]) == now - timedelta(days=1)
+
+
+def test_corrupted_state_file_starts_empty(tmp_path: Path):
+    """Test that unreadable state makes every program due."""
+    state_file = tmp_path / "state.json"
+    state_file.write_text("{not json", encoding="utf-8")
+
+    scheduler = UpdateScheduler(ProgramStateStore(str(state_file)))
+
+    assert scheduler.due(["a"]) == ["a"]
+
+
+def test_prioritize_by_expected_value(scheduler, create_program, create_episode):
+    """Test ordering by overdue time, recent activity and premium episodes."""
+    now = datetime(2025, 6, 10)
+    store = scheduler.state_store
+
+    quiet = store.get("quiet")
+    quiet.last_checked = now - timedelta(hours=1)
+    quiet.next_check = now + timedelta(days=3)
+
+    overdue = store.get("overdue")
+    overdue.last_checked = now - timedelta(days=4)
+    overdue.next_check = now - timedelta(days=3)
+
+    active = store.get("active")
+    active.last_checked = now - timedelta(hours=1)
+    active.next_check = now + timedelta(days=3)
+    active.changes = [now - timedelta(days=1)]
+
+    premium = store.get("premium")
+    premium.last_checked = now - timedelta(hours=1)
+    premium.next_check = now + timedelta(days=3)
+    premium.premium_episodes = 5
+
+    order = scheduler.prioritize(["quiet", "premium", "active", "overdue", "new"], now=now)
+
+    assert order == ["new", "overdue", "active", "premium", "quiet"]
+
+
+def test_record_counts_premium_episodes(scheduler, create_program, create_episode):
+    """Test that premium-only episodes are tracked for prioritization."""
+    program = create_program("p", [
+        create_episode("ep1", 1),
+        create_episode("ep2", 2, is_downloadable=False, is_premium_only=True),
+    ])
+
+    scheduler.record(program, changed=False, now=datetime(2025, 6, 1))
+
+    assert scheduler.state_store.get("p").premium_episodes == 1
+
+
+def test_quiet_program_goes_dormant_with_backoff(scheduler, create_program, create_episode):
+    """Test that a finished program backs off exponentially and wakes up on a change."""
+    config = scheduler.config
+    program = weekly_program(create_program, create_episode, datetime(2025, 6, 1))
+    now = datetime(2025, 6, 29)  # Four weeks without the weekly release
+
+    for _ in range(config.schedule_dormant_after_runs - 1):
+        scheduler.record(program, changed=False, now=now)
+    assert scheduler.dormant(["weekly"]) == []
+
+    first = scheduler.record(program, changed=False, now=now)
+    second = scheduler.record(program, changed=False, now=now)
+
+    assert scheduler.dormant(["weekly"]) == ["weekly"]
+    assert first - now == timedelta(seconds=config.schedule_dormant_interval)
+    assert second - now == timedelta(seconds=config.schedule_dormant_interval * 2)
+    assert scheduler.resting(["weekly"], now=now) == ["weekly"]
+    assert scheduler.resting(["weekly"], now=second) == []
+
+    scheduler.record(program, changed=True, now=now)
+    assert scheduler.dormant(["weekly"]) == []
+
+
+def test_recently_released_program_stays_active(scheduler, create_program, create_episode):
+    """Test that quiet checks between weekly releases do not make an airing program dormant."""
+    config = scheduler.config
+    released = datetime(2025, 6, 1, 9, 0)
+    program = weekly_program(create_program, create_episode, released)
+    now = released
+
+    # A 15-minute cron checks it many times before the next episode is due
+    for _ in range(config.schedule_dormant_after_runs * 20):
+        now += timedelta(minutes=15)
+        scheduler.record(program, changed=False, now=now)
+
+    assert scheduler.dormant(["weekly"]) == []
+    assert scheduler.resting(["weekly"], now=now) == []
+
+
+def test_dormant_after_days_without_release(scheduler, create_program, create_episode):
+    """Test that a long silence makes a program dormant, unless premium episodes may still turn free."""
+    now = datetime(2025, 6, 1)
+    program = weekly_program(create_program, create_episode, now - timedelta(days=90))
+
+    scheduler.record(program, changed=False, now=now)
+    assert scheduler.dormant(["weekly"]) == ["weekly"]
+
+    premium = create_episode("ep9", 9, is_downloadable=False, is_premium_only=True)
+    premium.expiration_date = now + timedelta(days=30)
+    program.episodes.append(premium)
+
+    scheduler.record(program, changed=False, now=now)
+    assert scheduler.dormant(["weekly"]) == []
+
+    premium.expiration_date = now - timedelta(days=1)
+    scheduler.record(program, changed=False, now=now)
+    assert scheduler.dormant(["weekly"]) == ["weekly"]
+
+
+def test_dormant_state_persists(tmp_path: Path, create_program, create_episode):
+    """Test that dormancy survives a reload."""
+    state_file = str(tmp_path / "state.json")
+    scheduler = UpdateScheduler(ProgramStateStore(state_file))
+    now = datetime(2025, 6, 1)
+    program = weekly_program(create_program, create_episode, now - timedelta(days=90))
+    scheduler.record(program, changed=False, now=now)
+    scheduler.state_store.save()
+
+    reloaded = UpdateScheduler(ProgramStateStore(state_file))
+
+    assert reloaded.dormant(["weekly"]) == ["weekly"]
+    assert reloaded.state_store.get("weekly").unchanged_runs == 1
+
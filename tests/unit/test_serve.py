@@ -0,0 +1,114 @@
+"""Tests for the abm_check serve daemon and its client."""
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from abm_check.cli.serve import (
+    TOKEN_HEADER, create_server, discovery_path, forward, run_command, runs_locally
+)
+from abm_check.config import Config
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> Config:
+    """Create a Config with a temporary cache directory."""
+    config = Config()
+    config.config['cache']['cache_dir'] = str(tmp_path / "cache")
+    return config
+
+
+@pytest.fixture
+def server(config: Config):
+    """Run the server on a free port and announce it for the current directory."""
+    server = create_server('127.0.0.1', 0, 'secret')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    path = discovery_path(config)
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps({
+        'host': '127.0.0.1', 'port': server.server_address[1], 'token': 'secret',
+        'pid': os.getpid(), 'cwd': os.getcwd(),
+    }), encoding='utf-8')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_run_command_captures_output(tmp_path: Path):
+    """Test that a command runs in-process with its output and exit code captured."""
+    code, stdout, stderr = run_command(['--data-file', str(tmp_path / 'programs.yaml'), 'list'])
+
+    assert code == 0
+    assert stdout == ''
+    assert 'No programs found' in stderr
+
+    code, _, stderr = run_command(['no-such-command'])
+    assert code == 2
+    assert 'No such command' in stderr
+
+
+def test_forward_runs_command_on_server(server, config: Config, tmp_path: Path, capsys, monkeypatch):
+    """Test that the client forwards a command and replays its output and exit code."""
+    monkeypatch.delenv('ABM_CHECK_NO_DAEMON', raising=False)
+
+    code = forward(['--data-file', str(tmp_path / 'programs.yaml'), 'view', 'missing'], config=config)
+
+    assert code == 1
+    assert 'missing' in capsys.readouterr().err
+    # Not forwarded: the server itself and commands reading standard input
+    assert forward(['serve'], config=config) is None
+    assert forward(['import', '-'], config=config) is None
+
+
+@pytest.mark.parametrize('args', [
+    ['import'],
+    ['import', 'programs.jsonl'],
+    ['--data-file', 'db.yaml', 'export'],
+    ['export', '-o', 'out.jsonl'],
+    ['update', '--stream', 'jsonl'],
+    ['-v', 'update', '--stream=jsonl', '--stream-to', 'feed.jsonl'],
+    ['update', '--stream', 'jsonl', '--stream-to', '-'],
+])
+def test_stdio_commands_run_locally(server, config: Config, args, monkeypatch):
+    """Test that commands using the client's stdin/stdout are never forwarded."""
+    monkeypatch.delenv('ABM_CHECK_NO_DAEMON', raising=False)
+
+    assert runs_locally(args)
+    assert forward(args, config=config) is None
+
+
+def test_other_commands_are_forwardable():
+    """Test that ordinary commands, including ones named like local ones, may be forwarded."""
+    assert not runs_locally(['update'])
+    assert not runs_locally(['--data-file', 'export', 'list'])
+    assert not runs_locally(['view', 'import'])
+
+
+def test_forward_falls_back_without_server(config: Config, monkeypatch):
+    """Test that commands run locally without a reachable server for this directory."""
+    monkeypatch.delenv('ABM_CHECK_NO_DAEMON', raising=False)
+    assert forward(['list'], config=config) is None
+
+    path = discovery_path(config)
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps({'host': '127.0.0.1', 'port': 9, 'token': 't', 'pid': 1, 'cwd': os.getcwd()}),
+                    encoding='utf-8')
+    assert forward(['list'], config=config) is None
+
+
+def test_server_requires_token(server):
+    """Test that requests without the announced token are refused."""
+    url = f"http://127.0.0.1:{server.server_address[1]}/health"
+
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        urllib.request.urlopen(url)
+    assert exc_info.value.code == 403
+
+    request = urllib.request.Request(url, headers={TOKEN_HEADER: 'secret'})
+    with urllib.request.urlopen(request) as response:
+        assert json.loads(response.read()) == {'pid': os.getpid()}
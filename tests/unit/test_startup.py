@@ -0,0 +1,35 @@
+"""Import-time regression tests for the CLI."""
+import json
+import subprocess
+import sys
+
+# Generous wall-clock budget for importing the CLI in a fresh interpreter;
+# loading yt-dlp alone used to take about half of it
+IMPORT_BUDGET = 1.0  # seconds
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import abm_check.cli.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(m for m in ("yt_dlp", "feedparser") if m in sys.modules)}))
+"""
+
+
+def test_cli_import_skips_network_libraries():
+    """Test that importing the CLI does not load yt-dlp or feedparser and stays within budget."""
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output)
+
+    assert result["modules"] == []
+    assert result["elapsed"] < IMPORT_BUDGET
+
+
+def test_fetcher_module_still_exposes_yt_dlp():
+    """Test that the lazily imported yt_dlp stays reachable as a module attribute."""
+    import yt_dlp
+    from abm_check.infrastructure import fetcher
+
+    assert fetcher.yt_dlp is yt_dlp
@@ -1,9 +1,13 @@
 """Unit tests for storage."""
 
+import io
+import json
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from unittest.mock import patch
+
 import pytest
 import yaml
 
@@ -83,6 +87,53 @@ class TestProgramStorage:
         assert len(programs) == 1
         assert programs[0].title == "Updated Title"
 
+    def test_save_program_unchanged_skips_write(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that saving identical content, or only new timestamps, writes nothing."""
+        assert storage.save_program(sample_program) is True
+        signature = storage._file_signature(storage.data_file)
+
+        sample_program.updated_at = datetime(2025, 11, 9, 7, 0, 0)
+        sample_program.fetched_at = datetime(2025, 11, 9, 7, 0, 0)
+        with patch.object(storage, "_write_snapshot") as mock_write:
+            assert storage.save_program(sample_program) is False
+        mock_write.assert_not_called()
+        assert storage._file_signature(storage.data_file) == signature
+
+        sample_program.episodes[0].title = "Renamed"
+        assert storage.save_program(sample_program) is True
+
+    def test_fingerprint_ignores_timestamps(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test the content fingerprint."""
+        before = storage.fingerprint(sample_program)
+        sample_program.updated_at = datetime(2030, 1, 1)
+        assert storage.fingerprint(sample_program) == before
+        sample_program.title = "Other"
+        assert storage.fingerprint(sample_program) != before
+
+    def test_unchanged_detected_without_index(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that unchanged saves are detected when the index is missing."""
+        storage.save_program(sample_program)
+        storage.index_file.unlink()
+
+        assert storage.save_program(sample_program) is False
+
+    def test_unchanged_skips_journal_append(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that journal mode does not append records for unchanged programs."""
+        storage.journal_enabled = True
+        storage.save_program(sample_program)
+        journal = storage.journal_file.read_text(encoding="utf-8")
+
+        assert storage.save_program(sample_program) is False
+        assert storage.journal_file.read_text(encoding="utf-8") == journal
+
     def test_load_programs_empty(self, storage: ProgramStorage) -> None:
         """Test loading programs from empty storage."""
         programs = storage.load_programs()
@@ -176,6 +227,25 @@ class TestProgramStorage:
         assert programs[0].episodes[0].id == "26-249_s1_p1"
         assert programs[0].episodes[0].title == "Episode 1"
 
+    def test_storage_preserves_source_fingerprint(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that the source fingerprint round-trips and is omitted when unset."""
+        storage.save_program(sample_program)
+        assert storage.find_program("26-249").source_fingerprint is None
+
+        sample_program.source_fingerprint = "abc123"
+        storage.save_program(sample_program)
+        assert storage.find_program("26-249").source_fingerprint == "abc123"
+
+    def test_storage_preserves_probe_token(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that the probe token round-trips."""
+        sample_program.probe_token = "tok1"
+        storage.save_program(sample_program)
+        assert storage.find_program("26-249").probe_token == "tok1"
+
     def test_get_all_program_ids(
         self, storage: ProgramStorage, sample_program: Program
     ) -> None:
@@ -238,3 +308,771 @@ class TestProgramStorage:
         programs = storage.load_programs()
         assert programs == []
 
+    def test_load_program_summaries(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test loading program headers."""
+        storage.save_program(sample_program)
+
+        summaries = storage.load_program_summaries()
+        assert len(summaries) == 1
+        assert summaries[0].id == "26-249"
+        assert summaries[0].title == "Test Program"
+        assert summaries[0].platform == "abema"
+        assert summaries[0].updated_at == datetime(2025, 11, 8, 7, 16, 58)
+
+    def test_load_program_summaries_uses_index(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that summaries come from the sidecar index without parsing episodes."""
+        storage.save_program(sample_program)
+        assert storage.index_file.exists()
+
+        with patch.object(storage, "_load_program_dicts") as mock_load:
+            summaries = storage.load_program_summaries()
+
+        mock_load.assert_not_called()
+        assert [s.id for s in summaries] == ["26-249"]
+
+    def test_load_program_summaries_rebuilds_stale_index(
+        self, storage: ProgramStorage, sample_program: Program, temp_storage_path: Path
+    ) -> None:
+        """Test that an externally edited data file invalidates the index."""
+        storage.save_program(sample_program)
+
+        data = yaml.safe_load(temp_storage_path.read_text(encoding="utf-8"))
+        data["programs"][0]["title"] = "Edited by hand"
+        temp_storage_path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+
+        summaries = storage.load_program_summaries()
+        assert summaries[0].title == "Edited by hand"
+
+    def test_index_not_vouching_for_write_during_read(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that a reader rebuilding the index does not stamp a concurrent write as indexed."""
+        from dataclasses import replace
+        storage.save_program(sample_program)
+        storage.index_file.unlink()
+        renamed = replace(sample_program, title="Written meanwhile")
+        load = storage._load_program_dicts
+
+        def load_then_concurrent_write():
+            program_dicts = load()
+            ProgramStorage(str(storage.data_file)).save_program(renamed)
+            return program_dicts
+
+        with patch.object(storage, "_load_program_dicts", side_effect=load_then_concurrent_write):
+            assert storage.load_program_summaries()[0].title == "Test Program"
+
+        assert storage.save_program(sample_program) is True
+        assert storage.find_program("26-249").title == "Test Program"
+
+    def test_concurrent_writers_do_not_lose_updates(self, temp_storage_path: Path) -> None:
+        """Test that saves from independent storage instances are serialized."""
+        import threading
+
+        def save(index: int) -> None:
+            writer = ProgramStorage(str(temp_storage_path))
+            writer.save_program(Program(
+                id=f"prog-{index}",
+                title=f"Program {index}",
+                url=f"https://abema.tv/video/title/prog-{index}",
+                description="",
+                thumbnail_url="",
+                total_episodes=0,
+                latest_episode_number=0,
+                fetched_at=datetime(2025, 11, 8, 7, 0, 0),
+                updated_at=datetime(2025, 11, 8, 7, 0, 0),
+                episodes=[],
+            ))
+
+        threads = [threading.Thread(target=save, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        ids = ProgramStorage(str(temp_storage_path)).get_all_program_ids()
+        assert sorted(ids) == sorted(f"prog-{i}" for i in range(8))
+
+    def test_failed_write_keeps_previous_snapshot(
+        self, storage: ProgramStorage, sample_program: Program, temp_storage_path: Path
+    ) -> None:
+        """Test that a crash while writing does not truncate the database."""
+        storage.save_program(sample_program)
+        before = temp_storage_path.read_text(encoding="utf-8")
+
+        sample_program.title = "Never written"
+        with patch("abm_check.utils.fileio.os.replace", side_effect=OSError("crash")):
+            with pytest.raises(StorageError):
+                storage.save_program(sample_program)
+
+        assert temp_storage_path.read_text(encoding="utf-8") == before
+        assert storage.load_programs()[0].title == "Test Program"
+
+    def test_readers_do_not_block_on_lock(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that loads succeed while another writer holds the lock."""
+        storage.save_program(sample_program)
+
+        writer = ProgramStorage(str(storage.data_file))
+        with writer.lock():
+            assert [p.id for p in storage.load_programs()] == ["26-249"]
+            assert [s.id for s in storage.load_program_summaries()] == ["26-249"]
+
+
+class TestJournaledStorage:
+    """Test ProgramStorage in journal mode."""
+
+    @pytest.fixture
+    def temp_storage_path(self, tmp_path: Path) -> Path:
+        """Create temporary storage path."""
+        return tmp_path / "programs.yaml"
+
+    @pytest.fixture
+    def storage(self, temp_storage_path: Path) -> ProgramStorage:
+        """Create ProgramStorage instance with the journal enabled."""
+        from abm_check.config import Config
+        config = Config()
+        config.config['storage']['journal'] = True
+        return ProgramStorage(str(temp_storage_path), config=config)
+
+    def _make_program(self, program_id: str, title: str) -> Program:
+        return Program(
+            id=program_id,
+            title=title,
+            url=f"https://abema.tv/video/title/{program_id}",
+            description="",
+            thumbnail_url="",
+            total_episodes=0,
+            latest_episode_number=0,
+            fetched_at=datetime(2025, 11, 8, 7, 0, 0),
+            updated_at=datetime(2025, 11, 8, 7, 0, 0),
+            episodes=[],
+        )
+
+    def test_save_appends_to_journal(
+        self, storage: ProgramStorage, temp_storage_path: Path
+    ) -> None:
+        """Test that saves append records instead of rewriting the snapshot."""
+        storage.save_program(self._make_program("26-249", "First"))
+        storage.save_program(self._make_program("189-85", "Second"))
+
+        assert not temp_storage_path.exists()
+        lines = storage.journal_file.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2
+        assert '"op":"save"' in lines[0]
+
+        programs = storage.load_programs()
+        assert [p.id for p in programs] == ["26-249", "189-85"]
+
+    def test_replay_preserves_order_semantics(self, storage: ProgramStorage) -> None:
+        """Test that replay matches in-place update and re-append on re-add."""
+        storage.save_program(self._make_program("a", "A"))
+        storage.save_program(self._make_program("b", "B"))
+        storage.save_program(self._make_program("c", "C"))
+        storage.save_program(self._make_program("b", "B2"))
+        storage.delete_program("a")
+        storage.save_program(self._make_program("a", "A2"))
+
+        programs = storage.load_programs()
+        assert [(p.id, p.title) for p in programs] == [("b", "B2"), ("c", "C"), ("a", "A2")]
+
+    def test_delete_not_exists(self, storage: ProgramStorage) -> None:
+        """Test deleting a non-existent program in journal mode."""
+        with pytest.raises(ProgramNotFoundError):
+            storage.delete_program("999-999")
+        assert not storage.journal_file.exists()
+
+    def test_compact_folds_journal(
+        self, storage: ProgramStorage, temp_storage_path: Path
+    ) -> None:
+        """Test that compaction writes the snapshot and removes the journal."""
+        storage.save_program(self._make_program("26-249", "First"))
+        storage.save_program(self._make_program("26-249", "Renamed"))
+
+        assert storage.compact() == 2
+        assert not storage.journal_file.exists()
+
+        data = yaml.safe_load(temp_storage_path.read_text(encoding="utf-8"))
+        assert [p["title"] for p in data["programs"]] == ["Renamed"]
+        assert storage.compact() == 0
+
+    def test_truncated_last_record_ignored(self, storage: ProgramStorage) -> None:
+        """Test that a partially written final record is ignored."""
+        storage.save_program(self._make_program("26-249", "First"))
+        with open(storage.journal_file, "a", encoding="utf-8") as f:
+            f.write('{"op":"save","program":{"id":"x')
+
+        programs = storage.load_programs()
+        assert [p.id for p in programs] == ["26-249"]
+
+    def test_torn_tail_does_not_swallow_later_saves(self, storage: ProgramStorage) -> None:
+        """Test that saves after a torn append are kept and stay readable."""
+        storage.save_program(self._make_program("a", "A"))
+        with open(storage.journal_file, "a", encoding="utf-8") as f:
+            f.write('{"op":"save","prog')
+
+        storage.save_program(self._make_program("b", "B"))
+        assert [p.id for p in storage.load_programs()] == ["a", "b"]
+
+        storage.save_program(self._make_program("c", "C"))
+        assert [p.id for p in storage.load_programs()] == ["a", "b", "c"]
+        assert storage.compact() == 3
+
+    def test_corrupted_record_raises(self, storage: ProgramStorage) -> None:
+        """Test that corruption before the final record is reported."""
+        storage.journal_file.write_text('not json\n{"op":"delete","id":"a"}\n', encoding="utf-8")
+
+        with pytest.raises(StorageError):
+            storage.load_programs()
+
+    def test_non_journal_write_folds_leftover_journal(
+        self, storage: ProgramStorage, temp_storage_path: Path
+    ) -> None:
+        """Test that a full rewrite includes and clears a leftover journal."""
+        storage.save_program(self._make_program("26-249", "First"))
+
+        storage.journal_enabled = False
+        storage.save_program(self._make_program("189-85", "Second"))
+
+        assert not storage.journal_file.exists()
+        assert [p.id for p in storage.load_programs()] == ["26-249", "189-85"]
+
+    def test_journal_keeps_summary_index_fresh(self, storage: ProgramStorage) -> None:
+        """Test that journal appends update the summary index in place."""
+        storage.save_program(self._make_program("a", "A"))
+        storage.load_program_summaries()
+        storage.save_program(self._make_program("b", "B"))
+        storage.delete_program("a")
+
+        with patch.object(storage, "_load_program_dicts") as mock_load:
+            summaries = storage.load_program_summaries()
+
+        mock_load.assert_not_called()
+        assert [s.id for s in summaries] == ["b"]
+
+
+class TestFormatLadders:
+    """Test compact format ladder representation."""
+
+    @pytest.fixture
+    def storage(self, tmp_path: Path) -> ProgramStorage:
+        """Create ProgramStorage instance."""
+        return ProgramStorage(str(tmp_path / "programs.yaml"))
+
+    def _ladder(self, episode_id: str) -> list:
+        from abm_check.domain.models import VideoFormat
+        return [
+            VideoFormat(
+                format_id=f"{height}p",
+                resolution=f"{height * 16 // 9}x{height}",
+                tbr=float(height),
+                url=f"https://vod.example.com/program/{episode_id}/{height}/playlist.m3u8",
+            )
+            for height in (180, 360, 480, 720, 1080)
+        ]
+
+    def _program(self, episodes: list) -> Program:
+        return Program(
+            id="26-249",
+            title="Ladder Program",
+            url="https://abema.tv/video/title/26-249",
+            description="",
+            thumbnail_url="",
+            total_episodes=len(episodes),
+            latest_episode_number=len(episodes),
+            fetched_at=datetime(2025, 11, 8, 7, 0, 0),
+            updated_at=datetime(2025, 11, 8, 7, 0, 0),
+            episodes=episodes,
+        )
+
+    def _episode(self, episode_id: str, number: int, formats: list) -> Episode:
+        return Episode(
+            id=episode_id,
+            number=number,
+            title=f"Episode {number}",
+            description="",
+            duration=1440,
+            thumbnail_url="",
+            is_downloadable=True,
+            is_premium_only=False,
+            download_url=None,
+            formats=formats,
+            upload_date="20250101",
+        )
+
+    def test_ladder_shared_across_episodes(self, storage: ProgramStorage) -> None:
+        """Test that identical ladders are stored once per program."""
+        episodes = [
+            self._episode(f"26-249_s1_p{n}", n, self._ladder(f"26-249_s1_p{n}"))
+            for n in range(1, 4)
+        ]
+
+        data = storage._program_to_dict(self._program(episodes))
+
+        assert len(data["formatLadders"]) == 1
+        assert "{episodeId}" in data["formatLadders"][0][0]["url"]
+        assert [ep["formatLadder"] for ep in data["episodes"]] == [0, 0, 0]
+        assert all("formats" not in ep for ep in data["episodes"])
+
+    def test_round_trip_is_exact(self, storage: ProgramStorage) -> None:
+        """Test that programs round-trip through the compact layout unchanged."""
+        from abm_check.domain.models import VideoFormat
+        odd = [VideoFormat("hls", "1280x720", 1500.0, "https://cdn.example.com/static.m3u8")]
+        program = self._program([
+            self._episode("ep1", 1, self._ladder("ep1")),
+            self._episode("ep2", 2, odd),
+            self._episode("ep3", 3, []),
+        ])
+
+        storage.save_program(program)
+        loaded = storage.find_program("26-249")
+
+        assert loaded == program
+        assert loaded.episodes[0].formats[4].url == (
+            "https://vod.example.com/program/ep1/1080/playlist.m3u8"
+        )
+
+    def test_formats_expand_lazily(self, storage: ProgramStorage) -> None:
+        """Test that VideoFormat objects are only built on access."""
+        from abm_check.infrastructure.storage import LadderFormats
+        storage.save_program(self._program([self._episode("ep1", 1, self._ladder("ep1"))]))
+
+        formats = storage.find_program("26-249").episodes[0].formats
+
+        assert isinstance(formats, LadderFormats)
+        assert len(formats) == 5
+        assert formats.unexpanded_ladder("ep1") is not None
+        assert formats[0].format_id == "180p"
+        assert formats.unexpanded_ladder("ep1") is None
+
+    def test_formats_copy_and_pickle(self, storage: ProgramStorage) -> None:
+        """Test that loaded format lists can be copied and pickled, expanded or not."""
+        import copy
+        import pickle
+        storage.save_program(self._program([self._episode("ep1", 1, self._ladder("ep1"))]))
+        formats = storage.find_program("26-249").episodes[0].formats
+
+        for clone in (copy.copy(formats), copy.deepcopy(formats), pickle.loads(pickle.dumps(formats))):
+            assert clone.unexpanded_ladder("ep1") is not None
+            assert clone == self._ladder("ep1")
+
+        formats[0]  # Expand
+        shallow = copy.copy(formats)
+        shallow.pop()
+        assert len(formats) == 5
+        assert pickle.loads(pickle.dumps(formats)) == self._ladder("ep1")
+
+    def test_resave_without_expansion(self, storage: ProgramStorage) -> None:
+        """Test that re-saving loaded programs keeps ladders without expanding them."""
+        storage.save_program(self._program([self._episode("ep1", 1, self._ladder("ep1"))]))
+        loaded = storage.find_program("26-249")
+
+        storage.save_program(loaded)
+
+        assert loaded.episodes[0].formats.unexpanded_ladder("ep1") is not None
+        assert storage.find_program("26-249").episodes[0].formats == self._ladder("ep1")
+
+    def test_placeholder_in_url_stored_inline(self, storage: ProgramStorage) -> None:
+        """Test that URLs which cannot be templated exactly stay inline."""
+        from abm_check.domain.models import VideoFormat
+        fmt = VideoFormat("x", "", 0.0, "https://example.com/{episodeId}/ep1")
+        data = storage._program_to_dict(self._program([self._episode("ep1", 1, [fmt])]))
+
+        assert "formatLadders" not in data
+        assert data["episodes"][0]["formats"][0]["url"] == "https://example.com/{episodeId}/ep1"
+
+    def test_compact_formats_disabled(self, tmp_path: Path) -> None:
+        """Test the inline layout when compact formats are disabled."""
+        from abm_check.config import Config
+        config = Config()
+        config.config['storage']['compact_formats'] = False
+        storage = ProgramStorage(str(tmp_path / "programs.yaml"), config=config)
+
+        data = storage._program_to_dict(self._program([self._episode("ep1", 1, self._ladder("ep1"))]))
+
+        assert "formatLadders" not in data
+        assert len(data["episodes"][0]["formats"]) == 5
+
+    def test_reads_legacy_inline_formats(self, storage: ProgramStorage, tmp_path: Path) -> None:
+        """Test that databases with inline formats still load."""
+        legacy = self._program([self._episode("ep1", 1, self._ladder("ep1"))])
+        storage.compact_formats = False
+        storage.save_program(legacy)
+
+        storage.compact_formats = True
+        assert storage.find_program("26-249") == legacy
+
+
+class TestBinarySnapshot:
+    """Test the binary snapshot sidecar."""
+
+    @pytest.fixture
+    def storage(self, tmp_path: Path) -> ProgramStorage:
+        """Create ProgramStorage instance."""
+        return ProgramStorage(str(tmp_path / "programs.yaml"))
+
+    @pytest.fixture
+    def sample_program(self) -> Program:
+        """Create sample program."""
+        return Program(
+            id="26-249",
+            title="Snapshot Program",
+            url="https://abema.tv/video/title/26-249",
+            description="",
+            thumbnail_url="",
+            total_episodes=0,
+            latest_episode_number=0,
+            fetched_at=datetime(2025, 11, 8, 7, 0, 0),
+            updated_at=datetime(2025, 11, 8, 7, 0, 0),
+            episodes=[],
+        )
+
+    def test_save_writes_sidecar(self, storage: ProgramStorage, sample_program: Program) -> None:
+        """Test that saving keeps a fresh binary snapshot."""
+        storage.save_program(sample_program)
+
+        assert storage.binary_snapshot_file.exists()
+        with patch("abm_check.infrastructure.storage.yaml.safe_load") as mock_load:
+            programs = storage.load_programs()
+
+        mock_load.assert_not_called()
+        assert programs == [sample_program]
+
+    def test_stale_sidecar_falls_back_to_yaml(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that hand edits to the YAML file win over the sidecar."""
+        storage.save_program(sample_program)
+        text = storage.data_file.read_text(encoding="utf-8")
+        storage.data_file.write_text(
+            text.replace("Snapshot Program", "Edited Program"), encoding="utf-8"
+        )
+
+        assert storage.load_programs()[0].title == "Edited Program"
+        # The sidecar is refreshed for the next load
+        with patch("abm_check.infrastructure.storage.yaml.safe_load") as mock_load:
+            assert storage.load_programs()[0].title == "Edited Program"
+        mock_load.assert_not_called()
+
+    def test_corrupted_sidecar_falls_back_to_yaml(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that an unreadable sidecar is ignored."""
+        storage.save_program(sample_program)
+        storage.binary_snapshot_file.write_bytes(b"garbage")
+
+        assert storage.load_programs() == [sample_program]
+
+    def test_other_version_falls_back_to_yaml(
+        self, storage: ProgramStorage, sample_program: Program
+    ) -> None:
+        """Test that sidecars from another format version are ignored."""
+        storage.save_program(sample_program)
+
+        with patch("abm_check.infrastructure.storage.BINARY_SNAPSHOT_VERSION", 999):
+            with patch("abm_check.infrastructure.storage.yaml.safe_load",
+                       wraps=yaml.safe_load) as mock_load:
+                assert storage.load_programs() == [sample_program]
+        mock_load.assert_called_once()
+
+    def test_disabled(self, tmp_path: Path, sample_program: Program) -> None:
+        """Test that no sidecar is written when disabled."""
+        from abm_check.config import Config
+        config = Config()
+        config.config['storage']['binary_snapshot'] = False
+        storage = ProgramStorage(str(tmp_path / "programs.yaml"), config=config)
+
+        storage.save_program(sample_program)
+
+        assert not storage.binary_snapshot_file.exists()
+        assert storage.load_programs() == [sample_program]
+
+
+class TestIterPrograms:
+    """Test streaming program iteration."""
+
+    @pytest.fixture
+    def storage(self, tmp_path: Path) -> ProgramStorage:
+        """Create ProgramStorage instance."""
+        return ProgramStorage(str(tmp_path / "programs.yaml"))
+
+    def _make_program(self, program_id: str, title: str = "") -> Program:
+        return Program(
+            id=program_id,
+            title=title or f"Program {program_id}",
+            url=f"https://abema.tv/video/title/{program_id}",
+            description="",
+            thumbnail_url="",
+            total_episodes=0,
+            latest_episode_number=0,
+            fetched_at=datetime(2025, 11, 8, 7, 0, 0),
+            updated_at=datetime(2025, 11, 8, 7, 0, 0),
+            episodes=[],
+        )
+
+    def test_matches_load_programs(self, storage: ProgramStorage) -> None:
+        """Test that streaming yields the same programs as a full load."""
+        for program_id in ("a", "b", "c"):
+            storage.save_program(self._make_program(program_id))
+
+        assert list(storage.iter_programs()) == storage.load_programs()
+
+    def test_matches_load_programs_with_journal(self, storage: ProgramStorage) -> None:
+        """Test that the streaming journal merge matches sequential replay."""
+        for program_id in ("a", "b", "c", "d"):
+            storage.save_program(self._make_program(program_id))
+
+        storage.journal_enabled = True
+        storage.save_program(self._make_program("b", "B2"))
+        storage.delete_program("a")
+        storage.save_program(self._make_program("e"))
+        storage.save_program(self._make_program("a", "A2"))
+        storage.delete_program("c")
+        storage.save_program(self._make_program("e", "E2"))
+
+        streamed = [(p.id, p.title) for p in storage.iter_programs()]
+        assert streamed == [(p.id, p.title) for p in storage.load_programs()]
+        assert streamed == [("b", "B2"), ("d", "Program d"), ("e", "E2"), ("a", "A2")]
+
+    def test_filter_by_ids(self, storage: ProgramStorage) -> None:
+        """Test yielding only selected programs."""
+        for program_id in ("a", "b", "c"):
+            storage.save_program(self._make_program(program_id))
+
+        assert [p.id for p in storage.iter_programs(["c", "a"])] == ["a", "c"]
+
+    def test_streams_yaml_incrementally(self, storage: ProgramStorage) -> None:
+        """Test that YAML is parsed incrementally when the sidecar is unusable."""
+        for program_id in ("a", "b"):
+            storage.save_program(self._make_program(program_id))
+        storage.binary_snapshot_file.unlink()
+
+        with patch("abm_check.infrastructure.storage.yaml.safe_load") as mock_load:
+            programs = list(storage.iter_programs())
+
+        mock_load.assert_not_called()
+        assert [p.id for p in programs] == ["a", "b"]
+        # The sidecar was rebuilt from the stream
+        assert storage._read_binary_snapshot() is not None
+
+    def test_streams_without_sidecar(self, tmp_path: Path) -> None:
+        """Test streaming when the binary sidecar is disabled."""
+        from abm_check.config import Config
+        config = Config()
+        config.config['storage']['binary_snapshot'] = False
+        storage = ProgramStorage(str(tmp_path / "programs.yaml"), config=config)
+        for program_id in ("a", "b"):
+            storage.save_program(self._make_program(program_id))
+
+        assert [p.id for p in storage.iter_programs()] == ["a", "b"]
+        assert not storage.binary_snapshot_file.exists()
+
+    def test_save_while_iterating(self, storage: ProgramStorage) -> None:
+        """Test that saving during iteration neither breaks it nor loses writes."""
+        for program_id in ("a", "b", "c"):
+            storage.save_program(self._make_program(program_id))
+
+        seen = []
+        for program in storage.iter_programs():
+            seen.append(program.id)
+            program.title = "Updated"
+            storage.save_program(program)
+
+        assert seen == ["a", "b", "c"]
+        assert [p.title for p in storage.load_programs()] == ["Updated"] * 3
+
+    def test_empty_and_missing(self, storage: ProgramStorage) -> None:
+        """Test iterating missing and empty databases."""
+        assert list(storage.iter_programs()) == []
+        storage.data_file.write_text("", encoding="utf-8")
+        assert list(storage.iter_programs()) == []
+
+
+class TestJsonLines:
+    """Test JSON Lines export and import."""
+
+    @pytest.fixture
+    def storage(self, tmp_path: Path) -> ProgramStorage:
+        """Create ProgramStorage instance."""
+        return ProgramStorage(str(tmp_path / "programs.yaml"))
+
+    def test_round_trip(self, storage: ProgramStorage, tmp_path: Path,
+                        create_program, create_episode) -> None:
+        """Test that export followed by import reproduces the database."""
+        storage.save_program(create_program("a", [create_episode("a_1", 1), create_episode("a_2", 2)]))
+        storage.save_program(create_program("b", [create_episode("b_1", 1, is_downloadable=False)]))
+
+        out = io.StringIO()
+        assert storage.export_jsonl(out) == 2
+        lines = out.getvalue().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == ["a", "b"]
+        # Formats are inlined so each line stands alone
+        assert "formatLadders" not in json.loads(lines[0])
+        assert json.loads(lines[0])["episodes"][0]["formats"][0]["formatId"] == "184"
+
+        target = ProgramStorage(str(tmp_path / "copy.yaml"))
+        assert target.import_jsonl(io.StringIO(out.getvalue())) == 2
+        assert target.load_programs() == storage.load_programs()
+        assert [s.id for s in target.load_program_summaries()] == ["a", "b"]
+
+    def test_per_episode_round_trip(self, storage: ProgramStorage, tmp_path: Path,
+                                    create_program, create_episode) -> None:
+        """Test episode-per-line export and import."""
+        storage.save_program(create_program("a", [create_episode("a_1", 1), create_episode("a_2", 2)]))
+        storage.save_program(create_program("b", []))
+
+        out = io.StringIO()
+        storage.export_jsonl(out, per_episode=True)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [r.get("programId", r.get("id")) for r in records] == ["a", "a", "a", "b"]
+        assert "episodes" not in records[0]
+
+        target = ProgramStorage(str(tmp_path / "copy.yaml"))
+        target.import_jsonl(io.StringIO(out.getvalue()))
+        assert target.load_programs() == storage.load_programs()
+
+    def test_import_merges_in_place(self, storage: ProgramStorage,
+                                    create_program, create_episode) -> None:
+        """Test that imported programs replace existing ones in place and new ones are appended."""
+        for program_id in ("a", "b", "c"):
+            storage.save_program(create_program(program_id, []))
+
+        source = io.StringIO()
+        other = ProgramStorage(str(storage.data_file.parent / "other.yaml"))
+        other.save_program(create_program("d", []))
+        other.save_program(create_program("b", [create_episode("b_1", 1)], title="B2"))
+        other.export_jsonl(source)
+
+        storage.import_jsonl(io.StringIO(source.getvalue()))
+
+        programs = storage.load_programs()
+        assert [(p.id, p.title) for p in programs] == [
+            ("a", "Program a"), ("b", "B2"), ("c", "Program c"), ("d", "Program d")
+        ]
+
+    def test_import_replace(self, storage: ProgramStorage, create_program) -> None:
+        """Test that replace drops programs missing from the input."""
+        for program_id in ("a", "b"):
+            storage.save_program(create_program(program_id, []))
+
+        source = io.StringIO()
+        storage.export_jsonl(source)
+        storage.delete_program("a")
+        storage.save_program(create_program("c", []))
+
+        storage.import_jsonl(io.StringIO(source.getvalue()), replace=True)
+
+        assert storage.get_all_program_ids() == ["a", "b"]
+
+    def test_import_invalid_input(self, storage: ProgramStorage, create_program) -> None:
+        """Test that invalid input leaves the database untouched."""
+        storage.save_program(create_program("a", []))
+        before = storage.data_file.read_text(encoding="utf-8")
+
+        with pytest.raises(StorageError):
+            storage.import_jsonl(io.StringIO('{"id": "b"\n'))
+        with pytest.raises(StorageError):
+            storage.import_jsonl(io.StringIO('{"programId": "x", "id": "x_1"}\n'))
+
+        assert storage.data_file.read_text(encoding="utf-8") == before
+
+    def test_import_empty(self, storage: ProgramStorage, create_program) -> None:
+        """Test importing an empty stream with replace clears the database."""
+        storage.save_program(create_program("a", []))
+
+        assert storage.import_jsonl(io.StringIO(""), replace=True) == 0
+        assert storage.load_programs() == []
+
+
+class TestSchemaVersion:
+    """Test schema versioning and migration."""
+
+    @pytest.fixture
+    def storage(self, tmp_path: Path) -> ProgramStorage:
+        """Create ProgramStorage instance."""
+        return ProgramStorage(str(tmp_path / "programs.yaml"))
+
+    def _write_v1(self, storage: ProgramStorage) -> None:
+        """Write an unversioned database that relies on reader defaults."""
+        storage.data_file.write_text(
+            "programs:\n"
+            "- id: old\n"
+            "  title: Old Program\n"
+            "  url: https://abema.tv/video/title/old\n"
+            "  fetchedAt: '2025-11-08T07:00:00'\n"
+            "  updatedAt: '2025-11-08T07:00:00'\n"
+            "  episodes:\n"
+            "  - id: old_s1_p1\n"
+            "    number: 1\n"
+            "    title: Episode 1\n",
+            encoding="utf-8",
+        )
+
+    def test_version_written_first(self, storage: ProgramStorage, create_program) -> None:
+        """Test that saved files start with the schema version."""
+        from abm_check.infrastructure.migrations import CURRENT_SCHEMA_VERSION
+        storage.save_program(create_program("a", []))
+
+        text = storage.data_file.read_text(encoding="utf-8")
+        assert text.startswith(f"schemaVersion: {CURRENT_SCHEMA_VERSION}\n")
+
+    def test_reads_unversioned_database(self, storage: ProgramStorage) -> None:
+        """Test that v1 databases load through every read path."""
+        self._write_v1(storage)
+
+        program = storage.find_program("old")
+        assert program.platform == "abema"
+        assert program.episodes[0].is_premium_only is True
+        assert storage.load_programs() == [program]
+        assert storage.load_program_summaries()[0].platform == "abema"
+
+    def test_migrate(self, storage: ProgramStorage) -> None:
+        """Test rewriting a v1 database in the current schema."""
+        from abm_check.infrastructure.migrations import CURRENT_SCHEMA_VERSION
+        self._write_v1(storage)
+        before = storage.load_programs()
+
+        assert storage.migrate() == (1, CURRENT_SCHEMA_VERSION)
+
+        data = yaml.safe_load(storage.data_file.read_text(encoding="utf-8"))
+        assert data["schemaVersion"] == CURRENT_SCHEMA_VERSION
+        assert data["programs"][0]["platform"] == "abema"
+        assert data["programs"][0]["episodes"][0]["isPremiumOnly"] is True
+        assert storage.load_programs() == before
+        assert storage.migrate() == (CURRENT_SCHEMA_VERSION, CURRENT_SCHEMA_VERSION)
+
+    def test_newer_version_rejected(self, storage: ProgramStorage, create_program) -> None:
+        """Test that a database from a newer release is not misread or overwritten."""
+        storage.save_program(create_program("a", []))
+        text = storage.data_file.read_text(encoding="utf-8")
+        storage.data_file.write_text(text.replace("schemaVersion: 2", "schemaVersion: 99"), encoding="utf-8")
+        storage.binary_snapshot_file.unlink()
+
+        with pytest.raises(StorageError):
+            storage.load_programs()
+        with pytest.raises(StorageError):
+            list(storage.iter_programs())
+        with pytest.raises(StorageError):
+            storage.save_program(create_program("b", []))
+        with pytest.raises(StorageError):
+            storage.migrate()
+
+    def test_unversioned_journal_records(self, storage: ProgramStorage, create_program) -> None:
+        """Test that journal records without a version are migrated on replay."""
+        storage.save_program(create_program("a", []))
+        storage.journal_file.write_text(
+            json.dumps({"op": "save", "program": {
+                "id": "b", "title": "B", "url": "u",
+                "fetchedAt": "2025-11-08T07:00:00", "updatedAt": "2025-11-08T07:00:00",
+            }}) + "\n",
+            encoding="utf-8",
+        )
+
+        assert storage.find_program("b").platform == "abema"
+        storage.migrate()
+        assert not storage.journal_file.exists()
+        assert storage.get_all_program_ids() == ["a", "b"]
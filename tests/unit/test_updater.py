@@ -7,8 +7,11 @@ from abm_check.infrastructure.updater import ProgramUpdater, EpisodeDiff
 
 @pytest.fixture
 def mock_fetcher():
-    with patch('abm_check.infrastructure.updater.AbemaFetcher') as mock:
-        yield mock.return_value
+    with patch('abm_check.infrastructure.updater.FetcherFactory') as mock:
+        fetcher = MagicMock()
+        fetcher.probe.return_value = None
+        mock.return_value.create_fetcher.side_effect = lambda url: (fetcher, url.rsplit('/', 1)[-1])
+        yield fetcher
 
 @pytest.fixture
 def mock_storage():
@@ -157,7 +160,7 @@ def test_update_all_programs(mock_fetcher, mock_storage, create_episode, create_
     prog3_new = create_program(prog3_id, [prog3_new_ep])
 
     # Mock storage setup
-    mock_storage.load_programs.return_value = [prog1_old, prog2_old, prog3_old]
+    mock_storage.iter_programs.return_value = iter([prog1_old, prog2_old, prog3_old])
     
     def find_program_side_effect(pid):
         if pid == prog1_id: return prog1_old
@@ -193,3 +196,383 @@ def test_update_all_programs(mock_fetcher, mock_storage, create_episode, create_
     assert mock_storage.save_program.call_count == 2
     mock_storage.save_program.assert_any_call(prog1_new)
     mock_storage.save_program.assert_any_call(prog3_new)
+
+def test_update_records_history(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that each update run is passed to the history store."""
+    old_program = create_program("test-7", [create_episode("ep1", 1)])
+    new_program = create_program("test-7", [create_episode("ep1", 1)])
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_program_info.return_value = new_program
+    history = MagicMock()
+
+    updater = ProgramUpdater(history=history)
+    updater.update_program("test-7")
+
+    history.record.assert_called_once_with(new_program, at=new_program.updated_at)
+
+def test_update_program_saves_removed_episode(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that non-download changes are still detected and saved."""
+    old_program = create_program("test-8", [create_episode("ep1", 1), create_episode("ep2", 2)])
+    new_program = create_program("test-8", [create_episode("ep2", 2, title="Renamed")])
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_program_info.return_value = new_program
+
+    updater = ProgramUpdater()
+    diff = updater.update_program("test-8")
+
+    assert [ep.id for ep in diff.removed] == ["ep1"]
+    assert [ep.id for ep in diff.title_changed] == ["ep2"]
+    assert not diff.has_downloads
+    mock_storage.save_program.assert_called_once_with(new_program)
+
+def test_update_all_records_schedule(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that scheduled runs only stream the given programs and persist their state."""
+    old_program = create_program("test-9", [create_episode("ep1", 1)])
+    new_program = create_program("test-9", [create_episode("ep1", 1), create_episode("ep2", 2)])
+    mock_storage.iter_programs.return_value = iter([old_program])
+    mock_fetcher.fetch_program_info.return_value = new_program
+    scheduler = MagicMock()
+
+    updater = ProgramUpdater(scheduler=scheduler)
+    updater.update_all_programs(["test-9"])
+
+    mock_storage.iter_programs.assert_called_once_with(["test-9"])
+    scheduler.record.assert_called_once_with(new_program, True, now=new_program.updated_at)
+    scheduler.save.assert_called_once()
+
+def test_update_all_stops_at_deadline(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that a time-limited run processes programs in order and reports the rest."""
+    programs = {pid: create_program(pid, [create_episode(f"{pid}e1", 1)]) for pid in ("a", "b", "c")}
+    mock_storage.iter_programs.side_effect = lambda ids: iter([programs[pid] for pid in sorted(ids)])
+    mock_fetcher.fetch_program_info.side_effect = lambda pid: programs[pid]
+
+    clock = iter([0.0, 1.0, 5.0, 20.0])
+    updater = ProgramUpdater()
+    with patch('abm_check.infrastructure.updater.time.monotonic', side_effect=lambda: next(clock)):
+        updater.update_all_programs(["c", "a", "b"], max_duration=10)
+
+    fetched = [call.args[0] for call in mock_fetcher.fetch_program_info.call_args_list]
+    assert fetched == ["c", "a"]
+    assert updater.pending == ["b"]
+
+
+def test_update_all_loads_ordered_programs_in_one_pass(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that an ordered run reads storage once, however many programs it selects."""
+    ids = [f"p{i}" for i in range(100)]
+    programs = {pid: create_program(pid, [create_episode(f"{pid}e1", 1)]) for pid in ids}
+    mock_storage.iter_programs.side_effect = lambda wanted: iter([programs[pid] for pid in sorted(wanted)])
+    mock_fetcher.fetch_program_info.side_effect = lambda pid: programs[pid]
+
+    ProgramUpdater().update_all_programs(list(reversed(ids)))
+
+    mock_storage.iter_programs.assert_called_once()
+    fetched = [call.args[0] for call in mock_fetcher.fetch_program_info.call_args_list]
+    assert fetched == list(reversed(ids))
+
+
+def test_update_all_resumes_from_checkpoint(mock_fetcher, mock_storage, create_episode, create_program, tmp_path):
+    """Test that a resumed run skips completed programs and merges their diffs."""
+    from abm_check.infrastructure.checkpoint import UpdateCheckpoint
+
+    programs = {pid: create_program(pid, [create_episode(f"{pid}e1", 1)]) for pid in ("a", "b")}
+    updated = {pid: create_program(pid, [create_episode(f"{pid}e1", 1), create_episode(f"{pid}e2", 2)])
+               for pid in ("a", "b")}
+    mock_storage.iter_programs.side_effect = lambda ids: iter([programs[pid] for pid in ids])
+    mock_fetcher.fetch_program_info.side_effect = lambda pid: updated[pid]
+
+    checkpoint = UpdateCheckpoint(str(tmp_path / "checkpoint.json"))
+    clock = iter([0.0, 1.0, 20.0])
+    updater = ProgramUpdater(checkpoint=checkpoint)
+    with patch('abm_check.infrastructure.updater.time.monotonic', side_effect=lambda: next(clock)):
+        first = updater.update_all_programs(["a", "b"], max_duration=10)
+    assert list(first) == ["a"]
+    assert updater.pending == ["b"]
+
+    updater = ProgramUpdater(checkpoint=UpdateCheckpoint(str(tmp_path / "checkpoint.json")))
+    results = updater.update_all_programs(checkpoint.program_ids)
+
+    fetched = [call.args[0] for call in mock_fetcher.fetch_program_info.call_args_list]
+    assert fetched == ["a", "b"]
+    assert list(results) == ["a", "b"]
+    assert [ep.id for ep in results["a"].new_episodes] == ["ae2"]
+    assert updater.pending == []
+
+
+def test_update_all_reports_each_result(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that on_result is called for each changed program as soon as it is updated."""
+    unchanged = create_program("a", [create_episode("ae1", 1)])
+    changed = create_program("b", [create_episode("be1", 1)])
+    fetched = {
+        "a": create_program("a", [create_episode("ae1", 1)]),
+        "b": create_program("b", [create_episode("be1", 1), create_episode("be2", 2)]),
+    }
+    mock_storage.iter_programs.return_value = iter([unchanged, changed])
+    mock_fetcher.fetch_program_info.side_effect = lambda pid: fetched[pid]
+    seen = []
+
+    updater = ProgramUpdater()
+    updater.update_all_programs(on_result=lambda program, diff: seen.append((program.id, diff)))
+
+    assert [program_id for program_id, _ in seen] == ["b"]
+    assert [ep.id for ep in seen[0][1].new_episodes] == ["be2"]
+
+
+def test_update_all_trips_circuit_per_platform(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that a failing platform is skipped after repeated failures while others complete."""
+    from abm_check.domain.exceptions import FetchError
+
+    programs = [create_program(f"a{i}", [create_episode("ep1", 1)]) for i in range(5)]
+    nico = create_program("n1", [create_episode("ep1", 1)])
+    nico.platform = "niconico"
+    programs.insert(2, nico)
+    mock_storage.iter_programs.return_value = iter(programs)
+
+    def fetch(pid):
+        if pid.startswith("a"):
+            raise FetchError(pid, "HTTP Error 503")
+        return create_program(pid, [create_episode("ep1", 1), create_episode("ep2", 2)])
+
+    mock_fetcher.fetch_program_info.side_effect = fetch
+
+    updater = ProgramUpdater()
+    results = updater.update_all_programs()
+
+    fetched = [call.args[0] for call in mock_fetcher.fetch_program_info.call_args_list]
+    assert fetched == ["a0", "a1", "n1", "a2"]
+    assert list(results) == ["n1"]
+    assert list(updater.failures["abema"]) == ["a0", "a1", "a2"]
+    assert updater.skipped == {"abema": ["a3", "a4"]}
+
+
+def test_update_all_missing_programs_do_not_trip_circuit(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that programs gone from the source are failures but not platform outages."""
+    from abm_check.domain.exceptions import SourceNotFoundError
+
+    programs = [create_program(f"a{i}", [create_episode("ep1", 1)]) for i in range(5)]
+    mock_storage.iter_programs.return_value = iter(programs)
+
+    def fetch(pid):
+        if pid != "a4":
+            raise SourceNotFoundError(pid)
+        return create_program(pid, [create_episode("ep1", 1), create_episode("ep2", 2)])
+
+    mock_fetcher.fetch_program_info.side_effect = fetch
+
+    updater = ProgramUpdater()
+    results = updater.update_all_programs()
+
+    assert list(results) == ["a4"]
+    assert list(updater.failures["abema"]) == ["a0", "a1", "a2", "a3"]
+    assert updater.skipped == {}
+
+
+def test_update_all_storage_error_aborts(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that storage errors are not absorbed by the failure budget."""
+    from abm_check.domain.exceptions import StorageError
+
+    mock_storage.iter_programs.return_value = iter([create_program("a", [create_episode("ep1", 1)])])
+    mock_fetcher.fetch_program_info.return_value = create_program("a", [create_episode("ep2", 2)])
+    mock_storage.save_program.side_effect = StorageError("save", "disk full")
+
+    with pytest.raises(StorageError):
+        ProgramUpdater().update_all_programs()
+
+
+def test_update_skips_unchanged_source(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that a matching source fingerprint short-circuits conversion, diffing and saving."""
+    old_program = create_program("test-10", [create_episode("ep1", 1)])
+    old_program.source_fingerprint = "fp1"
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_program_info.return_value = None
+    scheduler = MagicMock()
+
+    updater = ProgramUpdater(scheduler=scheduler)
+    diff = updater.update_program("test-10")
+
+    mock_fetcher.fetch_program_info.assert_called_once_with("test-10", known_fingerprint="fp1")
+    assert not diff.has_changes
+    mock_storage.save_program.assert_not_called()
+    scheduler.record.assert_called_once_with(old_program, False)
+
+
+def test_update_saves_new_source_fingerprint(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that a program is saved when only its source fingerprint changed."""
+    old_program = create_program("test-11", [create_episode("ep1", 1)])
+    new_program = create_program("test-11", [create_episode("ep1", 1)])
+    new_program.source_fingerprint = "fp2"
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_program_info.return_value = new_program
+
+    diff = ProgramUpdater().update_program("test-11")
+
+    assert not diff.has_changes
+    mock_storage.save_program.assert_called_once_with(new_program)
+
+
+def test_update_premium_strategy_rechecks_premium_episodes(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that the premium strategy fetches only premium-only episodes and merges their availability."""
+    free = create_episode("ep1", 1)
+    premium = create_episode("ep2", 2, is_downloadable=False, is_premium_only=True)
+    still_premium = create_episode("ep3", 3, is_downloadable=False, is_premium_only=True)
+    old_program = create_program("test-12", [free, premium, still_premium])
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_episodes.return_value = {
+        "ep2": create_episode("ep2", 2, title="Title on the episode page"),
+        "ep3": create_episode("ep3", 3, is_downloadable=False, is_premium_only=True),
+    }
+
+    updater = ProgramUpdater(strategy="premium")
+    diff = updater.update_program("test-12")
+
+    mock_fetcher.fetch_episodes.assert_called_once_with(["ep2", "ep3"])
+    mock_fetcher.fetch_program_info.assert_not_called()
+    assert [ep.id for ep in diff.premium_to_free] == ["ep2"]
+    assert not diff.title_changed
+    saved = mock_storage.save_program.call_args.args[0]
+    assert [(ep.id, ep.is_downloadable) for ep in saved.episodes] == [("ep1", True), ("ep2", True), ("ep3", False)]
+    assert saved.episodes[1].title == "Episode 2"
+
+
+def test_update_premium_strategy_without_flips(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that nothing is saved when no premium-only episode changed."""
+    old_program = create_program("test-13", [create_episode("ep1", 1, is_downloadable=False, is_premium_only=True)])
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_episodes.return_value = {}
+
+    diff = ProgramUpdater(strategy="premium").update_program("test-13")
+
+    assert not diff.has_changes
+    mock_storage.save_program.assert_not_called()
+
+
+def test_update_premium_strategy_falls_back_to_full_fetch(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that platforms without episode pages are fetched in full."""
+    old_program = create_program("test-14", [create_episode("ep1", 1, is_downloadable=False, is_premium_only=True)])
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_episodes.side_effect = NotImplementedError
+    mock_fetcher.fetch_program_info.return_value = create_program("test-14", [create_episode("ep1", 1)])
+
+    diff = ProgramUpdater(strategy="premium").update_program("test-14")
+
+    mock_fetcher.fetch_program_info.assert_called_once_with("test-14")
+    assert [ep.id for ep in diff.premium_to_free] == ["ep1"]
+
+
+def _season_program(create_program, create_episode, pid, layout):
+    """Build a program from (season, episode number, premium) tuples with ABEMA-style IDs."""
+    episodes = [
+        create_episode(f"{pid}_s{season}_p{number}", number,
+                       is_downloadable=not premium, is_premium_only=premium)
+        for season, number, premium in layout
+    ]
+    return create_program(pid, episodes)
+
+
+def test_update_latest_season_strategy(mock_fetcher, mock_storage, create_episode, create_program, tmp_path):
+    """Test that only the latest season and seasons with premium episodes are re-fetched and merged."""
+    from abm_check.infrastructure.schedule import ProgramStateStore
+
+    old_program = _season_program(create_program, create_episode, "26-1", [
+        (1, 1, False), (1, 2, False), (2, 1, True), (3, 1, False),
+    ])
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_seasons.return_value = {
+        2: [create_episode("26-1_s2_p1", 1, is_downloadable=False, is_premium_only=True)],
+        3: [create_episode("26-1_s3_p1", 1), create_episode("26-1_s3_p2", 2)],
+    }
+    updater = ProgramUpdater(strategy="latest-season")
+    updater.state_store = ProgramStateStore(str(tmp_path / "state.json"))
+    updater.state_store.get("26-1").last_full_fetch = datetime.now() - timedelta(days=1)
+
+    diff = updater.update_program("26-1")
+
+    mock_fetcher.fetch_seasons.assert_called_once_with("26-1", {2, 3})
+    mock_fetcher.fetch_program_info.assert_not_called()
+    assert [ep.id for ep in diff.new_episodes] == ["26-1_s3_p2"]
+    saved = mock_storage.save_program.call_args.args[0]
+    assert [ep.id for ep in saved.episodes] == ["26-1_s1_p1", "26-1_s1_p2", "26-1_s2_p1", "26-1_s3_p1", "26-1_s3_p2"]
+    assert saved.total_episodes == 5
+
+
+def test_update_latest_season_full_refresh_due(mock_fetcher, mock_storage, create_episode, create_program, tmp_path):
+    """Test that every season is re-fetched when the last full fetch is too old."""
+    from abm_check.infrastructure.schedule import ProgramStateStore
+
+    old_program = _season_program(create_program, create_episode, "26-2", [(1, 1, False), (2, 1, False)])
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_program_info.return_value = old_program
+    updater = ProgramUpdater(strategy="latest-season")
+    updater.state_store = ProgramStateStore(str(tmp_path / "state.json"))
+    updater.state_store.get("26-2").last_full_fetch = datetime.now() - timedelta(days=30)
+
+    updater.update_program("26-2")
+
+    mock_fetcher.fetch_seasons.assert_not_called()
+    mock_fetcher.fetch_program_info.assert_called_once_with("26-2")
+    assert updater.state_store.get("26-2").last_full_fetch > datetime.now() - timedelta(minutes=1)
+    assert ProgramStateStore(str(tmp_path / "state.json")).find("26-2").last_full_fetch is not None
+
+
+def test_update_skips_fetch_when_probe_matches(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that a matching probe token skips the full fetch."""
+    old_program = create_program("test-20", [create_episode("ep1", 1)])
+    old_program.probe_token = "tok1"
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.probe.return_value = "tok1"
+
+    diff = ProgramUpdater().update_program("test-20")
+
+    assert not diff.has_changes
+    mock_fetcher.probe.assert_called_once_with("test-20", known_token="tok1")
+    mock_fetcher.fetch_program_info.assert_not_called()
+    mock_storage.save_program.assert_not_called()
+
+
+def test_update_stores_new_probe_token(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that a changed token triggers a full fetch and is saved even if the source matches."""
+    old_program = create_program("test-21", [create_episode("ep1", 1)])
+    old_program.probe_token = "tok1"
+    old_program.source_fingerprint = "fp1"
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.probe.return_value = "tok2"
+    mock_fetcher.fetch_program_info.return_value = None
+
+    diff = ProgramUpdater().update_program("test-21")
+
+    assert not diff.has_changes
+    mock_fetcher.fetch_program_info.assert_called_once_with("test-21", known_fingerprint="fp1")
+    saved = mock_storage.save_program.call_args.args[0]
+    assert saved.probe_token == "tok2"
+    assert saved.episodes == old_program.episodes
+
+
+def test_update_falls_back_to_full_fetch_when_probe_fails(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that a failing probe is not a failed check: the program is fetched in full."""
+    from abm_check.domain.exceptions import YtdlpError
+
+    programs = {pid: create_program(pid, [create_episode(f"{pid}e1", 1)]) for pid in ("a0", "a1", "a2", "a3")}
+    mock_storage.iter_programs.return_value = iter(programs.values())
+    mock_fetcher.probe.side_effect = YtdlpError("listing timed out")
+    mock_fetcher.fetch_program_info.side_effect = lambda pid: programs[pid]
+
+    updater = ProgramUpdater()
+    updater.update_all_programs()
+
+    fetched = [call.args[0] for call in mock_fetcher.fetch_program_info.call_args_list]
+    assert fetched == ["a0", "a1", "a2", "a3"]
+    assert updater.failures == {}
+    assert updater.skipped == {}
+
+
+def test_update_does_not_probe_premium_programs(mock_fetcher, mock_storage, create_episode, create_program):
+    """Test that programs with premium-only episodes are always fully fetched."""
+    old_program = create_program("test-22", [create_episode("ep1", 1, is_downloadable=False, is_premium_only=True)])
+    old_program.probe_token = "tok1"
+    mock_storage.find_program.return_value = old_program
+    mock_fetcher.fetch_program_info.return_value = create_program("test-22", [create_episode("ep1", 1)])
+
+    diff = ProgramUpdater().update_program("test-22")
+
+    mock_fetcher.probe.assert_not_called()
+    assert diff.premium_to_free
+